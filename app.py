@@ -9,7 +9,31 @@ import altair as alt
 import base64
 import numpy as np
 import io
-import random
+import hmac
+import contextvars
+import threading
+
+from replica import Replica
+from writes import WriteBuffer, WriteResult
+from inventory import InventoryIndex, StockLedger
+import quota
+from quota import QuotaHTTPClient
+from catalog import enrich_items, attach
+from rollup import DailyRollup
+from orders import OrderBook
+from gridsync import KeyedSheet
+from logbook import LogBook, is_deleted
+from schema import apply_schema
+from palletize import plan_pallets, greedy_pallets
+from printing import render_order, render_batch, print_document
+from export import to_xlsx, to_csv, XLSX_MIME, CSV_MIME
+from journal import WriteJournal
+from bom import BomEngine
+from mrp import mrp
+from atp import AtpBook, POLICIES, POOL_ALL
+from telemetry import Telemetry
+from versions import SheetVersions, META_SHEET, META_HEADERS
+from wastewater import WW_HEADERS, period_range, daily_production, journal_rows, skip_existing, annual_report, report_html
 
 # --- 0. 아이콘 설정 함수 ---
 def add_apple_touch_icon(image_path):
@@ -38,7 +62,20 @@ if os.path.exists("logo.png"):
 else:
     st.set_page_config(page_title="KPR ERP", page_icon="🏭", layout="wide")
 
+# --- 1-1. 계측 (telemetry.py) ---
+# 시트 API 호출(quota.observer)과 화면 실행 시간(로딩/필터/그리기)을 프로세스 메모리에 남긴다. 관리자 메뉴에서 본다.
+@st.cache_resource
+def get_telemetry():
+    tm = Telemetry()
+    quota.observer = tm.api_call
+    return tm
+
+telemetry = get_telemetry()
+if '_run_session' not in st.session_state: st.session_state['_run_session'] = os.urandom(6).hex()
+telemetry.begin_run(st.session_state['_run_session'])
+
 # --- 2. 구글 시트 연결 ---
+# 모든 시트 호출은 QuotaHTTPClient(quota.py)를 거쳐 분당 한도와 재시도(백오프)를 관리한다.
 @st.cache_resource
 def get_connection():
     scopes = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
@@ -47,13 +84,13 @@ def get_connection():
         if "gcp_service_account" in st.secrets:
             key_dict = dict(st.secrets["gcp_service_account"])
             creds = Credentials.from_service_account_info(key_dict, scopes=scopes)
-            client = gspread.authorize(creds)
+            client = gspread.authorize(creds, http_client=QuotaHTTPClient)
             return client.open_by_key(spreadsheet_id)
     except Exception: pass
     key_file = 'key.json'
     if os.path.exists(key_file):
         creds = Credentials.from_service_account_file(key_file, scopes=scopes)
-        client = gspread.authorize(creds)
+        client = gspread.authorize(creds, http_client=QuotaHTTPClient)
         return client.open_by_key(spreadsheet_id)
     return None
 
@@ -78,75 +115,300 @@ sheet_logs = get_sheet(doc, 'Logs')
 sheet_bom = get_sheet(doc, 'BOM')
 sheet_orders = get_sheet(doc, 'Orders')
 
-ww_headers = ['날짜', '대표자', '환경기술인', '가동시간', '플라스틱재생칩', '합성수지', '안료', '용수사용량', '폐수발생량', '위탁량', '기타']
+ww_headers = WW_HEADERS
 sheet_wastewater = get_sheet(doc, 'Wastewater', ww_headers)
 
 mtg_headers = ['ID', '작성일', '공장', '안건내용', '담당자', '상태', '비고']
 sheet_meetings = get_sheet(doc, 'Meetings', mtg_headers)
 
 # --- 3. 데이터 로딩 ---
-@st.cache_data(ttl=60)
-def load_data():
-    data = []
-    sheets = [sheet_items, sheet_inventory, sheet_logs, sheet_bom, sheet_orders, sheet_wastewater, sheet_meetings]
-    for s in sheets:
-        df = pd.DataFrame()
-        if s:
-            for attempt in range(5):
-                try:
-                    d = s.get_all_records()
-                    if d:
-                        df = pd.DataFrame(d)
-                        df = df.replace([np.inf, -np.inf], np.nan).fillna("")
-                        if '수량' in df.columns:
-                            df['수량'] = pd.to_numeric(df['수량'], errors='coerce').fillna(0.0)
-                    break
-                except: time.sleep(1)
-        data.append(df)
-    
-    try:
-        s_map = get_sheet(doc, 'Print_Mapping')
-        if s_map: df_map = pd.DataFrame(s_map.get_all_records())
-        else: df_map = pd.DataFrame(columns=['Code', 'Print_Name'])
-    except: df_map = pd.DataFrame(columns=['Code', 'Print_Name'])
-    
-    data.append(df_map)
-    return tuple(data)
+# 로컬 SQLite 복제본(replica.py)에서 읽고, 시트에는 마지막 동기화 이후 추가된 행만 요청한다.
+@st.cache_resource
+def get_replica():
+    return Replica()
+
+replica = get_replica()
+
+def mark_changed(*names):
+    # 시트 중간 행을 고친 경우(수정/삭제/clear) 다음 로딩 때 해당 시트를 전체 동기화
+    try: replica.invalidate(*names)
+    except Exception: pass
+
+SHEET_ORDER = ['Items', 'Inventory', 'Logs', 'BOM', 'Orders', 'Wastewater', 'Meetings', 'Print_Mapping']
+
+# 시트별 버전(versions.py): 고친 시트만 버전을 올리고, 캐시는 (시트, 버전)으로 잡는다
+@st.cache_resource
+def get_sheet_versions():
+    sv = SheetVersions(get_sheet(doc, META_SHEET, META_HEADERS))
+    try: sv.ensure(SHEET_ORDER)
+    except Exception: pass
+    return sv
+
+sheet_versions = get_sheet_versions()
+
+# edited: 중간 행을 고치거나 지운 시트 → 다른 프로세스의 복제본도 전체 동기화 (뒤에 붙이기만 했으면 빼고 부른다)
+def touch(*names, edited=()):
+    sheet_versions.bump(*names, edited=edited)
+
+# 시트 중간을 고쳤다: 이 프로세스 복제본을 무효화하고, 버전과 Edited 표시를 함께 올린다
+def touch_edited(*names):
+    mark_changed(*names); touch(*names, edited=names)
+
+# 로그/주문은 품목 정보를 붙여 두므로 Items 버전도 함께 본다
+def sheet_version(name):
+    deps = [name, 'Items'] if name in ('Logs', 'Orders') else [name]
+    return "|".join(sheet_versions.token(n) for n in deps)
+
+# 다른 프로세스가 중간을 고친 시트(Edited 값이 바뀜)는 추가분만이 아니라 전체를 다시 받는다
+def expect_edits(*names):
+    for n in names:
+        try: replica.expect_edit(n, sheet_versions.edited(n))
+        except Exception: pass
+
+# 행 추가는 로컬 저널에 적고 바로 돌아온다. 백그라운드 스레드가 시트로 보내고, 실패하면 다시 보낸다 (journal.py)
+# 키 열: 다시 보낼 때 이미 들어간 행인지 확인하는 열
+# 보낸 뒤: 버전을 올리고, Logs 행이면 그 증감을 Inventory 시트에 더한다 (apply_stock)
+def on_journal_sent(title, rows):
+    touch(title)
+    if title == 'Logs': apply_stock(rows)
+
+@st.cache_resource
+def get_write_journal():
+    return WriteJournal(lambda t: sheet_ws(t) or get_sheet(doc, t), keys={'Logs': 'ID', 'Meetings': 'ID', 'Wastewater': '날짜'}, on_sent=on_journal_sent)
+
+write_journal = get_write_journal()
+
+# 로그 행은 고유 ID로 찾고, 삭제는 '삭제' 칸 표시 → 백그라운드 정리로 실제 삭제 (logbook.py)
+@st.cache_resource
+def get_log_book():
+    if sheet_logs is None: return None
+    book = LogBook(sheet_logs, settle=write_journal.wait_idle, meta_ws=get_sheet(doc, META_SHEET, META_HEADERS))  # 메타 시트의 임대 칸: 정리는 한 프로세스만
+    if book.backfilled: touch_edited('Logs')  # 기존 행에 ID를 채웠으면 복제본을 다시 받는다
+    book.start_compactor(on_compact=lambda n: touch_edited('Logs'))
+    return book
+
+log_book = get_log_book()
+
+# 메뉴마다 필요한 시트만 불러온다. 시트별로 따로 캐시하고, 자주 바뀌는 시트(Logs, Orders)는 짧게,
+# 거의 안 바뀌는 시트(Items, BOM, Print_Mapping)는 길게 둔다.
+MENU_SHEETS = {
+    "대시보드": ['Logs', 'Orders'],
+    "재고/생산 관리": ['Items', 'Inventory', 'Logs', 'BOM', 'Orders'],
+    "영업/출고 관리": ['Items', 'Logs', 'Orders', 'Print_Mapping'],
+    "🏭 현장 작업 (LOT 입력)": ['Orders', 'Logs'],
+    "🔍 이력/LOT 검색": ['Logs', 'Orders'],
+    "🌊 환경/폐수 일지": ['Logs', 'Wastewater'],
+    "📋 주간 회의 & 개선사항": ['Meetings'],
+}
+ADMIN_MENU = "📈 시스템 계측"  # 관리자만 보이는 메뉴 (시트는 읽지 않음)
+MENU_SHEETS[ADMIN_MENU] = []
+FAST_SHEETS = ['Logs', 'Orders']
+SLOW_SHEETS = ['Items', 'BOM', 'Print_Mapping']
+TTL_FAST, TTL_MID, TTL_SLOW = 30, 120, 600   # 초
+
+def sheet_ws(name):
+    ws = {'Items': sheet_items, 'Inventory': sheet_inventory, 'Logs': sheet_logs, 'BOM': sheet_bom, 'Orders': sheet_orders, 'Wastewater': sheet_wastewater, 'Meetings': sheet_meetings}.get(name)
+    if ws is None and name == 'Print_Mapping':
+        try: ws = get_sheet(doc, 'Print_Mapping')
+        except: ws = None
+    return ws
+
+# 시트별로 마지막으로 불러온 (버전, 시각): 캐시가 곧 다시 불러올 시트를 load_for가 미리 알기 위해
+@st.cache_resource
+def get_load_marks():
+    return {}
+
+_presynced = contextvars.ContextVar('presynced', default=frozenset())  # 이번 실행에서 load_for가 한꺼번에 동기화한 시트
+
+# 복제본(replica.py)을 시트 하나만 동기화해서 읽는다 (load_for가 이미 함께 동기화했으면 건너뜀).
+# 동기화가 실패하면 마지막으로 받아 둔 복제본을 그대로 쓴다.
+def read_sheet(name):
+    ws = sheet_ws(name)
+    if ws is None: return pd.DataFrame(columns=['Code', 'Print_Name']) if name == 'Print_Mapping' else pd.DataFrame()
+    if name not in _presynced.get(): expect_edits(name); replica.sync_one(name, ws)
+    get_load_marks()[name] = (sheet_version(name), time.time())
+    try: df = replica.frame(name)
+    except: df = pd.DataFrame()
+    gen = df.attrs.get('replica_gen')  # 복제본 세대: 재고 스냅샷/일별 집계가 앞부분을 다시 써도 되는지 (inventory.log_marker)
+    df = write_journal.overlay(name, df)  # 아직 시트로 보내지 않은 행 추가
+    if name == 'Print_Mapping': return df if not df.empty else pd.DataFrame(columns=['Code', 'Print_Name'])
+    df = apply_schema(name, df)  # 열 타입은 여기서 한 번만 (schema.py)
+    # 제품군/그룹/형상은 품목을 불러올 때 한 번만 계산해서 로그/주문에 코드로 붙인다 (catalog.py)
+    if name == 'Items': df = enrich_items(df)
+    if name == 'Logs': df = df[~is_deleted(df)]  # 삭제 표시된 행(정리 전)은 빼고 쓴다
+    if name in ('Logs', 'Orders'): df = attach(df, load_sheet('Items'))
+    if gen is not None: df.attrs['replica_gen'] = gen
+    return df
+
+# version은 캐시 키로만 쓴다. ttl은 앱 밖(시트 화면)에서 고친 내용을 늦게라도 반영하기 위한 것
+@st.cache_data(ttl=TTL_FAST)
+def load_fast(name, version): return read_sheet(name)
+
+@st.cache_data(ttl=TTL_MID)
+def load_mid(name, version): return read_sheet(name)
+
+@st.cache_data(ttl=TTL_SLOW)
+def load_slow(name, version): return read_sheet(name)
+
+def sheet_ttl(name):
+    return TTL_FAST if name in FAST_SHEETS else TTL_SLOW if name in SLOW_SHEETS else TTL_MID
+
+def load_sheet(name):
+    ver = sheet_version(name)
+    if name in FAST_SHEETS: return load_fast(name, ver)
+    if name in SLOW_SHEETS: return load_slow(name, ver)
+    return load_mid(name, ver)
+
+# 메뉴가 쓰지 않는 시트는 빈 표로 채워서 기존 변수 이름 그대로 돌려준다.
+# 다시 불러올(버전이 바뀌었거나 캐시 시간이 지난) 시트가 둘 이상이면 values_batch_get 한 번으로 함께 동기화하고(replica.sync_all),
+# 캐시는 그대로 시트별 (이름, 버전)으로 잡는다.
+def load_for(menu):
+    need = MENU_SHEETS.get(menu, SHEET_ORDER)
+    marks, now = get_load_marks(), time.time()
+    stale = {n: sheet_ws(n) for n in need if marks.get(n, ("", 0.0))[0] != sheet_version(n) or now - marks[n][1] >= sheet_ttl(n)}
+    stale = {n: ws for n, ws in stale.items() if ws is not None}
+    tok = None
+    if len(stale) > 1: expect_edits(*stale); replica.sync_all(doc, stale); tok = _presynced.set(frozenset(stale))
+    try: return tuple(load_sheet(n) if n in need else pd.DataFrame() for n in SHEET_ORDER)
+    finally:
+        if tok is not None: _presynced.reset(tok)
 
 def safe_float(val):
     try: return float(val)
     except: return 0.0
 
-# --- 4. 재고 업데이트 ---
-def update_inventory(factory, code, qty, p_name="-", p_spec="-", p_type="-", p_color="-", p_unit="-"):
-    if not sheet_inventory: return
-    try:
-        time.sleep(1)
-        cells = sheet_inventory.findall(str(code))
-        target = None
-        if cells:
-            for c in cells:
-                if c.col == 2: target = c; break
-        if target:
-            curr = safe_float(sheet_inventory.cell(target.row, 7).value)
-            sheet_inventory.update_cell(target.row, 7, curr + qty)
-        else:
-            sheet_inventory.append_row([factory, code, p_name, p_spec, p_type, p_color, qty])
-    except: pass
+# --- 4. 재고 ---
+# 현재고는 Logs 원장에서 계산한다 (StockLedger). 저장할 때 Inventory 시트는 고치지 않고,
+# 재고 현황 탭에서 계산값을 한 번에 반영한다 (InventoryIndex: 키별 잠금 + Ver 열 compare-and-swap).
+# 쓰기는 WriteBuffer(wb)에 모았다가 동작 단위로 한 번에 보낸다.
+@st.cache_resource
+def get_inventory_index():
+    return InventoryIndex(sheet_inventory, settle=write_journal.wait_idle, meta_ws=get_sheet(doc, META_SHEET, META_HEADERS)) if sheet_inventory else None
+
+@st.cache_resource
+def get_stock_ledger():
+    return StockLedger(replica.path)
+
+inventory_index = get_inventory_index()
+write_journal.start()  # 보낸 Logs 행을 재고에 더하는 색인(apply_stock)이 준비된 뒤에 보내기 시작
+
+# 시트에 들어간 Logs 행만큼 Inventory 시트 재고를 더하고 뺀다 (키별 대기열 + Ver CAS, 새 키 행은 임대를 잡고).
+# 실패하면 사이드바에 알리고, 재고 현황 탭의 📤 반영으로 계산값에 맞춘다.
+def apply_stock(rows):
+    if not rows or inventory_index is None or log_book is None: return
+    if inventory_index.apply_logs(rows, log_book.head): touch_edited('Inventory')
+stock_ledger = get_stock_ledger()
+
+# 셀 수정/행 삭제는 지금 보내고, 키 열이 있는 시트(Logs 등)의 행 추가는 저널에 맡긴다(앞의 것이 성공했을 때만).
+# 화면은 저널의 행을 붙여서 바로 보여 준다. 키 열이 없는 시트(Orders 등)의 행 추가는 다시 보낼 때 중복을 막을 수 없어서 바로 보낸다.
+# journal=False: 행 추가도 전부 바로, 처음 쓴 시트 순서대로 보낸다. 뒤 시트의 셀 수정이 앞 시트의 행 추가가 성공했을 때만
+# 반영되어야 하는 동작(출고 Logs → 주문 '완료')에 쓴다.
+# 고친 시트만 버전을 올린다 → 다음 실행에서 그 시트만 다시 불러옴
+def commit_writes(wb, journal=True):
+    with telemetry.section('write'):
+        appends = wb.take_appends([t for t in wb.appended() if write_journal.accepts(t)]) if journal else {}
+        direct = wb.appended()
+        res = wb.flush()
+        if res.changed: mark_changed(*res.changed)
+        if res.ok and appends:
+            try: write_journal.submit(appends)
+            except Exception as e: res = WriteResult(False, e, res.calls, res.changed); appends = {}
+        touch(*res.changed, *direct, *appends, edited=res.changed)
+        if res.ok and direct.get('Logs'):   # 바로 보낸 Logs 행(출고 확정)도 재고에 더한다. 화면은 기다리지 않는다.
+            threading.Thread(target=apply_stock, args=(direct['Logs'],), name="inventory-apply", daemon=True).start()
+    return res
+
+@st.cache_data(ttl=30)
+def load_stock(version):
+    return stock_ledger.stock(load_sheet('Logs'))
+
+# 대시보드 집계: 로그가 새로 불러와질 때 늘어난 행만 일별 집계에 더한다 (rollup.py)
+@st.cache_resource
+def get_daily_rollup():
+    return DailyRollup()
+
+# 집계는 resource 쪽에 들고 있고, 여기서는 로그가 새로 불러와졌을 때 한 번만 update가 돌도록 막아 준다
+@st.cache_data(ttl=30)
+def load_rollup(version):
+    return get_daily_rollup().update(load_sheet('Logs')).n_rows
+
+# BOM 전개 행렬(bom.py)은 BOM/Items 버전이 바뀔 때만 다시 만든다
+@st.cache_resource(max_entries=2)
+def get_bom_engine(version):
+    items = load_sheet('Items')
+    types = dict(zip(items['코드'], items['타입'].astype(str))) if {'코드', '타입'} <= set(items.columns) else {}
+    return BomEngine(load_sheet('BOM'), types)
+
+def bom_engine():
+    return get_bom_engine(sheet_version('BOM') + "|" + sheet_version('Items'))
+
+# 생산 차감 자재: 다단계면 이 공장 반제품 재고를 먼저 쓰고 모자란 만큼만 하위 BOM으로 (bom.py explode_netted)
+# 수정할 때는 지우는 이전 사용(Auto) 행(add_back)만큼 재고를 되돌린 뒤 계산한다
+def production_usage(code, type_, qty, fac, multi, add_back=None):
+    eng = bom_engine()
+    if not multi: return eng.explode(code, type_, qty, multi=False)
+    s = df_stock[df_stock['공장'] == fac]
+    stock = pd.to_numeric(s['현재고'], errors='coerce').fillna(0).groupby(s['코드']).sum()
+    if add_back is not None and not add_back.empty:
+        stock = stock.sub(pd.to_numeric(add_back['수량'], errors='coerce').fillna(0).groupby(add_back['코드']).sum(), fill_value=0)
+    return eng.explode_netted(code, type_, qty, stock.to_dict())
+
+# 준비 주문 전체에 제품 재고를 배정한 결과 (atp.py). 배정 순서마다 하나씩 들고 있다가
+# 주문/로그 버전이 바뀌면 바뀐 주문의 코드와 재고가 바뀐 코드만 다시 배정한다.
+@st.cache_resource
+def get_atp_book(policy):
+    return AtpBook(policy)
+
+def atp_book(df_orders, df_stock, rule="날짜순"):
+    book = get_atp_book(POLICIES[rule])
+    with telemetry.section('filter'): book.sync(df_orders, df_stock, sheet_version('Orders') + "|" + sheet_version('Logs'))
+    return book
+
+def show_atp_orders(book, key):
+    pool = st.radio("재고 기준", [POOL_ALL, "1공장", "2공장"], horizontal=True, key=key)
+    tbl = book.orders_table(pool)
+    if tbl.empty: st.info("준비 상태 주문이 없습니다."); return
+    st.caption(f"준비 주문 {len(tbl)}건 중 충족 {int((tbl['판정'] == '충족').sum())}건 · 부족 합계 {tbl['부족'].sum():,.0f} kg")
+    st.dataframe(tbl, use_container_width=True, hide_index=True)
+
+def stock_of(df_stock, code, factory=None):
+    if df_stock.empty: return 0.0
+    m = df_stock['코드'] == str(code).strip()
+    if factory: m &= df_stock['공장'] == factory
+    return float(df_stock.loc[m, '현재고'].sum())
+
+# 주문 시트는 주문번호 → 행 색인(orders.py)으로 해당 주문의 행/셀만 고친다
+@st.cache_resource
+def get_order_book():
+    return OrderBook(sheet_orders, settle=write_journal.wait_idle) if sheet_orders else None
+
+order_book = get_order_book()
+
+# 편집 표(data_editor)는 키 열로 이전 값과 비교해 바뀐 행만 저장한다 (gridsync.py)
+@st.cache_resource
+def get_keyed_sheet(name, key):
+    ws = {'Meetings': sheet_meetings, 'Wastewater': sheet_wastewater}.get(name) or get_sheet(doc, name)
+    return KeyedSheet(ws, key, settle=write_journal.wait_idle) if ws else None
+
+def save_grid(name, key, original, edited, delete_missing=True):
+    wb = WriteBuffer()
+    counts = get_keyed_sheet(name, key).stage(wb, original, edited, delete_missing)
+    return commit_writes(wb), counts
+
+def mark_order_done(wb, order_id):
+    # 해당 주문 행의 '상태' 셀만 '완료'로 바꾼다 (시트 전체를 지우고 다시 쓰지 않음)
+    # 출고 Logs 행을 먼저 wb에 넣고 commit_writes(wb, journal=False)로 보내야 Logs가 들어간 뒤에만 완료로 바뀐다
+    order_book.set_status(wb, order_id, '완료')
 
 # --- 5. 헬퍼 함수 ---
-def get_shape(code, df_items):
-    shape = "-"
-    if not df_items.empty:
-        item_row = df_items[df_items['코드'].astype(str) == str(code)]
-        if not item_row.empty:
-            korean_type = str(item_row.iloc[0].get('타입', '-'))
-            if "원통" in korean_type: shape = "CYLINDRIC"
-            elif "큐빅" in korean_type: shape = "CUBICAL"
-            elif "펠렛" in korean_type: shape = "PELLET"
-            elif "파우더" in korean_type: shape = "POWDER"
-            else: shape = korean_type
-    return shape
+# 팔레트 배치 (palletize.py). 최적 배치가 실패하면 기존 순서대로 채우기로 대신한다.
+PALLET_MODES = {"최적 (팔레트 수·혼적 최소)": "opt", "제품별로 모으기": "keep", "기존 (순서대로 채우기)": "greedy"}
+
+def split_pallets(qtys, cap, mode="opt"):
+    if mode != "greedy":
+        try: return plan_pallets(qtys, cap, keep_together=(mode == "keep"))
+        except Exception: pass
+    return greedy_pallets(qtys, cap)
 
 def create_print_button(html_content, title="Print", orientation="portrait"):
     safe_content = html_content.replace('`', '\`').replace('$', '\$')
@@ -155,7 +417,7 @@ def create_print_button(html_content, title="Print", orientation="portrait"):
     js_code = f"""<script>
     function print_{title.replace(" ", "_")}() {{
         var win = window.open('', '', 'width=900,height=700');
-        win.document.write('<html><head><title>{title}</title><style>{page_css} body {{ font-family: sans-serif; margin: 0; padding: 0; }} table {{ border-collapse: collapse; width: 100%; }} th, td {{ border: 1px solid black; padding: 4px; }} .page-break {{ page-break-after: always; width: 100vw; height: 100vh; display: flex; justify-content: center; align-items: center; }}</style></head><body>');
+        win.document.write('<html><head><title>{title}</title><style>{page_css} body {{ font-family: sans-serif; margin: 0; padding: 0; }} table {{ border-collapse: collapse; width: 100%; }} th, td {{ border: 1px solid black; padding: 4px; }} .page-break {{ page-break-after: always; width: 100vw; height: 100vh; display: flex; justify-content: center; align-items: center; }} .order-break {{ page-break-after: always; }}</style></head><body>');
         win.document.write(`{safe_content}`);
         win.document.write('</body></html>');
         win.document.close();
@@ -166,16 +428,17 @@ def create_print_button(html_content, title="Print", orientation="portrait"):
     <button onclick="print_{title.replace(" ", "_")}()" style="background-color: #4CAF50; border: none; color: white; padding: 10px 20px; font-size: 14px; margin: 4px 2px; cursor: pointer; border-radius: 5px;">🖨️ {title} 인쇄하기</button>"""
     return js_code
 
-def get_product_category(row):
-    name = str(row['품목명']).upper()
-    code = str(row['코드']).upper()
-    gubun = str(row.get('구분', '')).strip()
-    if 'CP' in name or 'COMPOUND' in name or 'CP' in code: return "Compound"
-    if ('KA' in name or 'KA' in code) and (gubun == '반제품' or name.endswith('반') or '반' in name): return "KA반제품"
-    if 'KA' in name or 'KA' in code: return "KA"
-    if 'KG' in name or 'KG' in code: return "KG"
-    if gubun == '반제품' or name.endswith('반'): return "반제품(기타)"
-    return "기타"
+# 표 내보내기 (export.py): 버튼을 눌렀을 때만 파일을 만들고, 받기 버튼은 세션에 둔 결과를 쓴다
+def export_buttons(df, name, key):
+    c1, c2, c3 = st.columns([1, 1, 2])
+    fmt = c1.radio("형식", ["XLSX", "CSV"], horizontal=True, key=f"{key}_fmt", label_visibility="collapsed")
+    if c2.button("📥 내보내기", key=f"{key}_make"):
+        with st.spinner("파일 만드는 중..."):
+            data = to_xlsx(df, name) if fmt == "XLSX" else to_csv(df)
+        st.session_state[key] = (f"{name}_{datetime.date.today():%Y%m%d}.{fmt.lower()}", data, XLSX_MIME if fmt == "XLSX" else CSV_MIME)
+    if key in st.session_state:
+        fname, data, mime = st.session_state[key]
+        c3.download_button(f"⬇️ {fname} ({len(data) / 2 ** 20:.1f} MB)", data, file_name=fname, mime=mime, key=f"{key}_dl")
 
 # --- 6. 로그인 ---
 if "authenticated" not in st.session_state: st.session_state["authenticated"] = False
@@ -187,58 +450,79 @@ if not st.session_state["authenticated"]:
             if st.text_input("접속 암호", type="password") == "kpr1234":
                 st.session_state["authenticated"] = True; st.rerun()
             else: st.error("암호가 틀렸습니다.")
+    telemetry.set_menu("🔒 로그인"); telemetry.end_run()
     st.stop()
 
-df_items, df_inventory, df_logs, df_bom, df_orders, df_wastewater, df_meetings, df_mapping = load_data()
 if 'cart' not in st.session_state: st.session_state['cart'] = []
 
+# 관리자 암호: secrets의 admin_password 또는 환경변수 KPR_ADMIN_PASSWORD (둘 다 없으면 관리자 메뉴는 열리지 않음)
+def admin_password():
+    try:
+        if "admin_password" in st.secrets: return str(st.secrets["admin_password"])
+    except Exception: pass
+    return os.environ.get("KPR_ADMIN_PASSWORD", "")
+
 # --- 7. 사이드바 ---
 with st.sidebar:
     if os.path.exists("logo.png"): st.image("logo.png", use_container_width=True)
     else: st.header("🏭 KPR / Chamstek")
-    if st.button("🔄 새로고침"): st.cache_data.clear(); st.rerun()
+    if st.button("🔄 새로고침"):
+        replica.invalidate_all(); get_load_marks().clear()
+        if order_book: order_book.invalidate()
+        st.cache_data.clear(); st.rerun()  # 시트 화면에서 직접 고친 내용까지 전부 다시 받기
+    if replica.last_report:
+        with st.expander("⏱️ 시트 동기화 상태"):
+            st.dataframe(pd.DataFrame(replica.last_report).T, use_container_width=True)
+    jst = write_journal.status()
+    if jst['failed']:
+        st.error(f"⚠️ 시트 저장 실패 {jst['failed']}건\n\n{jst['error']}")
+        c_j1, c_j2 = st.columns(2)
+        if c_j1.button("🔁 다시 보내기"): write_journal.retry_failed(); st.rerun()
+        if c_j2.button("🗑️ 버리기"): touch(*write_journal.drop_failed()); st.rerun()
+    if jst['pending']: st.info(f"⏳ 시트 저장 대기 {jst['pending']}건 (자동으로 보내는 중)")
+    if log_book and log_book.last_error: st.warning(f"⚠️ 삭제된 로그 정리 실패: {log_book.last_error}")
+    if inventory_index and inventory_index.last_error: st.warning(f"⚠️ Inventory 시트 재고 반영 실패: {inventory_index.last_error} (재고 현황 탭의 📤 반영으로 맞출 수 있습니다)")
     st.markdown("---")
-    menu = st.radio("메뉴", ["대시보드", "재고/생산 관리", "영업/출고 관리", "🏭 현장 작업 (LOT 입력)", "🔍 이력/LOT 검색", "🌊 환경/폐수 일지", "📋 주간 회의 & 개선사항"])
+    menu = st.radio("메뉴", [m for m in MENU_SHEETS if m != ADMIN_MENU or st.session_state.get('admin')])
+    telemetry.set_menu(menu)
     st.markdown("---")
     date = st.date_input("날짜", datetime.datetime.now())
     time_str = datetime.datetime.now().strftime("%H:%M:%S")
     factory = st.selectbox("공장", ["1공장", "2공장"])
+    with st.expander("🔐 관리자"):
+        if st.session_state.get('admin'):
+            if st.button("관리자 나가기"): st.session_state['admin'] = False; st.session_state.pop('admin_pw', None); st.rerun()
+        elif not admin_password(): st.caption("관리자 암호가 설정되지 않았습니다 (secrets의 admin_password 또는 환경변수 KPR_ADMIN_PASSWORD).")
+        else:
+            admin_pw = st.text_input("관리자 암호", type="password", key="admin_pw")
+            if admin_pw:
+                if hmac.compare_digest(admin_pw.encode(), admin_password().encode()): st.session_state['admin'] = True; st.rerun()
+                else: st.error("암호가 틀렸습니다.")
+
+# 선택한 메뉴가 쓰는 시트만 불러온다 (나머지는 빈 표)
+telemetry.mark('load')
+df_items, df_inventory, df_logs, df_bom, df_orders, df_wastewater, df_meetings, df_mapping = load_for(menu)
+df_stock = load_stock(sheet_version('Logs')) if 'Logs' in MENU_SHEETS[menu] else pd.DataFrame(columns=['공장', '코드', '현재고'])
+telemetry.mark('render')
 
 # [0] 대시보드
 if menu == "대시보드":
     st.title("📊 공장 현황 대시보드")
     if not df_logs.empty:
+        # 실적/추이/입고 차트는 rollup.py의 일별 집계에서 읽는다 (원본 로그를 화면마다 다시 훑지 않음)
+        with telemetry.section('filter'): roll = get_daily_rollup(); load_rollup(sheet_version('Logs'))
         today = datetime.date.today()
         target_date_str = (today - datetime.timedelta(days=1)).strftime("%Y-%m-%d") 
         display_label = "어제"
-
-        if '구분' in df_logs.columns and '날짜' in df_logs.columns:
-            prod_dates = df_logs[df_logs['구분'] == '생산']['날짜'].unique()
-            if len(prod_dates) > 0:
-                prod_dates = sorted(prod_dates, reverse=True)
-                for d_str in prod_dates:
-                    try:
-                        d_date = pd.to_datetime(d_str).date()
-                        if d_date < today:
-                            target_date_str = d_str
-                            if d_date == today - datetime.timedelta(days=1): display_label = "어제"
-                            else: display_label = "최근 작업일"
-                            break
-                    except: continue
-
-        df_target_day = df_logs[df_logs['날짜'] == target_date_str]
-        prod_data = df_target_day[df_target_day['구분']=='생산'].copy() if '구분' in df_target_day.columns else pd.DataFrame()
-        
-        total_prod=0; ka_prod=0; kg_prod=0; ka_ban_prod=0; cp_prod=0
-        if not prod_data.empty:
-            prod_data['Category'] = prod_data.apply(get_product_category, axis=1)
-            total_prod = prod_data['수량'].sum()
-            ka_prod = prod_data[prod_data['Category']=='KA']['수량'].sum()
-            kg_prod = prod_data[prod_data['Category']=='KG']['수량'].sum()
-            ka_ban_prod = prod_data[prod_data['Category']=='KA반제품']['수량'].sum()
-            cp_prod = prod_data[prod_data['Category']=='Compound']['수량'].sum()
-
-        out_val = df_target_day[df_target_day['구분']=='출고']['수량'].sum() if '구분' in df_target_day.columns else 0
+        last_day = roll.last_production_day(today)
+        if last_day:
+            target_date_str = last_day
+            if pd.to_datetime(last_day).date() != today - datetime.timedelta(days=1): display_label = "최근 작업일"
+
+        prod_sum = roll.day_totals(target_date_str, '생산')
+        total_prod = prod_sum.sum()
+        ka_prod = prod_sum.get('KA', 0); kg_prod = prod_sum.get('KG', 0); ka_ban_prod = prod_sum.get('KA반제품', 0); cp_prod = prod_sum.get('Compound', 0)
+        out_val = roll.day_totals(target_date_str, '출고').sum()
         pend_cnt = len(df_orders[df_orders['상태']=='준비']['주문번호'].unique()) if not df_orders.empty and '상태' in df_orders.columns else 0
         
         st.subheader(f"📅 {display_label}({target_date_str}) 실적 요약")
@@ -259,27 +543,9 @@ if menu == "대시보드":
             with c_filter2:
                 filter_opt = st.selectbox("조회 품목 필터", ["전체", "KA", "KG", "KA반제품", "Compound"])
             
-            df_prod_log = df_logs[df_logs['구분'] == '생산'].copy()
             if len(search_range) == 2:
                 s_d, e_d = search_range
-                all_dates = pd.date_range(start=s_d, end=e_d)
-                categories = ["KA", "KG", "KA반제품", "Compound", "기타"]
-                skeleton_data = []
-                for d in all_dates:
-                    d_str = d.strftime('%Y-%m-%d')
-                    for c in categories: skeleton_data.append({'날짜': d_str, 'Category': c, '수량': 0})
-                df_skeleton = pd.DataFrame(skeleton_data)
-                
-                if not df_prod_log.empty:
-                    df_prod_log['날짜'] = pd.to_datetime(df_prod_log['날짜']).dt.strftime('%Y-%m-%d')
-                    df_prod_log['Category'] = df_prod_log.apply(get_product_category, axis=1)
-                    if filter_opt != "전체": df_prod_log = df_prod_log[df_prod_log['Category'] == filter_opt]
-                    real_sum = df_prod_log.groupby(['날짜', 'Category'])['수량'].sum().reset_index()
-                else: real_sum = pd.DataFrame(columns=['날짜', 'Category', '수량'])
-                
-                if filter_opt != "전체": df_skeleton = df_skeleton[df_skeleton['Category'] == filter_opt]
-                final_df = pd.merge(df_skeleton, real_sum, on=['날짜', 'Category'], how='left', suffixes=('_base', '_real'))
-                final_df['수량'] = final_df['수량_real'].fillna(0)
+                final_df = roll.production_trend(s_d, e_d, None if filter_opt == "전체" else filter_opt)
                 final_df['날짜_dt'] = pd.to_datetime(final_df['날짜'])
                 weekday_map = {0:'(월)', 1:'(화)', 2:'(수)', 3:'(목)', 4:'(금)', 5:'(토)', 6:'(일)'}
                 final_df['요일'] = final_df['날짜_dt'].dt.dayofweek.map(weekday_map)
@@ -287,7 +553,7 @@ if menu == "대시보드":
                 
                 domain = ["KA", "KG", "KA반제품", "Compound", "기타"]
                 range_ = ["#1f77b4", "#ff7f0e", "#17becf", "#d62728", "#9467bd"] 
-                chart = alt.Chart(final_df).mark_bar().encode(
+                chart = alt.Chart(final_df[['표시날짜', 'Category', '수량']]).mark_bar().encode(
                     x=alt.X('표시날짜', title='날짜 (요일)', axis=alt.Axis(labelAngle=0)),
                     y=alt.Y('수량', title='생산량 (KG)'),
                     color=alt.Color('Category', scale=alt.Scale(domain=domain, range=range_), title='제품군'),
@@ -300,28 +566,23 @@ if menu == "대시보드":
                 st.markdown("---")
                 st.subheader("📥 최근 10일 원재료 입고 리포트")
                 
-                df_inbound_all = df_logs[df_logs['구분'] == '입고'].copy()
-                if not df_inbound_all.empty:
-                    # 1. 실제 입고가 있었던 날짜들 중 최근 10일 추출
-                    in_dates = sorted(df_inbound_all['날짜'].unique(), reverse=True)[:10]
-                    df_in_10days = df_inbound_all[df_inbound_all['날짜'].isin(in_dates)].copy()
+                # 1. 실제 입고가 있었던 날짜들 중 최근 10일 (날짜/품목별로 이미 합산된 점만 차트로 보냄)
+                df_in_sum, in_dates = roll.recent_inbound(10)
+                if not df_in_sum.empty:
+                    in_chart = alt.Chart(df_in_sum).mark_bar().encode(
+                        x=alt.X('날짜:N', title='입고일', sort=alt.SortField('날짜', order='descending')),
+                        y=alt.Y('수량:Q', title='입고량 (KG)'),
+                        color=alt.Color('품목명:N', title='품목명', scale=alt.Scale(scheme='category20')),
+                        tooltip=['날짜', '품목명', alt.Tooltip('수량:Q', format=',.0f', title='총 입고량')]
+                    ).properties(height=300)
+                    st.altair_chart(in_chart, use_container_width=True)
                     
-                    if not df_in_10days.empty:
-                        # 차트 (날짜별/품목별 합산)
-                        in_chart = alt.Chart(df_in_10days).mark_bar().encode(
-                            x=alt.X('날짜:N', title='입고일', sort=alt.SortField('날짜', order='descending')),
-                            y=alt.Y('sum(수량):Q', title='입고량 (KG)'),
-                            color=alt.Color('품목명:N', title='품목명', scale=alt.Scale(scheme='category20')),
-                            tooltip=['날짜', '품목명', alt.Tooltip('sum(수량)', format=',.0f', title='총 입고량')]
-                        ).properties(height=300)
-                        st.altair_chart(in_chart, use_container_width=True)
-                        
-                        # 상세 데이터 테이블
-                        st.markdown("##### 📋 상세 입고 내역 (최근 10일)")
-                        df_in_table = df_in_10days[['날짜', '시간', '코드', '품목명', '규격', '수량', '비고']].sort_values(['날짜', '시간'], ascending=False)
-                        st.dataframe(df_in_table, use_container_width=True, hide_index=True)
-                    else:
-                        st.info("표시할 입고 내역이 없습니다.")
+                    # 상세 데이터 테이블
+                    st.markdown("##### 📋 상세 입고 내역 (최근 10일)")
+                    df_inbound_all = df_logs[df_logs['구분'] == '입고']
+                    df_in_10days = df_inbound_all[df_inbound_all['날짜_dt'].isin(pd.to_datetime(in_dates))]
+                    df_in_table = df_in_10days[['날짜', '시간', '코드', '품목명', '규격', '수량', '비고']].sort_values(['날짜', '시간'], ascending=False)
+                    st.dataframe(df_in_table, use_container_width=True, hide_index=True)
                 else:
                     st.info("입고 데이터가 존재하지 않습니다.")
 
@@ -341,20 +602,12 @@ elif menu == "재고/생산 관리":
             if factory == "1공장": line_options = [f"압출{i}호" for i in range(1, 6)] + ["기타"]
             elif factory == "2공장": line_options = [f"압출{i}호" for i in range(1, 7)] + [f"컷팅{i}호" for i in range(1, 11)] + ["기타"]
             prod_line = st.selectbox("설비 라인", line_options)
+        # 반제품에 BOM이 있으면 그 원자재까지 차감 (끄면 BOM 시트 한 단계만)
+        bom_multi = st.checkbox("반제품 BOM까지 전개 (반제품 재고를 먼저 쓰고 부족분만 다단계 차감)", value=True) if cat == "생산" else True
         if not df_items.empty:
-            df_f = df_items.copy()
-            for c in ['규격', '타입', '색상', '품목명', '구분', 'Group']:
-                if c in df_f.columns: df_f[c] = df_f[c].astype(str).str.strip()
+            df_f = df_items
             if cat=="입고": df_f = df_f[df_f['구분']=='원자재']
             elif cat=="생산": df_f = df_f[df_f['구분'].isin(['제품', '완제품', '반제품'])]
-            def get_group(row):
-                name = str(row['품목명']).upper(); grp = str(row['구분'])
-                if grp == '반제품' or name.endswith('반'): return "반제품"
-                if "CP" in name or "COMPOUND" in name: return "COMPOUND"
-                if "KG" in name: return "KG"
-                if "KA" in name: return "KA"
-                return "기타"
-            df_f['Group'] = df_f.apply(get_group, axis=1)
             if not df_f.empty:
                 grp_list = sorted(list(set(df_f['Group'])))
                 grp = st.selectbox("1.그룹", grp_list)
@@ -387,9 +640,8 @@ elif menu == "재고/생산 관리":
                 if not final.empty:
                     item_info = final.iloc[0]; sel_code = item_info['코드']
                     st.success(f"선택: {sel_code}")
-                    if cat=="재고실사" and not df_inventory.empty:
-                        inv_rows = df_inventory[df_inventory['코드'].astype(str)==str(sel_code)]
-                        sys_q = inv_rows['현재고'].apply(safe_float).sum()
+                    if cat=="재고실사":
+                        sys_q = stock_of(df_stock, sel_code)
                         st.info(f"전산 재고(통합): {sys_q}")
                 else: item_info = None
         
@@ -404,39 +656,29 @@ elif menu == "재고/생산 관리":
             if item_info is None: st.error("🚨 품목이 선택되지 않았습니다.")
             elif sheet_logs:
                 try:
-                    sheet_logs.append_row([date.strftime('%Y-%m-%d'), time_str, factory, cat, sel_code, item_info['품목명'], item_info['규격'], item_info['타입'], item_info['색상'], qty_in, note_in, "-", prod_line])
-                    chg = qty_in if cat in ["입고","생산","재고실사"] else -qty_in
-                    update_inventory(factory, sel_code, chg, item_info['품목명'], item_info['규격'], item_info['타입'], item_info['색상'], item_info.get('단위','-'))
+                    wb = WriteBuffer()
+                    log_book.append(wb, [date.strftime('%Y-%m-%d'), time_str, factory, cat, sel_code, item_info['품목명'], item_info['규격'], item_info['타입'], item_info['색상'], qty_in, note_in, "-", prod_line])
                     if cat=="생산" and not df_bom.empty:
-                        selected_type = item_info['타입']
-                        if '타입' in df_bom.columns: bom_targets = df_bom[(df_bom['제품코드'].astype(str) == str(sel_code)) & (df_bom['타입'].astype(str) == str(selected_type))].drop_duplicates(subset=['자재코드'])
-                        else: bom_targets = df_bom[df_bom['제품코드'].astype(str) == str(sel_code)].drop_duplicates(subset=['자재코드'])
-                        for i,r in bom_targets.iterrows():
-                            req = qty_in * safe_float(r['소요량'])
-                            update_inventory(factory, r['자재코드'], -req)
-                            time.sleep(0.5) 
-                            sheet_logs.append_row([date.strftime('%Y-%m-%d'), time_str, factory, "사용(Auto)", r['자재코드'], "System", "-", "-", "-", -req, f"{sel_code} 생산", "-", prod_line])
-                    st.cache_data.clear(); st.success("완료"); st.rerun()
+                        for mat, req in production_usage(sel_code, item_info['타입'], qty_in, factory, bom_multi):
+                            log_book.append(wb, [date.strftime('%Y-%m-%d'), time_str, factory, "사용(Auto)", mat, "System", "-", "-", "-", -req, f"{sel_code} 생산", "-", prod_line])
+                    res = commit_writes(wb)
+                    if res.ok: st.success("완료"); st.rerun()
+                    else: st.error(f"오류: {res.error}")
                 except Exception as e: st.error(f"오류: {e}")
 
     st.title(f"📦 재고/생산 관리 ({factory})")
-    t1, t2, t3, t4, t5 = st.tabs(["🏭 생산 이력", "📥 원자재 입고 이력", "📦 재고 현황", "📜 전체 로그", "🔩 BOM"])
+    t1, t2, t3, t4, t5, t6 = st.tabs(["🏭 생산 이력", "📥 원자재 입고 이력", "📦 재고 현황", "📜 전체 로그", "🔩 BOM", "🧮 자재 소요(MRP)"])
     
     with t1:
         st.subheader("🔍 생산 이력 관리 (조회 및 수정/삭제)")
         if df_logs.empty: st.info("로그 데이터가 없습니다.")
         else:
             df_prod_log = df_logs[df_logs['구분'] == '생산'].copy()
-            df_prod_log['No'] = df_prod_log.index + 2 
-            if len(df_prod_log.columns) >= 13:
-                cols = list(df_prod_log.columns); cols[12] = '라인'; df_prod_log.columns = cols
-            else: df_prod_log['라인'] = "-"
-            for col in ['코드', '품목명', '라인', '타입']:
-                if col in df_prod_log.columns: df_prod_log[col] = df_prod_log[col].astype(str)
+            if '라인' not in df_prod_log.columns: df_prod_log['라인'] = "-"
 
             with st.expander("🔎 검색 필터", expanded=True):
                 c_s1, c_s2, c_s3, c_s4 = st.columns(4)
-                min_dt = pd.to_datetime(df_prod_log['날짜']).min().date() if not df_prod_log.empty else datetime.date.today()
+                min_dt = df_prod_log['날짜_dt'].min().date() if not df_prod_log.empty else datetime.date.today()
                 sch_date = c_s1.date_input("날짜 범위", [min_dt, datetime.date.today()], key="p_date")
                 all_lines = ["전체"] + sorted(df_prod_log['라인'].unique().tolist())
                 sch_line = c_s2.selectbox("라인 선택", all_lines)
@@ -446,9 +688,7 @@ elif menu == "재고/생산 관리":
             df_res = df_prod_log.copy()
             if len(sch_date) == 2:
                 s_d, e_d = sch_date
-                df_res['날짜'] = pd.to_datetime(df_res['날짜'])
-                df_res = df_res[(df_res['날짜'].dt.date >= s_d) & (df_res['날짜'].dt.date <= e_d)]
-                df_res['날짜'] = df_res['날짜'].dt.strftime('%Y-%m-%d')
+                df_res = df_res[(df_res['날짜_dt'] >= pd.Timestamp(s_d)) & (df_res['날짜_dt'] <= pd.Timestamp(e_d))]
             if sch_line != "전체": df_res = df_res[df_res['라인'] == sch_line]
             if sch_code: df_res = df_res[df_res['코드'].str.contains(sch_code, case=False) | df_res['품목명'].str.contains(sch_code, case=False)]
             if sch_fac != "전체": df_res = df_res[df_res['공장'] == sch_fac]
@@ -456,13 +696,13 @@ elif menu == "재고/생산 관리":
             st.markdown("---")
             col_del1, col_del2 = st.columns([3, 1])
             with col_del1: st.write(f"📋 검색 결과: {len(df_res)}건")
-            disp_cols = ['No', '날짜', '시간', '공장', '라인', '코드', '품목명', '타입', '수량', '비고']
+            disp_cols = ['ID', '날짜', '시간', '공장', '라인', '코드', '품목명', '타입', '수량', '비고']
             final_cols = [c for c in disp_cols if c in df_res.columns]
             st.dataframe(df_res[final_cols].sort_values(['날짜', '시간'], ascending=False), use_container_width=True, hide_index=True)
             
             st.markdown("### 🛠️ 기록 수정 및 삭제")
             df_for_select = df_res.sort_values(['날짜', '시간'], ascending=False)
-            delete_options = {row['No']: f"No.{row['No']} | {row['날짜']} {row['품목명']} ({row['수량']}kg)" for _, row in df_for_select.iterrows()}
+            delete_options = {row['ID']: f"{row['날짜']} {row['시간']} | {row['품목명']} ({row['수량']}kg) [{row['ID']}]" for _, row in df_for_select.iterrows()}
             if delete_options:
                 sel_target_id = st.selectbox("관리할 기록 선택", list(delete_options.keys()), format_func=lambda x: delete_options[x])
                 
@@ -470,23 +710,15 @@ elif menu == "재고/생산 관리":
                 
                 with col_act1:
                     if st.button("🗑️ 선택한 기록 삭제 (자동 반제품 복구)", type="primary"):
-                        target_row = df_prod_log[df_prod_log['No'] == sel_target_id].iloc[0]
-                        del_date = target_row['날짜']; del_time = target_row['시간']; del_fac = target_row['공장']; del_code = target_row['코드']; del_qty = safe_float(target_row['수량'])
-                        update_inventory(del_fac, del_code, -del_qty)
+                        target_row = df_prod_log[df_prod_log['ID'] == sel_target_id].iloc[0]
+                        del_date = target_row['날짜']; del_time = target_row['시간']; del_code = target_row['코드']
+                        wb = WriteBuffer()
                         linked_logs = df_logs[(df_logs['날짜'] == del_date) & (df_logs['시간'] == del_time) & (df_logs['구분'] == '사용(Auto)') & (df_logs['비고'].str.contains(str(del_code), na=False))]
-                        rows_to_delete = [sel_target_id]
-                        if not linked_logs.empty:
-                            for idx, row in linked_logs.iterrows():
-                                mat_qty = safe_float(row['수량'])
-                                update_inventory(del_fac, row['코드'], -mat_qty)
-                                rows_to_delete.append(idx + 2)
-                        rows_to_delete.sort(reverse=True)
-                        try:
-                            for r_idx in rows_to_delete:
-                                sheet_logs.delete_rows(int(r_idx))
-                                time.sleep(0.5)
-                            st.success("삭제 및 복구 완료!"); time.sleep(1); st.cache_data.clear(); st.rerun()
-                        except Exception as e: st.error(f"오류: {e}")
+                        if not log_book.tombstone(wb, [sel_target_id] + linked_logs['ID'].tolist()):
+                            st.error("시트에서 기록을 찾지 못했습니다. 새로고침 후 다시 시도하세요."); st.stop()
+                        res = commit_writes(wb)
+                        if res.ok: st.success("삭제 및 복구 완료!"); st.rerun()
+                        else: st.error(f"오류: {res.error}")
 
                 with col_act2:
                     if "edit_mode" not in st.session_state: st.session_state["edit_mode"] = False
@@ -495,7 +727,7 @@ elif menu == "재고/생산 관리":
                 
                 if st.session_state["edit_mode"]:
                     st.info("💡 수정하면 기존 기록은 삭제되고, 새로운 내용으로 다시 등록됩니다. (반제품 재고 자동 계산)")
-                    target_row_edit = df_prod_log[df_prod_log['No'] == sel_target_id].iloc[0]
+                    target_row_edit = df_prod_log[df_prod_log['ID'] == sel_target_id].iloc[0]
                     with st.form("edit_form"):
                         e_date = st.date_input("날짜", pd.to_datetime(target_row_edit['날짜']))
                         e_line = st.selectbox("라인", all_lines, index=all_lines.index(target_row_edit['라인']) if target_row_edit['라인'] in all_lines else 0)
@@ -503,77 +735,77 @@ elif menu == "재고/생산 관리":
                         e_note = st.text_input("비고", value=target_row_edit['비고'])
                         
                         if st.form_submit_button("✅ 수정사항 저장"):
-                            old_date = target_row_edit['날짜']; old_time = target_row_edit['시간']; old_fac = target_row_edit['공장']; old_code = target_row_edit['코드']; old_qty = safe_float(target_row_edit['수량'])
-                            update_inventory(old_fac, old_code, -old_qty)
+                            old_date = target_row_edit['날짜']; old_time = target_row_edit['시간']; old_fac = target_row_edit['공장']; old_code = target_row_edit['코드']
+                            wb = WriteBuffer()
                             
                             linked_logs_old = df_logs[(df_logs['날짜'] == old_date) & (df_logs['시간'] == old_time) & (df_logs['구분'] == '사용(Auto)') & (df_logs['비고'].str.contains(str(old_code), na=False))]
-                            rows_to_del_edit = [sel_target_id]
-                            if not linked_logs_old.empty:
-                                for idx, row in linked_logs_old.iterrows():
-                                    mat_qty = safe_float(row['수량'])
-                                    update_inventory(old_fac, row['코드'], -mat_qty)
-                                    rows_to_del_edit.append(idx + 2)
-                            rows_to_del_edit.sort(reverse=True)
-                            for r_idx in rows_to_del_edit:
-                                sheet_logs.delete_rows(int(r_idx))
-                                time.sleep(0.3)
+                            if not log_book.tombstone(wb, [sel_target_id] + linked_logs_old['ID'].tolist()):
+                                st.error("시트에서 기록을 찾지 못했습니다. 새로고침 후 다시 시도하세요."); st.stop()
                             
                             new_time_str = datetime.datetime.now().strftime("%H:%M:%S") 
-                            sheet_logs.append_row([e_date.strftime('%Y-%m-%d'), new_time_str, old_fac, "생산", old_code, target_row_edit['품목명'], target_row_edit.get('규격',''), target_row_edit['타입'], target_row_edit.get('색상',''), e_qty, e_note, "-", e_line])
-                            update_inventory(old_fac, old_code, e_qty)
+                            log_book.append(wb, [e_date.strftime('%Y-%m-%d'), new_time_str, old_fac, "생산", old_code, target_row_edit['품목명'], target_row_edit.get('규격',''), target_row_edit['타입'], target_row_edit.get('색상',''), e_qty, e_note, "-", e_line])
                             
                             if not df_bom.empty:
-                                sel_type = target_row_edit['타입']
-                                if '타입' in df_bom.columns: bom_targets = df_bom[(df_bom['제품코드'].astype(str) == str(old_code)) & (df_bom['타입'].astype(str) == str(sel_type))].drop_duplicates(subset=['자재코드'])
-                                else: bom_targets = df_bom[df_bom['제품코드'].astype(str) == str(old_code)].drop_duplicates(subset=['자재코드'])
-                                for i,r in bom_targets.iterrows():
-                                    req = e_qty * safe_float(r['소요량'])
-                                    update_inventory(old_fac, r['자재코드'], -req)
-                                    time.sleep(0.3)
-                                    sheet_logs.append_row([e_date.strftime('%Y-%m-%d'), new_time_str, old_fac, "사용(Auto)", r['자재코드'], "System", "-", "-", "-", -req, f"{old_code} 생산", "-", e_line])
+                                for mat, req in production_usage(old_code, target_row_edit['타입'], e_qty, old_fac, bom_multi, linked_logs_old):
+                                    log_book.append(wb, [e_date.strftime('%Y-%m-%d'), new_time_str, old_fac, "사용(Auto)", mat, "System", "-", "-", "-", -req, f"{old_code} 생산", "-", e_line])
                             
-                            st.session_state["edit_mode"] = False
-                            st.success("수정 완료!"); time.sleep(1); st.cache_data.clear(); st.rerun()
+                            res = commit_writes(wb)
+                            if res.ok:
+                                st.session_state["edit_mode"] = False
+                                st.success("수정 완료!"); st.rerun()
+                            else: st.error(f"오류: {res.error}")
 
     with t2:
         st.subheader("📥 원자재 입고 이력 조회 및 취소")
         if df_logs.empty: st.info("데이터가 없습니다.")
         else:
             df_receipt_log = df_logs[df_logs['구분'] == '입고'].copy()
-            df_receipt_log['No'] = df_receipt_log.index + 2
             
             with st.expander("🔎 입고 내역 검색", expanded=True):
                 c_r1, c_r2 = st.columns(2)
-                min_dt_r = pd.to_datetime(df_receipt_log['날짜']).min().date() if not df_receipt_log.empty else datetime.date.today()
+                min_dt_r = df_receipt_log['날짜_dt'].min().date() if not df_receipt_log.empty else datetime.date.today()
                 sch_date_r = c_r1.date_input("날짜 범위", [min_dt_r, datetime.date.today()], key="r_date")
                 sch_txt_r = c_r2.text_input("품목 검색", key="r_txt")
                 
             df_res_r = df_receipt_log.copy()
             if len(sch_date_r) == 2:
                 s_d, e_d = sch_date_r
-                df_res_r['날짜'] = pd.to_datetime(df_res_r['날짜'])
-                df_res_r = df_res_r[(df_res_r['날짜'].dt.date >= s_d) & (df_res_r['날짜'].dt.date <= e_d)]
-                df_res_r['날짜'] = df_res_r['날짜'].dt.strftime('%Y-%m-%d')
+                df_res_r = df_res_r[(df_res_r['날짜_dt'] >= pd.Timestamp(s_d)) & (df_res_r['날짜_dt'] <= pd.Timestamp(e_d))]
             if sch_txt_r:
                 df_res_r = df_res_r[df_res_r['코드'].str.contains(sch_txt_r, case=False) | df_res_r['품목명'].str.contains(sch_txt_r, case=False)]
             
-            disp_cols_r = ['No', '날짜', '시간', '공장', '코드', '품목명', '규격', '수량', '비고']
+            disp_cols_r = ['ID', '날짜', '시간', '공장', '코드', '품목명', '규격', '수량', '비고']
             st.dataframe(df_res_r[disp_cols_r].sort_values(['날짜', '시간'], ascending=False), use_container_width=True, hide_index=True)
             
             st.markdown("### 🗑️ 잘못된 입고 기록 삭제")
-            del_opts_r = {row['No']: f"No.{row['No']} | {row['날짜']} {row['품목명']} ({row['수량']}kg)" for _, row in df_res_r.iterrows()}
+            del_opts_r = {row['ID']: f"{row['날짜']} {row['시간']} | {row['품목명']} ({row['수량']}kg) [{row['ID']}]" for _, row in df_res_r.iterrows()}
             if del_opts_r:
                 sel_del_id_r = st.selectbox("삭제할 기록 선택", list(del_opts_r.keys()), format_func=lambda x: del_opts_r[x], key="sel_del_r")
                 if st.button("❌ 입고 기록 삭제 (재고 차감)", type="primary"):
-                    target_row_r = df_receipt_log[df_receipt_log['No'] == sel_del_id_r].iloc[0]
-                    update_inventory(target_row_r['공장'], target_row_r['코드'], -safe_float(target_row_r['수량']))
-                    sheet_logs.delete_rows(int(sel_del_id_r))
-                    st.success("삭제 완료!"); time.sleep(1); st.cache_data.clear(); st.rerun()
+                    wb = WriteBuffer()
+                    if not log_book.tombstone(wb, [sel_del_id_r]):
+                        st.error("시트에서 기록을 찾지 못했습니다. 새로고침 후 다시 시도하세요."); st.stop()
+                    res = commit_writes(wb)
+                    if res.ok: st.success("삭제 완료!"); st.rerun()
+                    else: st.error(f"오류: {res.error}")
 
     with t3:
-        if not df_inventory.empty:
-            df_v = df_inventory.copy()
-            if not df_items.empty: cmap = df_items.drop_duplicates('코드').set_index('코드')['구분'].to_dict(); df_v['구분'] = df_v['코드'].map(cmap).fillna('-')
+        if not df_stock.empty:
+            st.caption("현재고는 로그(입고/생산/사용/출고/재고실사) 합계입니다. 시트재고는 Inventory 시트 값입니다.")
+            df_v = df_stock.copy()
+            if not df_inventory.empty and {'공장', '코드', '현재고'} <= set(df_inventory.columns):
+                inv = df_inventory.assign(공장=df_inventory['공장'].astype(str), 시트재고=df_inventory['현재고'])
+                df_v = df_v.merge(inv.groupby(['공장', '코드'])['시트재고'].sum().reset_index(), on=['공장', '코드'], how='outer')
+                df_v['현재고'] = df_v['현재고'].fillna(0.0); df_v['시트재고'] = df_v['시트재고'].fillna(0.0)
+                df_v['차이'] = df_v['현재고'] - df_v['시트재고']
+            info_cols = ['품목명', '규격', '타입', '색상', '구분']
+            if not df_items.empty:
+                info = df_items.drop_duplicates('코드').set_index('코드')
+                for c in info_cols: df_v[c] = df_v['코드'].map(info[c]).fillna('-') if c in info.columns else '-'
+            else:
+                for c in info_cols: df_v[c] = '-'
+            df_v = df_v[[c for c in ['공장', '코드'] + info_cols + ['현재고', '시트재고', '차이'] if c in df_v.columns]]
+            df_all_stock = df_v
             c1, c2 = st.columns(2)
             fac_f = c1.radio("공장 (위치 확인용)", ["전체", "1공장", "2공장"], horizontal=True)
             cat_f = c2.radio("품목", ["전체", "제품", "반제품", "원자재"], horizontal=True)
@@ -582,13 +814,45 @@ elif menu == "재고/생산 관리":
                 if cat_f=="제품": df_v = df_v[df_v['구분'].isin(['제품','완제품'])]
                 else: df_v = df_v[df_v['구분']==cat_f]
             st.dataframe(df_v, use_container_width=True)
-    with t4: st.dataframe(df_logs, use_container_width=True)
-    with t5: st.dataframe(df_bom, use_container_width=True)
+            if inventory_index and st.button("📤 계산 재고를 Inventory 시트에 반영"):
+                # (공장, 코드)별 잠금 + Ver 열 compare-and-swap으로 쓴다 (다른 태블릿/서버와 겹쳐도 덮어쓰지 않음)
+                try:
+                    n_chg = inventory_index.sync({(r['공장'], r['코드']): (r['현재고'], (r['품목명'], r['규격'], r['타입'], r['색상'])) for r in df_all_stock.to_dict('records')})
+                    touch_edited('Inventory')
+                    st.success(f"Inventory 시트 반영 완료 ({n_chg}건 변경)"); st.rerun()
+                except Exception as e: st.error(f"오류: {e}")
+    with t4:
+        export_buttons(df_logs, "Logs", "exp_logs")
+        st.dataframe(df_logs.drop(columns=['날짜_dt'], errors='ignore'), use_container_width=True)
+    with t5:
+        eng = bom_engine()
+        if eng.cycles: st.warning("⚠️ BOM 순환: " + " / ".join(" → ".join(c) for c in eng.cycles) + " (순환 연결은 끊고 전개합니다)")
+        bom_view = st.radio("보기", ["BOM 시트", "다단계 전개 (원자재 기준)"], horizontal=True, label_visibility="collapsed")
+        st.dataframe(df_bom if bom_view == "BOM 시트" else eng.flat_table(), use_container_width=True)
+    with t6:
+        # 준비 중인 주문 전체 → 제품 재고 상쇄 → 부족분을 BOM으로 전개 → 원자재 재고/입고 주기와 비교 (mrp.py)
+        mrp_fac = st.radio("재고 기준", ["전체", "1공장", "2공장"], horizontal=True, key="mrp_fac")
+        with telemetry.section('filter'): fg_need, mat_need = mrp(df_orders, df_stock, bom_engine(), df_logs, None if mrp_fac == "전체" else mrp_fac)
+        if fg_need.empty: st.info("준비 상태 주문이 없습니다.")
+        else:
+            c_m1, c_m2, c_m3 = st.columns(3)
+            c_m1.metric("준비 주문 제품 수요", f"{fg_need['주문수량'].sum():,.0f} kg")
+            c_m2.metric("제품 부족", f"{fg_need['부족수량'].sum():,.0f} kg")
+            c_m3.metric("부족 원자재", f"{int(((mat_need['구분'] == '원자재') & (mat_need['부족량'] > 0)).sum())}종")
+            if not fg_need['BOM'].all(): st.warning("BOM이 없는 제품: " + ", ".join(fg_need.loc[~fg_need['BOM'], '코드'].unique()))
+            st.markdown("##### 📦 제품 (주문 vs 재고)")
+            st.dataframe(fg_need.drop(columns=['BOM']), use_container_width=True, hide_index=True)
+            st.markdown("##### 🧱 자재 소요 (부족량 순)")
+            st.dataframe(mat_need, use_container_width=True, hide_index=True,
+                         column_config={"최근입고일": st.column_config.DateColumn(format="YYYY-MM-DD"), "다음입고예상": st.column_config.DateColumn(format="YYYY-MM-DD")})
 
 # [2] 영업/출고 관리
 elif menu == "영업/출고 관리":
     st.title("📑 영업 주문 및 출고 관리")
     if sheet_orders is None: st.error("'Orders' 시트가 없습니다."); st.stop()
+    # 준비 주문끼리 같은 재고를 두 번 세지 않도록 배정 순서대로 재고를 나눠 준 납기 가능 수량(ATP)을 보여 준다
+    atp_rule = st.radio("재고 배정 순서", list(POLICIES), horizontal=True, key="atp_policy", help="우선순위: Orders 시트에 '우선순위' 열이 있으면 작은 값부터, 같으면 날짜순")
+    atp = atp_book(df_orders, df_stock, atp_rule)
     
     tab_o, tab_p, tab_prt, tab_out, tab_cancel = st.tabs(["📝 1. 주문 등록", "✏️ 2. 팔레트 수정/삭제/재구성", "🖨️ 3. 명세서/라벨 인쇄", "🚚 4. 출고 확정", "↩️ 5. 출고 취소(복구)"])
     
@@ -603,6 +867,9 @@ elif menu == "영업/출고 관리":
                 df_sale['Disp'] = df_sale['코드'].astype(str) + " (" + df_sale['규격'].astype(str) + "/" + df_sale['색상'].astype(str) + "/" + df_sale['타입'].astype(str) + ")"
                 sel_it = st.selectbox("품목 선택", df_sale['Disp'].unique())
                 row_it = df_sale[df_sale['Disp']==sel_it].iloc[0]
+                a_c1, a_c2 = st.columns(2)
+                a_c1.metric("미배정 재고 (전체)", f"{atp.free(row_it['코드']):,.0f} kg")
+                a_c2.metric(f"미배정 재고 ({factory})", f"{atp.free(row_it['코드'], factory):,.0f} kg")
                 ord_q = st.number_input("주문량(kg)", step=100.0)
                 ord_rem = st.text_input("📦 포장 단위 (REMARK)", value="BOX")
                 if st.button("🛒 장바구니 담기"):
@@ -613,33 +880,40 @@ elif menu == "영업/출고 관리":
         with c2:
             st.subheader("🛒 장바구니 목록")
             if st.session_state['cart']:
+                st.caption(f"ATP: {factory} 재고에서 앞선 준비 주문 배정분을 빼고 이 주문이 받을 수 있는 양")
+                od_key = od_dt.strftime('%Y-%m-%d'); cart_used = {}
                 for i, it in enumerate(st.session_state['cart']):
-                    ci1, ci2, ci3 = st.columns([4, 2, 1])
+                    ci1, ci2, ci_a, ci3 = st.columns([4, 2, 2, 1])
                     ci1.write(f"**{it['코드']}** ({it['품목명']})")
                     ci2.write(f"{it['수량']:,}kg / {it['비고']}")
+                    prev = cart_used.get(it['코드'], 0.0); cart_used[it['코드']] = prev + it['수량']
+                    got = atp.promise(it['코드'], prev + it['수량'], od_key, pool=factory)[0] - atp.promise(it['코드'], prev, od_key, pool=factory)[0]
+                    if got >= it['수량'] - 1e-9: ci_a.success(f"ATP {got:,.0f}")
+                    else: ci_a.warning(f"ATP {got:,.0f} / 부족 {it['수량'] - got:,.0f}")
                     if ci3.button("❌", key=f"cart_del_{i}"):
                         st.session_state['cart'].pop(i); st.rerun()
                 
                 st.markdown("---")
                 max_pallet_kg = st.number_input("📦 팔레트당 최대 적재량 설정 (kg)", min_value=100.0, value=1000.0, step=100.0)
+                plt_mode = st.radio("팔레트 배치 방식", list(PALLET_MODES), horizontal=True, key="plt_mode")
                 
                 col_btn1, col_btn2 = st.columns(2)
                 if col_btn1.button("🗑️ 장바구니 전체 비우기"):
                     st.session_state['cart'] = []; st.rerun()
                 if col_btn2.button("✅ 최종 주문 확정", type="primary"):
                     oid = "ORD-" + datetime.datetime.now().strftime("%y%m%d%H%M")
+                    cart = st.session_state['cart']
                     rows = []
-                    plt = 1; cw = 0
-                    for it in st.session_state['cart']:
-                        rem = it['수량']
-                        while rem > 0:
-                            sp = max_pallet_kg - cw
-                            if sp <= 0: plt += 1; cw = 0; sp = max_pallet_kg
-                            load = min(rem, sp)
-                            rows.append([oid, od_dt.strftime('%Y-%m-%d'), cl_nm, it['코드'], it['품목명'], load, plt, "준비", it['비고'], "", it['타입']])
-                            cw += load; rem -= load
-                    for r in rows: sheet_orders.append_row(r)
-                    st.session_state['cart'] = []; st.cache_data.clear(); st.success("주문 저장 완료!"); st.rerun()
+                    for i, plt, load in split_pallets([it['수량'] for it in cart], max_pallet_kg, PALLET_MODES[plt_mode]):
+                        it = cart[i]
+                        rows.append([oid, od_dt.strftime('%Y-%m-%d'), cl_nm, it['코드'], it['품목명'], load, plt, "준비", it['비고'], "", it['타입']])
+                    wb = WriteBuffer()
+                    for r in rows: order_book.append(wb, r)
+                    res = commit_writes(wb)
+                    if res.ok: st.session_state['cart'] = []; st.success("주문 저장 완료!"); st.rerun()
+                    else: st.error(f"오류: {res.error}")
+        with st.expander("📊 준비 주문 재고 배정 현황 (ATP)", expanded=False):
+            show_atp_orders(atp, "atp_pool_o")
 
     with tab_p:
         st.subheader("✏️ 팔레트 수정 및 일괄 재구성")
@@ -662,25 +936,20 @@ elif menu == "영업/출고 관리":
                 with st.expander("📦 팔레트 적재량 기준으로 일괄 재구성 (Re-Split)", expanded=False):
                     st.warning("⚠️ 실행 시 기존의 팔레트 번호와 수량이 입력하신 기준에 맞춰 자동으로 다시 계산됩니다.")
                     new_max_kg = st.number_input("새로운 팔레트당 적재량 (kg)", min_value=100.0, value=1200.0, step=100.0, key="resplit_kg")
+                    resplit_mode = st.radio("팔레트 배치 방식", list(PALLET_MODES), horizontal=True, key="resplit_mode")
                     if st.button("🚀 재구성 실행"):
                         with st.spinner("팔레트 재계산 중..."):
-                            combined = original_df.groupby(['코드', '품목명', '비고', '타입'])['수량'].sum().reset_index()
+                            combined = original_df.groupby(['코드', '품목명', '비고', '타입'], observed=True)['수량'].sum().reset_index()
                             new_rows_data = []
-                            plt_cnt = 1; current_w = 0
-                            for _, r in combined.iterrows():
-                                rem = r['수량']
-                                while rem > 0:
-                                    space = new_max_kg - current_w
-                                    if space <= 0: plt_cnt += 1; current_w = 0; space = new_max_kg
-                                    load = min(rem, space)
-                                    new_rows_data.append([tgt, original_df.iloc[0]['날짜'], original_df.iloc[0]['거래처'], r['코드'], r['품목명'], load, plt_cnt, "준비", r['비고'], "", r['타입']])
-                                    current_w += load; rem -= load
-                            all_records = sheet_orders.get_all_records()
-                            headers = sheet_orders.row_values(1)
-                            filtered_records = [r for r in all_records if str(r['주문번호']) != str(tgt)]
-                            new_final_values = [headers] + [[r.get(h, "") for h in headers] for r in filtered_records] + new_rows_data
-                            sheet_orders.clear(); sheet_orders.update(new_final_values)
-                            st.success("팔레트 재구성이 완료되었습니다!"); st.cache_data.clear(); time.sleep(1); st.rerun()
+                            lines = combined.to_dict('records')
+                            for i, plt_cnt, load in split_pallets([l['수량'] for l in lines], new_max_kg, PALLET_MODES[resplit_mode]):
+                                r = lines[i]
+                                new_rows_data.append([tgt, original_df.iloc[0]['날짜'], original_df.iloc[0]['거래처'], r['코드'], r['품목명'], load, plt_cnt, "준비", r['비고'], "", r['타입']])
+                            wb = WriteBuffer()
+                            order_book.replace(wb, tgt, new_rows_data)
+                            res = commit_writes(wb)
+                            if res.ok: st.success("팔레트 재구성이 완료되었습니다!"); st.rerun()
+                            else: st.error(f"오류: {res.error}")
 
                 st.markdown("---")
                 c_mod1, c_mod2 = st.columns(2)
@@ -692,7 +961,10 @@ elif menu == "영업/출고 관리":
                         new_plt = st.number_input("팔레트 번호", value=int(display_df['팔레트번호'].max()))
                         if st.form_submit_button("추가"):
                             row = [tgt, original_df.iloc[0]['날짜'], original_df.iloc[0]['거래처'], new_code, "", new_qty, new_plt, "준비", "BOX", "", ""]
-                            sheet_orders.append_row(row); st.success("추가됨"); st.cache_data.clear(); st.rerun()
+                            wb = WriteBuffer(); order_book.append(wb, row)
+                            res = commit_writes(wb)
+                            if res.ok: st.success("추가됨"); st.rerun()
+                            else: st.error(f"오류: {res.error}")
 
                 with c_mod2:
                     st.markdown("#### 🛠️ 개별 수정/삭제")
@@ -703,17 +975,11 @@ elif menu == "영업/출고 관리":
                         ed_qty = st.number_input("수량", value=float(target['수량']))
                         ed_plt = st.number_input("팔레트", value=int(target['팔레트번호']))
                         if st.form_submit_button("💾 저장"):
-                            all_vals = sheet_orders.get_all_records()
-                            headers = sheet_orders.row_values(1)
-                            updated = []
-                            row_count = 0
-                            for r in all_vals:
-                                if str(r['주문번호']) == str(tgt):
-                                    if row_count == sel_idx: r['수량'] = ed_qty; r['팔레트번호'] = ed_plt
-                                    row_count += 1
-                                updated.append([r.get(h, "") for h in headers])
-                            sheet_orders.clear(); sheet_orders.update([headers] + updated)
-                            st.success("수정됨"); st.cache_data.clear(); st.rerun()
+                            wb = WriteBuffer()
+                            order_book.update_line(wb, tgt, sel_idx, {'수량': ed_qty, '팔레트번호': ed_plt})
+                            res = commit_writes(wb)
+                            if res.ok: st.success("수정됨"); st.rerun()
+                            else: st.error(f"오류: {res.error}")
 
     with tab_prt:
         st.subheader("🖨️ Packing List & Labels")
@@ -743,27 +1009,41 @@ elif menu == "영업/출고 관리":
                     code_map = dict(zip(edited_map['Internal'], edited_map['Customer_Print_Name']))
 
                     if st.button("💾 이름 영구 저장"):
-                        ws_map = get_sheet(doc, "Print_Mapping", ["Code", "Print_Name"])
-                        db_map = {str(r['Code']): str(r['Print_Name']) for r in df_mapping.to_dict('records')}
-                        db_map.update(code_map)
-                        rows = [["Code", "Print_Name"]] + [[k, v] for k, v in db_map.items()]
-                        ws_map.clear(); ws_map.update(rows); st.success("저장됨"); st.cache_data.clear(); st.rerun()
+                        get_sheet(doc, "Print_Mapping", ["Code", "Print_Name"])
+                        edited_rows = pd.DataFrame({'Code': list(code_map.keys()), 'Print_Name': list(code_map.values())})
+                        res, _ = save_grid('Print_Mapping', 'Code', df_mapping, edited_rows, delete_missing=False)
+                        if res.ok: st.success("저장됨"); st.rerun()
+                        else: st.error(f"오류: {res.error}")
 
+                    # 명세서/라벨 HTML은 printing.py 템플릿으로 만들고 (주문 행 + 출력용 이름) 해시로 캐시
                     sub_t1, sub_t2, sub_t3 = st.tabs(["📄 명세서", "🔷 다이아몬드 라벨", "📑 표준 라벨"])
                     with sub_t1:
-                        pl_rows = ""; tot_q = 0; tot_plt = dp['팔레트번호'].nunique()
-                        for plt_num, group in dp.groupby('팔레트번호'):
-                            g_len = len(group); is_first = True
-                            for _, r in group.iterrows():
-                                shp = get_shape(r['코드'], df_items)
-                                display_name = code_map.get(str(r['코드']), str(r['코드']))
-                                pl_rows += f"<tr>"
-                                if is_first: pl_rows += f"<td rowspan='{g_len}'>{plt_num}</td>"
-                                pl_rows += f"<td>{display_name}</td><td align='right'>{r['수량']:,.0f}</td><td align='center'>-</td><td align='center'>{shp}</td><td align='center'>-</td><td align='center'>{r['비고']}</td></tr>"
-                                is_first = False; tot_q += r['수량']
-                        html_pl = f"<h2>PACKING LIST</h2><table border='1' style='width:100%; border-collapse:collapse;'><thead><tr style='background:#eee;'><th>PLT</th><th>ITEM</th><th>QTY</th><th>COLOR</th><th>SHAPE</th><th>LOT#</th><th>REMARK</th></tr></thead><tbody>{pl_rows}</tbody></table>"
+                        html_pl = render_order("packing", dp, code_map, ship_date)
                         st.components.v1.html(html_pl, height=400, scrolling=True)
                         st.components.v1.html(create_print_button(html_pl, "PackingList", "landscape"), height=50)
+                    with sub_t2:
+                        html_dl = render_order("diamond", dp, code_map, ship_date)
+                        st.components.v1.html(html_dl, height=500, scrolling=True)
+                        st.components.v1.html(create_print_button(html_dl, "DiamondLabel"), height=50)
+                    with sub_t3:
+                        html_sl = render_order("standard", dp, code_map, ship_date)
+                        st.components.v1.html(html_sl, height=500, scrolling=True)
+                        st.components.v1.html(create_print_button(html_sl, "StandardLabel"), height=50)
+
+                # 교대 끝에 여러 주문의 팔레트 라벨/명세서를 한 문서로 한 번에 인쇄
+                with st.expander("🖨️ 여러 주문 일괄 인쇄", expanded=False):
+                    batch_ids = st.multiselect("인쇄할 주문", pend['주문번호'].unique().tolist(), default=pend['주문번호'].unique().tolist(), format_func=format_ord_prt, key="batch_prt")
+                    batch_kinds = {"🔷 다이아몬드 라벨": "diamond", "📑 표준 라벨": "standard", "📄 명세서": "packing"}
+                    batch_kind = st.radio("출력물", list(batch_kinds), horizontal=True, key="batch_kind")
+                    if batch_ids:
+                        batch_map = {**saved_map, **code_map} if not dp.empty else {}
+                        kind = batch_kinds[batch_kind]
+                        orient = "landscape" if kind == "packing" else "portrait"
+                        body = render_batch(kind, pend, batch_ids, batch_map, datetime.datetime.now().strftime("%Y-%m-%d"))
+                        st.caption(f"{len(batch_ids)}개 주문 / 팔레트 {pend[pend['주문번호'].isin(batch_ids)].groupby('주문번호')['팔레트번호'].nunique().sum()}개")
+                        b1, b2 = st.columns(2)
+                        with b1: st.components.v1.html(create_print_button(body, f"Batch_{kind}", orient), height=50)
+                        with b2: st.download_button("⬇️ 인쇄용 문서(HTML) 받기", print_document(body, f"KPR {batch_kind}", orient), file_name=f"print_{kind}_{datetime.date.today():%Y%m%d}.html", mime="text/html")
 
     with tab_out:
         st.subheader("🚚 출고 확정 및 재고 차감")
@@ -774,46 +1054,64 @@ elif menu == "영업/출고 관리":
                 tgt_out = st.selectbox("출고할 주문 선택", pend['주문번호'].unique(), format_func=lambda x: f"{unique_ords_out.loc[x]['날짜']} | {unique_ords_out.loc[x]['거래처']} ({x})")
                 d_out = pend[pend['주문번호']==tgt_out]
                 st.dataframe(d_out[['코드','품목명','수량','팔레트번호']], use_container_width=True)
+                atp_out = atp.order_lines(tgt_out, factory)
+                st.markdown(f"##### 📦 납기 가능 수량 ({factory} 재고, {atp_rule} 배정)")
+                st.dataframe(atp_out, use_container_width=True, hide_index=True)
+                if atp_out['부족'].sum() > 1e-9: st.warning(f"⚠️ 앞선 준비 주문에 배정된 재고를 빼면 {atp_out['부족'].sum():,.0f} kg 부족합니다.")
+                with st.expander("📊 준비 주문 재고 배정 현황 (ATP)", expanded=False):
+                    show_atp_orders(atp, "atp_pool_out")
                 if st.button("🚀 출고 확정", type="primary"):
+                    wb = WriteBuffer()
                     for _, row in d_out.iterrows():
-                        update_inventory(factory, row['코드'], -safe_float(row['수량']))
-                        sheet_logs.append_row([datetime.date.today().strftime('%Y-%m-%d'), time_str, factory, "출고", row['코드'], row['품목명'], "-", "-", "-", -safe_float(row['수량']), f"주문출고({tgt_out})", row['거래처'], "-"])
-                    all_rec = sheet_orders.get_all_records(); hd = sheet_orders.row_values(1)
-                    upd = [hd] + [[r.get(h, "") if r['주문번호']!=tgt_out else (r['상태'] if h!='상태' else '완료') for h in hd] for r in all_rec]
-                    sheet_orders.clear(); sheet_orders.update(upd); st.success("출고 완료"); st.cache_data.clear(); st.rerun()
+                        log_book.append(wb, [datetime.date.today().strftime('%Y-%m-%d'), time_str, factory, "출고", row['코드'], row['품목명'], "-", "-", "-", -safe_float(row['수량']), f"주문출고({tgt_out})", row['거래처'], "-"])
+                    mark_order_done(wb, tgt_out)
+                    res = commit_writes(wb, journal=False)  # 출고 Logs가 들어간 뒤에만 주문 완료
+                    if res.ok: st.success("출고 완료"); st.rerun()
+                    else: st.error(f"오류: {res.error}")
 
 elif menu == "🌊 환경/폐수 일지":
     st.title("🌊 폐수배출시설 운영일지")
-    tab_w1, tab_w2 = st.tabs(["📅 운영일지 작성", "📋 이력 조회"])
+    tab_w1, tab_w2, tab_w3 = st.tabs(["📅 운영일지 작성", "📋 이력 조회", "📑 연간 보고서"])
     with tab_w1:
-        st.markdown("### 📅 월간 운영일지 작성")
+        st.markdown("### 📅 운영일지 작성")
+        # 기간 전체를 Logs 한 번 집계(wastewater.py)로 만들고, 시트에 이미 있는 날짜는 빼고 보여준다
+        ww_kind = st.radio("기간", ["월간", "분기", "연간", "직접 지정"], horizontal=True)
         c_gen1, c_gen2, c_gen3 = st.columns(3)
-        sel_year = c_gen1.number_input("연도", 2024, 2030, datetime.date.today().year)
-        sel_month = c_gen2.number_input("월", 1, 12, datetime.date.today().month)
+        today = datetime.date.today()
+        if ww_kind == "직접 지정":
+            ww_range = c_gen1.date_input("기간 선택", [today.replace(day=1), today])
+            start_date, end_date = (ww_range[0], ww_range[-1]) if ww_range else (today, today)
+        else:
+            sel_year = c_gen1.number_input("연도", 2024, 2030, today.year)
+            if ww_kind == "월간": sel_n = c_gen2.number_input("월", 1, 12, today.month)
+            elif ww_kind == "분기": sel_n = c_gen2.selectbox("분기", [1, 2, 3, 4], index=(today.month - 1) // 3)
+            else: sel_n = 1
+            start_date, end_date = period_range(ww_kind, int(sel_year), int(sel_n))
         use_random = c_gen3.checkbox("랜덤 변주 적용 (±1%)", value=False)
+        skip_saved = c_gen3.checkbox("이미 저장된 날짜 제외", value=True)
+        st.caption(f"{start_date} ~ {end_date}")
         if st.button("📝 일지 내역 작성"):
-            start_date = datetime.date(sel_year, sel_month, 1)
-            if sel_month == 12: end_date = datetime.date(sel_year + 1, 1, 1) - datetime.timedelta(days=1)
-            else: end_date = datetime.date(sel_year, sel_month + 1, 1) - datetime.timedelta(days=1)
-            date_list = pd.date_range(start=start_date, end=end_date)
-            generated_rows = []
-            for d in date_list:
-                d_date = d.date(); d_str = d.strftime('%Y-%m-%d'); wk = ["월","화","수","목","금","토","일"][d_date.weekday()]
-                full_d = f"{d.strftime('%Y년 %m월 %d일')} {wk}요일"
-                daily_prod = df_logs[(df_logs['날짜'] == d_str) & (df_logs['공장'] == '1공장') & (df_logs['구분'] == '생산')]
-                if not daily_prod.empty:
-                    t_qty = daily_prod['수량'].sum(); res = round(t_qty * 0.8)
-                    tm = "08:00~15:00" if d_date.weekday()==5 else "08:00~08:00"
-                    if use_random: res = round(res * random.uniform(0.99, 1.01))
-                    generated_rows.append({"날짜": full_d, "대표자": "문성인", "환경기술인": "문주혁", "가동시간": tm, "플라스틱재생칩": 0, "합성수지": res, "안료": 0.2, "용수사용량": 2.16, "폐수발생량": 0, "위탁량": "", "기타": "전량 재이용"})
-                else:
-                    generated_rows.append({"날짜": full_d, "대표자": "", "환경기술인": "", "가동시간": "", "플라스틱재생칩": "", "합성수지": "", "안료": "", "용수사용량": "", "폐수발생량": "", "위탁량": "", "기타": ""})
-            st.session_state['wastewater_preview'] = pd.DataFrame(generated_rows); st.rerun()
+            rows = journal_rows(daily_production(df_logs, start_date, end_date), use_random)
+            if skip_saved:
+                n_all = len(rows); rows = skip_existing(rows, df_wastewater)
+                if n_all > len(rows): st.toast(f"이미 저장된 {n_all - len(rows)}일은 제외했습니다.")
+            st.session_state['wastewater_preview'] = rows; st.rerun()
         if 'wastewater_preview' in st.session_state:
             edited = st.data_editor(st.session_state['wastewater_preview'], num_rows="dynamic", use_container_width=True)
             if st.button("💾 일지 저장"):
-                for _, r in edited.iterrows(): sheet_wastewater.append_row(list(r.values))
-                st.success("저장됨"); st.cache_data.clear(); st.rerun()
+                # 같은 날짜가 이미 시트에 있으면 바뀐 칸만 고치고, 없는 날짜만 추가
+                existing = df_wastewater[df_wastewater['날짜'].isin(edited['날짜'])] if not df_wastewater.empty else pd.DataFrame(columns=ww_headers)
+                res, (n_ins, n_chg, _) = save_grid('Wastewater', '날짜', existing, edited, delete_missing=False)
+                if res.ok: st.success(f"저장됨 (추가 {n_ins}건, 수정 {n_chg}건)"); del st.session_state['wastewater_preview']; st.rerun()
+                else: st.error(f"오류: {res.error}")
+    with tab_w2:
+        if df_wastewater.empty: st.info("저장된 일지가 없습니다.")
+        else: st.dataframe(df_wastewater, use_container_width=True, hide_index=True)
+    with tab_w3:
+        rep_year = st.number_input("보고 연도", 2024, 2030, datetime.date.today().year, key="ww_rep_year")
+        rep = annual_report(daily_production(df_logs, *period_range("연간", int(rep_year))))
+        st.dataframe(rep, use_container_width=True, hide_index=True)
+        st.components.v1.html(create_print_button(report_html(rep, int(rep_year)), "AnnualReport"), height=50)
 
 elif menu == "📋 주간 회의 & 개선사항":
     st.title("📋 현장 주간 회의 및 개선사항 관리")
@@ -824,16 +1122,19 @@ elif menu == "📋 주간 회의 & 개선사항":
         if mtg_fac_filter != "전체": df_open = df_open[df_open['공장'] == mtg_fac_filter]
         if not df_open.empty:
             df_open['Real_Index'] = range(len(df_open))
-            edited = st.data_editor(df_open, use_container_width=True, hide_index=True)
+            edited = st.data_editor(df_open, use_container_width=True, hide_index=True, disabled=['ID', 'Real_Index'])
             if st.button("💾 변경사항 저장"):
-                all_rec = sheet_meetings.get_all_records(); hd = sheet_meetings.row_values(1)
-                new_all = [hd] + [[r.get(h, "") for h in hd] for r in all_rec]
-                sheet_meetings.clear(); sheet_meetings.update(new_all); st.success("저장됨"); st.cache_data.clear(); st.rerun()
+                res, (_, n_chg, _) = save_grid('Meetings', 'ID', df_open, edited)
+                if res.ok: st.success(f"저장됨 ({n_chg}건 수정)"); st.rerun()
+                else: st.error(f"오류: {res.error}")
     with tab_m2:
         with st.form("new_mtg"):
             n_date = st.date_input("날짜"); n_fac = st.selectbox("공장", ["1공장", "2공장", "공통"]); n_con = st.text_area("내용"); n_as = st.text_input("담당자")
             if st.form_submit_button("등록"):
-                sheet_meetings.append_row([f"M-{int(time.time())}", n_date.strftime('%Y-%m-%d'), n_fac, n_con, n_as, "진행중", ""]); st.success("등록됨"); st.cache_data.clear(); st.rerun()
+                wb = WriteBuffer(); wb.append(sheet_meetings, [f"M-{int(time.time())}", n_date.strftime('%Y-%m-%d'), n_fac, n_con, n_as, "진행중", ""])
+                res = commit_writes(wb)
+                if res.ok: st.success("등록됨"); st.rerun()
+                else: st.error(f"오류: {res.error}")
     with tab_m3:
         st.dataframe(df_meetings, use_container_width=True)
 
@@ -896,20 +1197,26 @@ elif menu == "🏭 현장 작업 (LOT 입력)":
                     })
                 st.markdown("---")
 
-            # 재고 확인
-            if not df_inventory.empty:
+            # 재고 확인: 출고 공장 재고를 다른 준비 주문과 나눈 뒤 이 주문에 배정된 양(ATP)과 비교 (코드별 합계)
+            if not df_stock.empty:
                 st.markdown("#### 📦 출고 예정 품목 재고 확인")
-                inv_check_cols = st.columns([3,2,2,2])
-                inv_check_cols[0].write("**품목**"); inv_check_cols[1].write("**출고예정**"); inv_check_cols[2].write("**현재고**"); inv_check_cols[3].write("**상태**")
-                for entry in lot_entries:
-                    inv_r = df_inventory[df_inventory['코드'].astype(str) == str(entry['코드'])]
-                    stock = inv_r['현재고'].apply(safe_float).sum() if not inv_r.empty else 0
-                    ic = st.columns([3,2,2,2])
-                    ic[0].write(f"{entry['코드']} {entry['품목명']}")
-                    ic[1].write(f"{entry['수량']:,.0f} kg")
+                lot_rule = st.radio("재고 배정 순서", list(POLICIES), horizontal=True, key="lot_atp_policy")
+                atp_lot = atp_book(df_orders, df_stock, lot_rule).order_lines(sel_order_id, out_factory).set_index('코드')
+                inv_check_cols = st.columns([3,2,2,2,2])
+                inv_check_cols[0].write("**품목**"); inv_check_cols[1].write("**출고예정**"); inv_check_cols[2].write("**현재고**"); inv_check_cols[3].write("**배정(ATP)**"); inv_check_cols[4].write("**상태**")
+                lot_need = {}
+                for entry in lot_entries: lot_need.setdefault(str(entry['코드']).strip(), [entry['품목명'], 0.0])[1] += entry['수량']
+                for code, (name, need) in lot_need.items():
+                    stock = stock_of(df_stock, code, out_factory)
+                    got = float(atp_lot['ATP'].get(code, 0.0))
+                    ic = st.columns([3,2,2,2,2])
+                    ic[0].write(f"{code} {name}")
+                    ic[1].write(f"{need:,.0f} kg")
                     ic[2].write(f"{stock:,.0f} kg")
-                    if stock >= entry['수량']: ic[3].success("✅ 충분")
-                    else: ic[3].error("⚠️ 부족")
+                    ic[3].write(f"{got:,.0f} kg")
+                    if got >= need - 1e-9: ic[4].success("✅ 충분")
+                    elif stock >= need: ic[4].warning("⚠️ 앞선 주문 배정분과 겹침")
+                    else: ic[4].error("⚠️ 부족")
 
             if st.button("🚚 전체 출고 LOT 저장", type="primary", key="lot_out_save"):
                 if not sheet_logs:
@@ -919,23 +1226,20 @@ elif menu == "🏭 현장 작업 (LOT 입력)":
                 else:
                     try:
                         now = datetime.datetime.now().strftime("%H:%M:%S")
+                        wb = WriteBuffer()
                         for entry in lot_entries:
                             if entry['수량'] <= 0: continue
                             remark = f"PLT:{entry['팔레트']} LOT:{entry['LOT']} {entry['비고']}".strip()
-                            sheet_logs.append_row([
+                            log_book.append(wb, [
                                 out_date.strftime('%Y-%m-%d'), now, out_factory, "출고",
                                 entry['코드'], entry['품목명'], "-",
                                 entry['타입'], "-",
                                 -entry['수량'], remark, customer_name, "-"
                             ])
-                            update_inventory(out_factory, entry['코드'], -entry['수량'])
-                            time.sleep(0.2)
                         # 주문 상태를 완료로 변경
-                        all_rec = sheet_orders.get_all_records()
-                        hd = sheet_orders.row_values(1)
-                        upd = [hd] + [[(r.get(h,"") if h!='상태' else ('완료' if r['주문번호']==sel_order_id else r.get('상태',''))) for h in hd] for r in all_rec]
-                        sheet_orders.clear(); sheet_orders.update(upd)
-                        st.cache_data.clear()
+                        mark_order_done(wb, sel_order_id)
+                        res = commit_writes(wb, journal=False)  # 출고 Logs가 들어간 뒤에만 주문 완료
+                        if not res.ok: raise res.error
                         st.success(f"✅ {customer_name} 출고 완료! LOT 기록 저장됨")
                         st.rerun()
                     except Exception as e:
@@ -945,7 +1249,7 @@ elif menu == "🏭 현장 작업 (LOT 입력)":
     st.subheader("📋 오늘 출고 현황")
     if not df_logs.empty and '구분' in df_logs.columns:
         today_s = datetime.date.today().strftime('%Y-%m-%d')
-        df_out_today = df_logs[(df_logs['날짜'].astype(str).str[:10] == today_s) & (df_logs['구분'] == '출고')]
+        df_out_today = df_logs[(df_logs['날짜_dt'].dt.normalize() == pd.Timestamp(today_s)) & (df_logs['구분'] == '출고')]
         if not df_out_today.empty:
             dc2 = [c for c in ['시간', '공장', '코드', '품목명', '수량', '비고'] if c in df_out_today.columns]
             st.dataframe(df_out_today[dc2].sort_values('시간', ascending=False), use_container_width=True, hide_index=True)
@@ -977,26 +1281,24 @@ elif menu == "🔍 이력/LOT 검색":
         if df_logs.empty:
             st.warning("로그 데이터가 없습니다. 새로고침을 눌러주세요.")
         else:
-            df_s = df_logs.copy()
-            if '날짜' in df_s.columns:
-                df_s['날짜_dt'] = pd.to_datetime(df_s['날짜'], errors='coerce')
-                df_s = df_s[df_s['날짜_dt'].notna()]
-                df_s = df_s[(df_s['날짜_dt'].dt.date >= ss) & (df_s['날짜_dt'].dt.date <= se)]
-                df_s['날짜'] = df_s['날짜_dt'].dt.strftime('%Y-%m-%d')
-                df_s = df_s.drop(columns=['날짜_dt'])
-            if stp and '구분' in df_s.columns:
-                df_s = df_s[df_s['구분'].isin(stp)]
-            if sfac != "전체" and '공장' in df_s.columns:
-                df_s = df_s[df_s['공장'] == sfac]
-            if kw.strip():
-                mask = pd.Series(False, index=df_s.index)
-                for col in ['코드', '품목명', '비고']:
-                    if col in df_s.columns:
-                        mask = mask | df_s[col].astype(str).str.contains(kw.strip(), case=False, na=False)
-                df_s = df_s[mask]
+            with telemetry.section('filter'):
+                df_s = df_logs.copy()
+                if '날짜' in df_s.columns:
+                    df_s = df_s[(df_s['날짜_dt'] >= pd.Timestamp(ss)) & (df_s['날짜_dt'] <= pd.Timestamp(se))]
+                if stp and '구분' in df_s.columns:
+                    df_s = df_s[df_s['구분'].isin(stp)]
+                if sfac != "전체" and '공장' in df_s.columns:
+                    df_s = df_s[df_s['공장'] == sfac]
+                if kw.strip():
+                    mask = pd.Series(False, index=df_s.index)
+                    for col in ['코드', '품목명', '비고']:
+                        if col in df_s.columns:
+                            mask = mask | df_s[col].str.contains(kw.strip(), case=False, na=False)
+                    df_s = df_s[mask]
 
             st.write(f"검색 결과: **{len(df_s)}건**")
             if not df_s.empty:
+                export_buttons(df_s, "검색결과", "exp_search")
                 sc = [c for c in ['날짜', '시간', '공장', '구분', '코드', '품목명', '규격', '타입', '색상', '수량', '비고'] if c in df_s.columns]
                 srt = [c for c in ['날짜', '시간'] if c in df_s.columns]
                 st.dataframe(df_s[sc].sort_values(srt, ascending=False) if srt else df_s[sc],
@@ -1009,7 +1311,7 @@ elif menu == "🔍 이력/LOT 검색":
                     m3.metric("총 입고량", f"{df_s[df_s['구분']=='입고']['수량'].sum():,.0f} kg")
                 gc = [c for c in ['코드', '품목명', '구분'] if c in df_s.columns]
                 if gc and '수량' in df_s.columns:
-                    ag = df_s.groupby(gc)['수량'].sum().reset_index()
+                    ag = df_s.groupby(gc, observed=True)['수량'].sum().reset_index()
                     ag['수량'] = ag['수량'].round(2)
                     st.markdown("##### 품목별 집계")
                     st.dataframe(ag.sort_values('수량', ascending=False), use_container_width=True, hide_index=True)
@@ -1086,3 +1388,44 @@ elif menu == "🔍 이력/LOT 검색":
                         st.info("해당 주문의 출고 로그가 없습니다. (아직 출고 전이거나 LOT 입력 전)")
                 else:
                     st.info("로그 데이터가 없습니다.")
+
+# [관리자] 시트 API / 화면 실행 계측 (telemetry.py)
+elif menu == ADMIN_MENU:
+    st.title("📈 시스템 계측")
+    st.caption(f"이 서버 프로세스 메모리에만 보관합니다 (최근 API 호출 {telemetry.calls.maxlen:,}건, 화면 실행 {telemetry.runs.maxlen:,}건). 서버를 다시 시작하면 지워집니다.")
+    tm_win = st.radio("기간", ["전체", "최근 1시간", "최근 10분"], horizontal=True, key="tm_win")
+    since = {"전체": 0.0, "최근 1시간": time.time() - 3600, "최근 10분": time.time() - 600}[tm_win]
+    tm_calls, tm_runs = telemetry.snapshot()
+    tm_calls = [c for c in tm_calls if c['ts'] >= since]; tm_runs = [r for r in tm_runs if r['ts'] >= since]
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("화면 실행", f"{len(tm_runs):,}회")
+    m2.metric("평균 실행 시간", f"{np.mean([r['sec'] for r in tm_runs]) if tm_runs else 0:.2f} s")
+    m3.metric("시트 API 호출", f"{len(tm_calls):,}회", delta=f"재시도 {sum(c['retries'] for c in tm_calls)}회", delta_color="off")
+    m4.metric("한도 대기", f"{sum(c['wait'] for c in tm_calls):,.1f} s")
+    m5.metric("계측 오버헤드", f"{telemetry.overhead() * 100:.2f} %", help="계측 기록에 쓴 시간 ÷ 기록된 화면 실행 시간 (서버 시작 또는 기록 지우기 이후)")
+
+    tab_api, tab_run, tab_exp = st.tabs(["📡 시트 API", "⏱️ 화면 실행", "📤 내보내기"])
+    with tab_api:
+        st.caption("구간: setup(연결/로그인/사이드바), load(시트 불러오기), filter(집계/배정/검색), render(화면 그리기), write(저장). bg: 로 시작하면 백그라운드 스레드.")
+        st.dataframe(telemetry.api_summary(since), use_container_width=True, hide_index=True)
+        if tm_calls:
+            d_calls = pd.DataFrame(tm_calls)
+            d_calls['시각'] = pd.to_datetime(d_calls['ts'].map(datetime.datetime.fromtimestamp))
+            per_min = d_calls.assign(분=d_calls['시각'].dt.floor('min')).groupby(['분', 'op']).size().reset_index(name='호출')
+            st.markdown("##### 분당 호출")
+            st.altair_chart(alt.Chart(per_min).mark_bar().encode(x=alt.X('분:T', title=None), y=alt.Y('호출:Q'), color=alt.Color('op:N', title='작업'), tooltip=['분:T', 'op', '호출']), use_container_width=True)
+            st.markdown("##### 느린 호출 (상위 20)")
+            st.dataframe(d_calls.nlargest(20, 'sec')[['시각', 'menu', 'section', 'op', 'sheet', 'sec', 'wait', 'retries', 'bytes_in', 'bytes_out', 'status']], use_container_width=True, hide_index=True)
+    with tab_run:
+        st.dataframe(telemetry.run_summary(since), use_container_width=True, hide_index=True)
+        if tm_runs:
+            st.markdown("##### 최근 실행 (50건)")
+            d_runs = pd.DataFrame([{'시각': datetime.datetime.fromtimestamp(r['ts']), '메뉴': r['menu'], '전체(s)': r['sec'], 'API': r['api_calls'], '중단': r['interrupted'], **r['sections']} for r in tm_runs[-50:][::-1]])
+            st.dataframe(d_runs, use_container_width=True, hide_index=True)
+    with tab_exp:
+        st.caption("API 호출(kind=api)과 화면 실행(kind=run) 기록을 시각 순서대로 한 줄에 하나씩(JSON lines) 내려받습니다. 기간 선택과 관계없이 보관 중인 전체 기록입니다.")
+        st.download_button("⬇️ 계측 기록 (JSON lines)", telemetry.export_jsonl(), file_name=f"kpr_telemetry_{datetime.datetime.now():%Y%m%d_%H%M}.jsonl", mime="application/x-ndjson")
+        if st.button("🗑️ 기록 지우기"): telemetry.clear(); st.rerun()
+
+# 실행 끝 (st.rerun()/st.stop()으로 여기까지 오지 못한 실행은 다음 실행이 시작될 때 닫힌다)
+telemetry.end_run()
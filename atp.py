@@ -0,0 +1,149 @@
+# --- 납기 가능 수량 (ATP) 배정 ---
+# 준비 상태 주문 전체에 제품 재고를 순서대로 배정한다: 날짜순(같은 날이면 주문번호순) 또는 우선순위 → 날짜순.
+# 재고 묶음(pool)은 공장별 + '전체'(두 공장 합계). 주문은 출고할 공장이 정해져 있지 않아서 묶음마다 따로 배정한다.
+# 주문마다 코드별 배정량(ATP)과 부족량을 내고, 새 주문을 넣으면 얼마나 받을 수 있는지(promise)도 계산한다.
+# 다시 불러올 때(sync) 주문/재고를 앞의 값과 비교해서, 바뀐 주문에 들어 있는 코드와 재고가 바뀐 코드만 다시 배정한다.
+import threading
+
+import pandas as pd
+
+POOL_ALL = '전체'
+POLICIES = {"날짜순": "date", "우선순위": "priority"}
+PRIORITY_COL = '우선순위'   # Orders에 이 열이 있으면 작은 값부터 먼저 (없거나 비어 있으면 가장 뒤)
+EPS = 1e-9
+_LAST = float('inf')
+
+
+class AtpBook:
+    def __init__(self, policy="date"):
+        self.policy = policy
+        self._lines = {}     # 주문번호 -> {코드: 주문수량}
+        self._rank = {}      # 주문번호 -> 배정 순서 키
+        self._info = {}      # 주문번호 -> (날짜, 거래처)
+        self._by_code = {}   # 코드 -> {주문번호}
+        self._stock = {POOL_ALL: {}}   # 묶음 -> {코드: 현재고}
+        self._alloc = {}     # (묶음, 코드) -> {주문번호: 배정량}
+        self._token = None
+        self._lock = threading.Lock()
+
+    def _key(self, date, prio, oid):
+        return (prio, date, oid) if self.policy == "priority" else (date, oid)
+
+    # 주문 하나를 넣거나 바꾼다 (lines가 비면 뺀다). 다시 배정해야 할 코드들을 돌려준다.
+    def _set_order(self, oid, lines, rank=None, info=None):
+        old = self._lines.pop(oid, {})
+        for c in old: self._by_code.get(c, set()).discard(oid)
+        self._rank.pop(oid, None); self._info.pop(oid, None)
+        if lines:
+            self._lines[oid] = dict(lines); self._rank[oid] = rank; self._info[oid] = info
+            for c in lines: self._by_code.setdefault(c, set()).add(oid)
+        return set(old) | set(lines or {})
+
+    def _allocate(self, pool, code):
+        left = max(self._stock.get(pool, {}).get(code, 0.0), 0.0)
+        out = {}
+        for oid in sorted(self._by_code.get(code, ()), key=self._rank.__getitem__):
+            a = min(self._lines[oid][code], left); out[oid] = a; left -= a
+        if out: self._alloc[(pool, code)] = out
+        else: self._alloc.pop((pool, code), None)
+
+    # 주문 하나만 바뀌었을 때: 그 주문의 (바뀌기 전후) 코드만 모든 묶음에서 다시 배정
+    def update_order(self, oid, lines, date="", priority=_LAST, client=""):
+        with self._lock:
+            codes = self._set_order(str(oid), lines, self._key(date, priority, str(oid)), (date, client))
+            for pool in self._stock:
+                for c in codes: self._allocate(pool, c)
+            self._token = None
+
+    @staticmethod
+    def _orders(df_orders):
+        if df_orders.empty or '상태' not in df_orders.columns: return {}
+        d = df_orders[df_orders['상태'].astype(str) == '준비']
+        if d.empty: return {}
+        dt = d['날짜_dt'] if '날짜_dt' in d.columns else pd.to_datetime(d['날짜'], errors='coerce')
+        d = pd.DataFrame({'주문번호': d['주문번호'].astype(str).str.strip(), '코드': d['코드'].astype(str).str.strip(),
+                          '수량': pd.to_numeric(d['수량'], errors='coerce').fillna(0.0),
+                          'dt': dt, '거래처': d['거래처'].astype(str),
+                          '우선': pd.to_numeric(d[PRIORITY_COL], errors='coerce').fillna(_LAST) if PRIORITY_COL in d.columns else _LAST})
+        qty = d.groupby(['주문번호', '코드'], sort=False)['수량'].sum()
+        head = d.groupby('주문번호', sort=False).agg(dt=('dt', 'min'), 우선=('우선', 'min'))
+        date = head['dt'].dt.strftime('%Y-%m-%d').fillna('9999-12-31')
+        client = d.drop_duplicates('주문번호').set_index('주문번호')['거래처']
+        out = {oid: [{}, day, p, cl] for oid, day, p, cl in zip(head.index, date, head['우선'], client.reindex(head.index))}
+        for (oid, c), q in qty.items():
+            if q > EPS: out[oid][0][c] = float(q)
+        return out
+
+    @staticmethod
+    def _pools(df_stock):
+        pools = {POOL_ALL: {}}
+        if df_stock.empty: return pools
+        d = pd.DataFrame({'공장': df_stock['공장'].astype(str), '코드': df_stock['코드'].astype(str).str.strip(), '현재고': df_stock['현재고'].astype(float)})
+        for (f, c), q in d.groupby(['공장', '코드'], sort=False)['현재고'].sum().items(): pools.setdefault(f, {})[c] = float(q)
+        pools[POOL_ALL] = {c: float(q) for c, q in d.groupby('코드', sort=False)['현재고'].sum().items()}
+        return pools
+
+    # 불러온 주문/재고와 맞춘다. token(시트 버전 등)이 앞과 같으면 아무것도 안 한다. 다시 배정한 (묶음, 코드) 수를 돌려준다.
+    def sync(self, df_orders, df_stock, token=None):
+        with self._lock:
+            if token is not None and token == self._token: return 0
+            orders = self._orders(df_orders)
+            codes = set()
+            for oid in [o for o in self._lines if o not in orders]: codes |= self._set_order(oid, None)
+            for oid, (lines, date, prio, client) in orders.items():
+                rank = self._key(date, prio, oid)
+                if self._lines.get(oid) != lines or self._rank.get(oid) != rank or self._info.get(oid) != (date, client):
+                    codes |= self._set_order(oid, lines, rank, (date, client))
+            pools = self._pools(df_stock)
+            dirty = {(p, c) for p in pools for c in codes}
+            for p in set(pools) | set(self._stock):
+                new, old = pools.get(p, {}), self._stock.get(p, {})
+                dirty |= {(p, c) for c in set(new) | set(old) if abs(new.get(c, 0.0) - old.get(c, 0.0)) > EPS}
+            self._stock = pools
+            for p, c in dirty: self._allocate(p, c)
+            self._token = token
+            return len(dirty)
+
+    def _pool(self, pool):
+        return pool if pool in self._stock else POOL_ALL
+
+    # 주문 하나의 코드별 표: 주문수량, 앞선 주문 수요, 현재고, 배정(ATP), 부족
+    def order_lines(self, oid, pool=POOL_ALL):
+        cols = ['코드', '주문수량', '선순위수요', '현재고', 'ATP', '부족']
+        with self._lock:
+            pool, oid = self._pool(pool), str(oid)
+            rows = []
+            for c, q in self._lines.get(oid, {}).items():
+                r = self._rank[oid]
+                ahead = sum(self._lines[o][c] for o in self._by_code[c] if self._rank[o] < r)
+                a = self._alloc.get((pool, c), {}).get(oid, 0.0)
+                rows.append([c, q, ahead, self._stock[pool].get(c, 0.0), a, q - a])
+        return pd.DataFrame(rows, columns=cols)
+
+    # 준비 주문 전체: 주문별 주문수량/ATP/부족/충족률 (배정 순서대로)
+    def orders_table(self, pool=POOL_ALL):
+        cols = ['순서', '주문번호', '날짜', '거래처', '주문수량', 'ATP', '부족', '충족률(%)', '판정']
+        with self._lock:
+            pool = self._pool(pool)
+            rows = []
+            for i, oid in enumerate(sorted(self._lines, key=self._rank.__getitem__), start=1):
+                q = sum(self._lines[oid].values())
+                a = sum(self._alloc.get((pool, c), {}).get(oid, 0.0) for c in self._lines[oid])
+                rows.append([i, oid, *self._info[oid], q, a, q - a, 100.0 * a / q if q > EPS else 100.0,
+                             "충족" if q - a <= EPS else ("일부" if a > EPS else "미배정")])
+        return pd.DataFrame(rows, columns=cols)
+
+    # 코드의 남은(아직 어느 주문에도 배정되지 않은) 재고
+    def free(self, code, pool=POOL_ALL):
+        with self._lock:
+            pool = self._pool(pool)
+            return max(self._stock[pool].get(code, 0.0), 0.0) - sum(self._alloc.get((pool, code), {}).values())
+
+    # 새 주문(아직 시트에 없음)이 이 날짜/우선순위로 들어오면 받을 수 있는 양: (ATP, 부족)
+    def promise(self, code, qty, date, priority=_LAST, pool=POOL_ALL):
+        with self._lock:
+            pool, code = self._pool(pool), str(code).strip()
+            r = self._key(date, priority, "\uffff")   # 같은 날짜/우선순위의 기존 주문보다 뒤
+            ahead = sum(self._lines[o][code] for o in self._by_code.get(code, ()) if self._rank[o] < r)
+            a = max(min(max(self._stock[pool].get(code, 0.0), 0.0) - ahead, qty), 0.0)
+            return a, qty - a
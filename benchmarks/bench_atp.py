@@ -0,0 +1,58 @@
+# --- ATP 배정 속도: 처음 배정 vs 주문 하나가 바뀐 뒤 다시 맞추기 ---
+# 준비 주문 N건(주문마다 1~3개 코드)과 두 공장 재고로 AtpBook.sync를 돌린다.
+# 주문 하나의 수량을 바꾼 뒤 sync는 그 주문의 코드만 다시 배정하므로 처음보다 훨씬 적은 (묶음, 코드)를 건드린다.
+# 실행: python benchmarks/bench_atp.py [주문수]
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from atp import AtpBook  # noqa: E402
+
+
+def make_data(n_orders, n_codes=400, seed=3):
+    rnd = random.Random(seed)
+    codes = [f"KA{i:04d}" for i in range(n_codes)]
+    rows = []
+    for i in range(n_orders):
+        day = f"2026-{rnd.randint(1, 9):02d}-{rnd.randint(1, 28):02d}"
+        for c in rnd.sample(codes, rnd.randint(1, 3)):
+            rows.append([f"ORD-{i:06d}", day, f"CUST{rnd.randint(1, 80)}", c, rnd.choice([500, 1000, 2000]), "준비"])
+    df_orders = pd.DataFrame(rows, columns=['주문번호', '날짜', '거래처', '코드', '수량', '상태'])
+    df_stock = pd.DataFrame([[f, c, float(rnd.randint(0, 60000))] for f in ('1공장', '2공장') for c in codes], columns=['공장', '코드', '현재고'])
+    return df_orders, df_stock
+
+
+def check(book, df_orders, df_stock):
+    # 코드마다 날짜순으로 처음부터 다시 배정한 값과 같아야 한다
+    d = df_orders.groupby(['주문번호', '코드'])['수량'].sum().reset_index().merge(df_orders.groupby('주문번호')['날짜'].min().reset_index())
+    d = d.sort_values(['날짜', '주문번호'])
+    stock = df_stock.groupby('코드')['현재고'].sum()
+    d['앞'] = d.groupby('코드')['수량'].cumsum() - d['수량']
+    d['ATP'] = (d['코드'].map(stock) - d['앞']).clip(lower=0).clip(upper=d['수량'])
+    got = book.orders_table().set_index('주문번호')['ATP']
+    want = d.groupby('주문번호')['ATP'].sum()
+    assert (got.reindex(want.index) - want).abs().max() < 1e-6, "처음부터 다시 배정한 값과 다릅니다"
+
+
+def main(n_orders=20000):
+    df_orders, df_stock = make_data(n_orders)
+    book = AtpBook()
+    t = time.perf_counter(); n_full = book.sync(df_orders, df_stock, "v1"); t_full = time.perf_counter() - t
+    t = time.perf_counter(); book.sync(df_orders, df_stock, "v1"); t_same = time.perf_counter() - t
+    df2 = df_orders.copy(); df2.loc[len(df2) // 2, '수량'] += 1500
+    t = time.perf_counter(); n_one = book.sync(df2, df_stock, "v2"); t_one = time.perf_counter() - t
+    check(book, df2, df_stock)   # 일부만 다시 배정한 결과가 처음부터 배정한 결과와 같은지
+    t = time.perf_counter(); book.update_order("ORD-NEW", {"KA0001": 800.0}, "2026-01-01", client="NEW"); t_upd = time.perf_counter() - t
+    print(f"준비 주문 {n_orders}건 ({len(df_orders)}줄), 코드 {df_stock['코드'].nunique()}개, 묶음 3개(공장 2 + 전체)")
+    print(f"  처음 배정                 {t_full * 1000:8.1f} ms  (묶음, 코드) {n_full}개")
+    print(f"  같은 버전 다시 호출       {t_same * 1000:8.1f} ms")
+    print(f"  주문 하나 수량 변경 후 sync {t_one * 1000:6.1f} ms  (묶음, 코드) {n_one}개")
+    print(f"  update_order (주문 하나)  {t_upd * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
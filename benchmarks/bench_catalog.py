@@ -0,0 +1,97 @@
+# --- 품목 분류 벤치마크: 기존 행 단위 apply vs catalog.py 벡터 연산 ---
+# 실행: python benchmarks/bench_catalog.py [로그행수]
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import attach, enrich_items, item_group, item_shape, product_category  # noqa: E402
+
+
+# 기존 app.py 구현 (비교 기준)
+def get_product_category(row):
+    name = str(row['품목명']).upper()
+    code = str(row['코드']).upper()
+    gubun = str(row.get('구분', '')).strip()
+    if 'CP' in name or 'COMPOUND' in name or 'CP' in code: return "Compound"
+    if ('KA' in name or 'KA' in code) and (gubun == '반제품' or name.endswith('반') or '반' in name): return "KA반제품"
+    if 'KA' in name or 'KA' in code: return "KA"
+    if 'KG' in name or 'KG' in code: return "KG"
+    if gubun == '반제품' or name.endswith('반'): return "반제품(기타)"
+    return "기타"
+
+
+def get_group(row):
+    name = str(row['품목명']).upper(); grp = str(row['구분'])
+    if grp == '반제품' or name.endswith('반'): return "반제품"
+    if "CP" in name or "COMPOUND" in name: return "COMPOUND"
+    if "KG" in name: return "KG"
+    if "KA" in name: return "KA"
+    return "기타"
+
+
+def get_shape(code, df_items):
+    shape = "-"
+    if not df_items.empty:
+        item_row = df_items[df_items['코드'].astype(str) == str(code)]
+        if not item_row.empty:
+            korean_type = str(item_row.iloc[0].get('타입', '-'))
+            if "원통" in korean_type: shape = "CYLINDRIC"
+            elif "큐빅" in korean_type: shape = "CUBICAL"
+            elif "펠렛" in korean_type: shape = "PELLET"
+            elif "파우더" in korean_type: shape = "POWDER"
+            else: shape = korean_type
+    return shape
+
+
+def make_items(n):
+    rnd = random.Random(1)
+    rows = []
+    for i in range(n):
+        fam = rnd.choice(["KA", "KG", "CP", "PP", "KA"])
+        gubun = rnd.choice(["제품", "완제품", "반제품", "원자재"])
+        name = f"{fam}-{i}" + ("반" if gubun == "반제품" and rnd.random() < 0.5 else "")
+        rows.append({"코드": f"{fam}{i:05d}", "품목명": name, "구분": gubun, "규격": f"{rnd.randint(1, 9)}mm",
+                     "타입": rnd.choice(["원통형", "큐빅", "펠렛", "파우더", "기타"]), "색상": rnd.choice(["BK", "WH", "NA"])})
+    return pd.DataFrame(rows)
+
+
+def timed(fn):
+    t = time.perf_counter(); out = fn(); return out, time.perf_counter() - t
+
+
+def main(n_logs=100_000, n_items=2_000, n_order_lines=200):
+    items = make_items(n_items)
+    codes = items.sample(n_logs, replace=True, random_state=2).reset_index(drop=True)
+    logs = codes[['코드', '품목명']].assign(구분='생산', 수량=100.0)
+    order = codes.head(n_order_lines)[['코드', '품목명']]
+
+    # 정확성: 같은 입력에 대해 결과가 같은지
+    assert (items.apply(get_product_category, axis=1) == product_category(items)).all()
+    assert (items.apply(get_group, axis=1) == item_group(items)).all()
+    assert (order['코드'].map(lambda c: get_shape(c, items)) == item_shape(items.set_index('코드').loc[order['코드']].reset_index())).all()
+
+    _, t_old_cat = timed(lambda: logs.apply(get_product_category, axis=1))
+    _, t_old_grp = timed(lambda: items.apply(get_group, axis=1))
+    _, t_old_shp = timed(lambda: [get_shape(c, items) for c in order['코드']])
+    enriched, t_enrich = timed(lambda: enrich_items(items))
+    _, t_attach_logs = timed(lambda: attach(logs, enriched))
+    _, t_attach_ord = timed(lambda: attach(order, enriched))
+
+    print(f"Items {n_items:,} / Logs {n_logs:,} / 주문 라인 {n_order_lines}")
+    print(f"  제품군  apply(axis=1) on Logs : {t_old_cat * 1000:9.1f} ms")
+    print(f"  그룹    apply(axis=1) on Items: {t_old_grp * 1000:9.1f} ms")
+    print(f"  형상    get_shape() per line  : {t_old_shp * 1000:9.1f} ms")
+    print(f"  enrich_items (1회)            : {t_enrich * 1000:9.1f} ms")
+    print(f"  attach → Logs                 : {t_attach_logs * 1000:9.1f} ms")
+    print(f"  attach → 주문                 : {t_attach_ord * 1000:9.1f} ms")
+    old = t_old_cat * 2 + t_old_grp + t_old_shp  # 대시보드는 rerun마다 apply 두 번
+    new = t_enrich + t_attach_logs + t_attach_ord
+    print(f"  합계: 기존 {old * 1000:.1f} ms → {new * 1000:.1f} ms ({old / new:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
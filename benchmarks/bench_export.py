@@ -0,0 +1,51 @@
+# --- 로그 내보내기 벤치마크: DataFrame.to_excel vs export.py (constant_memory, 청크) ---
+# 실행: python benchmarks/bench_export.py [로그행수]
+import io
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_schema import make_logs  # noqa: E402
+from export import to_csv, to_xlsx  # noqa: E402
+from schema import apply_schema  # noqa: E402
+
+
+def plain_xlsx(df):
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as w: df.drop(columns=['날짜_dt']).to_excel(w, index=False)
+    return buf.getvalue()
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+# 실행 중 RSS를 10ms마다 재서 시작 시점 대비 최대 증가량을 본다 (리눅스 /proc 기준)
+def measure(fn):
+    base = rss_mb(); peak = [base]; done = threading.Event()
+    def sample():
+        while not done.is_set(): peak[0] = max(peak[0], rss_mb()); time.sleep(0.01)
+    th = threading.Thread(target=sample); th.start()
+    t = time.perf_counter(); out = fn(); dt = time.perf_counter() - t
+    done.set(); th.join()
+    return len(out), dt, max(peak[0], rss_mb()) - base
+
+
+def main(n=500_000):
+    df = apply_schema('Logs', make_logs(n))
+    print(f"Logs {n:,}행 (표 자체 {df.memory_usage(deep=True).sum() / 2 ** 20:.1f} MB)")
+    print(f"  {'방식':<22}{'크기(MB)':>10}{'시간(s)':>9}{'RSS 증가(MB)':>16}")
+    for label, fn in [("to_excel (xlsxwriter)", lambda: plain_xlsx(df)),
+                      ("export.to_xlsx", lambda: to_xlsx(df)),
+                      ("export.to_csv", lambda: to_csv(df))]:
+        size, dt, peak = measure(fn)
+        print(f"  {label:<22}{size / 2 ** 20:>10.1f}{dt:>9.1f}{peak:>16.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,177 @@
+# --- 재고 동시 쓰기 스트레스 테스트: 잠금 없는 읽기-더하기-쓰기 vs InventoryIndex.increment ---
+# 로컬 가짜 워크시트(호출마다 지연, 요청 하나는 원자적으로 처리)에 20개 스레드가 동시에 재고를 더하고 뺀다.
+# InventoryIndex는 서버 프로세스 두 개를 흉내 내서 두 개를 만들어 나눠 쓴다 (같은 시트와 메타 시트, 서로 다른 프로세스 잠금).
+# 키 중 둘은 시트에 없어서 두 프로세스가 동시에 새 행을 만들려고 한다.
+# InventoryIndex 쪽은 검사다: 시트의 현재고가 넣은 증감의 합과 키마다 정확히 같고, 오류가 없고, 키마다 행이 하나뿐이어야 한다
+# (아니면 AssertionError로 실패). 앱에서는 저널이 Logs 행을 보낸 뒤 apply_logs → increment로 같은 길을 탄다.
+# 실행: python benchmarks/bench_inventory_cas.py [스레드수] [스레드당 쓰기 수]
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gspread.utils import a1_to_rowcol  # noqa: E402
+from inventory import QTY_COL, InventoryIndex  # noqa: E402
+from versions import META_HEADERS  # noqa: E402
+
+HEADERS = ['공장', '코드', '품목명', '규격', '타입', '색상', '현재고']
+
+
+class FakeSpreadsheet:
+    def __init__(self, ws): self.ws = ws
+
+    def batch_update(self, body):
+        return self.ws._requests(body["requests"])
+
+
+class FakeWorksheet:
+    def __init__(self, rows, latency=(0.001, 0.004), seed=1, title="Inventory", sheet_id=0):
+        self.title = title; self.id = sheet_id; self.col_count = 26
+        self.cells = [list(r) for r in rows]
+        self.spreadsheet = FakeSpreadsheet(self)
+        self.latency = latency; self.rnd = random.Random(seed)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        with self._lock: d = self.rnd.uniform(*self.latency); self.calls += 1
+        time.sleep(d)
+
+    def _set(self, r, c, v):
+        while len(self.cells) < r: self.cells.append([])
+        row = self.cells[r - 1]
+        row += [""] * (c - len(row))
+        row[c - 1] = v
+
+    def _range(self, a1):
+        m = re.fullmatch(r"([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?", a1)
+        c1 = a1_to_rowcol(m.group(1) + "1")[1]; r1 = int(m.group(2) or 1)
+        c2 = a1_to_rowcol((m.group(3) or m.group(1)) + "1")[1]
+        r2 = int(m.group(4)) if m.group(4) else (r1 if not m.group(3) else len(self.cells))
+        return r1, c1, r2, c2
+
+    def _values(self, a1):
+        r1, c1, r2, c2 = self._range(a1)
+        out = [[str(v) for v in self.cells[r - 1][c1 - 1:c2]] for r in range(r1, min(r2, len(self.cells)) + 1)]
+        while out and not out[-1]: out.pop()
+        return out
+
+    def add_cols(self, n): self.col_count += n
+
+    def row_values(self, r):
+        self._wait()
+        with self._lock: return [str(v) for v in self.cells[r - 1]] if r <= len(self.cells) else []
+
+    def get(self, a1):
+        self._wait()
+        with self._lock: return self._values(a1)
+
+    def batch_get(self, ranges):
+        self._wait()
+        with self._lock: return [self._values(a) for a in ranges]
+
+    def update(self, values, a1):
+        self._wait()
+        with self._lock:
+            r1, c1, _, _ = self._range(a1)
+            for i, row in enumerate(values):
+                for j, v in enumerate(row): self._set(r1 + i, c1 + j, v)
+
+    def append_rows(self, rows):
+        self._wait()
+        with self._lock: self.cells += [list(r) for r in rows]
+
+    def append_row(self, row): self.append_rows([row])
+
+    def batch_update(self, data):
+        self._wait()
+        with self._lock:
+            for d in data:
+                r1, c1, _, _ = self._range(d["range"])
+                for i, row in enumerate(d["values"]):
+                    for j, v in enumerate(row): self._set(r1 + i, c1 + j, v)
+
+    def _requests(self, reqs):
+        self._wait()
+        replies = []
+        with self._lock:
+            for q in reqs:
+                fr = q["findReplace"]; g = fr["range"]; n = 0
+                for r in range(g["startRowIndex"] + 1, g["endRowIndex"] + 1):
+                    for c in range(g["startColumnIndex"] + 1, g["endColumnIndex"] + 1):
+                        row = self.cells[r - 1] if r <= len(self.cells) else []
+                        if c <= len(row) and str(row[c - 1]) == fr["find"]: self._set(r, c, fr["replacement"]); n += 1
+                replies.append({"findReplace": {"occurrencesChanged": n}})
+        return {"replies": replies}
+
+    def qty(self, key):
+        for row in self.cells[1:]:
+            if (str(row[0]), str(row[1])) == key: return float(row[QTY_COL - 1])
+        return None
+
+    def rows_of(self, key):
+        return sum(1 for row in self.cells[1:] if (str(row[0]), str(row[1])) == key)
+
+
+def plan(n_writers, per_writer, keys, seed=11):
+    rnd = random.Random(seed)
+    return [[(rnd.choice(keys), float(rnd.choice([-30, -10, -5, 5, 10, 25, 50]))) for _ in range(per_writer)] for _ in range(n_writers)]
+
+
+def run(label, ws, work, apply):
+    start = threading.Barrier(len(work))
+    errors = []
+    def writer(i, ops):
+        start.wait()
+        for k, d in ops:
+            try: apply(i, k, d)
+            except Exception as e: errors.append(e)
+    threads = [threading.Thread(target=writer, args=(i, ops)) for i, ops in enumerate(work)]
+    t = time.perf_counter()
+    for th in threads: th.start()
+    for th in threads: th.join()
+    return time.perf_counter() - t, errors
+
+
+def main(n_writers=20, per_writer=15):
+    keys = [("1공장", "KA0001"), ("1공장", "KA0002"), ("2공장", "KA0001"), ("2공장", "KG0100")]
+    base = [HEADERS] + [[f, c, "-", "-", "-", "-", 1000] for f, c in keys[:2]]   # 뒤의 두 키는 시트에 없음 → 새 행
+    work = plan(n_writers, per_writer, keys)
+    expect = {k: (1000.0 if k in keys[:2] else 0.0) for k in keys}
+    for ops in work:
+        for k, d in ops: expect[k] += d
+    print(f"쓰기 스레드 {n_writers}개 × {per_writer}회 = {n_writers * per_writer}건, 키 {len(keys)}개")
+    print(f"  {'방식':<26}{'시간(s)':>9}{'API 호출':>10}{'오차 합(kg)':>14}  결과")
+
+    # 1) 기존 방식: 읽고 더해서 그대로 쓰기 (잠금 없음)
+    ws = FakeWorksheet(base)
+    def naive(i, k, d):
+        for r, row in enumerate(ws.get("A1:G")[1:], start=2):
+            if (row[0], row[1]) == k:
+                q = float(row[QTY_COL - 1]); ws.update([[q + d]], f"G{r}"); return
+        ws.append_rows([[k[0], k[1], "-", "-", "-", "-", d]])
+    dt, errs = run("naive", ws, work, naive)
+    diff = sum(abs((ws.qty(k) or 0.0) - v) for k, v in expect.items())
+    print(f"  {'잠금 없음 (읽기-더하기-쓰기)':<26}{dt:>9.2f}{ws.calls:>10}{diff:>14,.0f}  {'일치' if diff < 1e-6 else '유실 발생'}")
+
+    # 2) InventoryIndex: 프로세스 두 개(인스턴스 두 개)가 같은 시트와 메타 시트(새 행 임대)를 나눠 씀
+    ws = FakeWorksheet(base)
+    meta = FakeWorksheet([META_HEADERS], seed=2, title="_Meta", sheet_id=1)
+    procs = [InventoryIndex(ws, meta_ws=meta), InventoryIndex(ws, meta_ws=meta)]
+    dt, errs = run("cas", ws, work, lambda i, k, d: procs[i % 2].increment({k: d}, {k: ("-", "-", "-", "-")}))
+    got = {k: ws.qty(k) for k in keys}
+    diff = sum(abs((got[k] or 0.0) - v) for k, v in expect.items())
+    n_rows = {k: ws.rows_of(k) for k in keys}
+    ok = diff < 1e-6 and not errs and all(n == 1 for n in n_rows.values())
+    print(f"  {'키 잠금 + 대기열 + Ver CAS':<26}{dt:>9.2f}{ws.calls + meta.calls:>10}{diff:>14,.0f}  {'통과' if ok else '실패'}")
+    for k in keys: print(f"    {k}: 기대 {expect[k]:,.0f} / 시트 {got[k]:,.0f} (행 {n_rows[k]}개)")
+    assert not errs, f"오류 {len(errs)}건: {errs[0]!r}"
+    for k in keys: assert got[k] is not None and abs(got[k] - expect[k]) < 1e-6, f"{k}: 기대 {expect[k]} / 시트 {got[k]}"
+    assert all(n == 1 for n in n_rows.values()), f"같은 키 행이 여러 개입니다: {n_rows}"
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
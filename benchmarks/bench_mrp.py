@@ -0,0 +1,85 @@
+# --- MRP 속도 측정 ---
+# 가짜 3단계 BOM(제품 → 반제품 → 원자재)과 준비 상태 주문 N건으로 mrp()를 돌려 시간을 잰다.
+# 주문 수가 늘어도 단계마다 BOM 연결 목록 위의 bincount 한 번이라 시간은 주문 표 집계가 대부분이다.
+# 재고가 없으면 원자재 총소요량이 다단계 전개(flat)와 같아야 하고, 순환/타입별 하위 BOM도 flat과 같게 전개되는지 확인한다.
+# 실행: python benchmarks/bench_mrp.py [주문수]
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bom import BomEngine  # noqa: E402
+from mrp import mrp  # noqa: E402
+
+
+def make_data(n_orders, n_fg=300, n_semi=40, n_raw=60, seed=5):
+    rnd = random.Random(seed)
+    fg = [f"KA{i:04d}" for i in range(n_fg)]; semi = [f"SB{i:03d}" for i in range(n_semi)]; raw = [f"RM{i:03d}" for i in range(n_raw)]
+    bom = []
+    for c in fg:
+        for m in rnd.sample(semi, 2) + rnd.sample(raw, 3): bom.append([c, "", m, round(rnd.uniform(0.05, 0.6), 3)])
+    for c in semi:
+        for m in rnd.sample(raw, 4): bom.append([c, "", m, round(rnd.uniform(0.1, 0.5), 3)])
+    df_bom = pd.DataFrame(bom, columns=['제품코드', '타입', '자재코드', '소요량'])
+    df_orders = pd.DataFrame({'주문번호': [f"ORD-{i // 3:06d}" for i in range(n_orders)], '코드': [rnd.choice(fg) for _ in range(n_orders)],
+                              '타입': "", '수량': [rnd.choice([200, 500, 1000, 2000]) for _ in range(n_orders)],
+                              '상태': [rnd.choice(['준비', '준비', '준비', '완료']) for _ in range(n_orders)]})
+    df_stock = pd.DataFrame([[rnd.choice(['1공장', '2공장']), c, float(rnd.randint(0, 5000))] for c in fg + semi + raw], columns=['공장', '코드', '현재고'])
+    days = pd.date_range("2026-01-01", periods=200, freq="D")
+    df_logs = pd.DataFrame([[d.strftime("%Y-%m-%d"), '입고', m, float(rnd.randint(500, 3000))] for d in days for m in rnd.sample(raw, 5)],
+                           columns=['날짜', '구분', '코드', '수량'])
+    return df_bom, df_orders, df_stock, df_logs
+
+
+def _orders(lines):
+    return pd.DataFrame([[f"ORD-{i}", c, t, q, '준비'] for i, (c, t, q) in enumerate(lines)], columns=['주문번호', '코드', '타입', '수량', '상태'])
+
+
+def _gross(mat, kind=None):
+    d = mat if kind is None else mat[mat['구분'] == kind]
+    return d.set_index('자재코드')['총소요량'].to_dict()
+
+
+def check_cases():
+    no_stock = pd.DataFrame(columns=['공장', '코드', '현재고'])
+    # 순환: FG → A → B → A. 끊긴 B → A는 전개하지 않으니 A, B 모두 10 (예전에는 단계를 BOM 줄 수만큼 돌아 20씩)
+    eng = BomEngine(pd.DataFrame([["FG", "", "A", 1.0], ["A", "", "B", 1.0], ["B", "", "A", 1.0]], columns=['제품코드', '타입', '자재코드', '소요량']))
+    assert eng.cycles, "순환을 찾지 못했습니다"
+    _, mat = mrp(_orders([("FG", "", 10)]), no_stock, eng)
+    assert _gross(mat) == {"A": 10.0, "B": 10.0}, _gross(mat)
+    # 타입별 하위 BOM: 큐빅 제품의 반제품 S는 (S, 큐빅) BOM으로 전개해야 한다 (flat과 같게)
+    eng = BomEngine(pd.DataFrame([["FG", "큐빅", "S", 2.0], ["S", "원통", "R1", 1.0], ["S", "큐빅", "R2", 1.0]], columns=['제품코드', '타입', '자재코드', '소요량']))
+    _, mat = mrp(_orders([("FG", "큐빅", 10)]), no_stock, eng)
+    assert _gross(mat, '원자재') == dict(eng.explode("FG", "큐빅", 10)) == {"R2": 20.0}, _gross(mat, '원자재')
+    # 생산 차감: 반제품 S 재고 15는 S 자체로 쓰고, 모자란 5만 (S, 큐빅) BOM으로 → R2 5. 재고가 없으면 다단계 전개와 같다
+    assert dict(eng.explode_netted("FG", "큐빅", 10, {"S": 15.0})) == {"S": 15.0, "R2": 5.0}, eng.explode_netted("FG", "큐빅", 10, {"S": 15.0})
+    assert dict(eng.explode_netted("FG", "큐빅", 10, {"S": 50.0})) == {"S": 20.0}
+    assert dict(eng.explode_netted("FG", "큐빅", 10, {})) == dict(eng.explode("FG", "큐빅", 10))
+    eng = BomEngine(pd.DataFrame([["FG", "", "A", 1.0], ["A", "", "B", 1.0], ["B", "", "A", 1.0]], columns=['제품코드', '타입', '자재코드', '소요량']))
+    assert dict(eng.explode_netted("FG", "", 10, {})) == dict(eng.explode("FG", "", 10)), (eng.explode_netted("FG", "", 10, {}), eng.explode("FG", "", 10))
+
+
+def main(n_orders=3000):
+    check_cases()
+    df_bom, df_orders, df_stock, df_logs = make_data(n_orders)
+    t = time.perf_counter(); eng = BomEngine(df_bom); t_eng = time.perf_counter() - t
+    t = time.perf_counter(); fg, mat = mrp(df_orders, df_stock, eng, df_logs); t_mrp = time.perf_counter() - t
+    print(f"BOM {len(df_bom)}줄, 주문 {n_orders}건 (준비 {int((df_orders['상태'] == '준비').sum())}건), 입고 기록 {len(df_logs)}건")
+    print(f"  BOM 행렬 만들기 {t_eng * 1000:8.1f} ms (불러올 때 한 번)")
+    print(f"  MRP 계산        {t_mrp * 1000:8.1f} ms")
+    print(f"  제품 부족 {fg['부족수량'].sum():,.0f} kg, 부족 원자재 {int(((mat['구분'] == '원자재') & (mat['부족량'] > 0)).sum())}종")
+    assert t_mrp < 1.0, "MRP 계산이 1초를 넘었습니다"
+    _, mat0 = mrp(df_orders, df_stock.iloc[0:0], eng)
+    want = eng.explode_many(df_orders[df_orders['상태'] == '준비'])
+    got = pd.Series(_gross(mat0, '원자재')).reindex(want.index).fillna(0.0)
+    assert (got - want).abs().max() < 1e-6 * want.abs().max(), "재고가 없을 때 원자재 총소요량이 다단계 전개와 다릅니다"
+    for c, t in eng.parents[:200]:   # 생산 차감도 재고가 없으면 다단계 전개와 같다
+        a, b = dict(eng.explode_netted(c, t, 100, {})), dict(eng.explode(c, t, 100))
+        assert a.keys() == b.keys() and all(abs(a[k] - b[k]) < 1e-6 * max(1.0, abs(b[k])) for k in b), (c, t)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,49 @@
+# --- 팔레트 배치 벤치마크: 기존 순서대로 채우기 vs palletize.plan_pallets ---
+# 실행: python benchmarks/bench_palletize.py [라인수]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from palletize import greedy_pallets, pallet_stats, plan_pallets  # noqa: E402
+
+
+def make_order(n, seed=7):
+    rnd = random.Random(seed)
+    codes = [f"KA{rnd.randint(1, n // 3 + 1):04d}" for _ in range(n)]
+    qtys = [rnd.choice([25, 50, 100, 150, 200, 300, 500, 750, 1000, 1500, 2400, 3000]) * 1.0 for _ in range(n)]
+    return codes, qtys
+
+
+def timed(fn, repeat=5):
+    best = None; out = None
+    for _ in range(repeat):
+        t = time.perf_counter(); out = fn(); dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+    return out, best
+
+
+def check(plan, qtys, cap):
+    per_line = [0.0] * len(qtys); per_plt = {}
+    for i, p, load in plan:
+        per_line[i] += load; per_plt[p] = per_plt.get(p, 0.0) + load
+    assert all(abs(a - b) < 1e-6 for a, b in zip(per_line, qtys)), "라인 수량 불일치"
+    assert all(w <= cap + 1e-6 for w in per_plt.values()), "적재량 초과"
+
+
+def main(n=500, cap=1000.0):
+    codes, qtys = make_order(n)
+    print(f"주문 {n}라인 / 총 {sum(qtys):,.0f} kg / 팔레트 {cap:,.0f} kg")
+    print(f"  {'방식':<14}{'시간(ms)':>10}{'팔레트':>8}{'혼적':>8}{'라인당 팔레트':>14}")
+    for label, fn in [("기존(순서대로)", lambda: greedy_pallets(qtys, cap)),
+                      ("최적", lambda: plan_pallets(qtys, cap)),
+                      ("제품별 모으기", lambda: plan_pallets(qtys, cap, keep_together=True))]:
+        plan, t = timed(fn)
+        check(plan, qtys, cap)
+        n_plt, n_mixed, spread = pallet_stats(plan, codes)
+        print(f"  {label:<14}{t * 1000:>10.1f}{n_plt:>8}{n_mixed:>8}{spread:>14.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
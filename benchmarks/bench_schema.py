@@ -0,0 +1,107 @@
+# --- Logs 열 타입 벤치마크: 문자열 그대로 vs schema.py 적용 ---
+# 20만 행 Logs에서 메모리와 화면(rerun)마다 반복되는 변환/필터 시간을 비교한다.
+# 실행: python benchmarks/bench_schema.py [로그행수]
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schema import apply_schema  # noqa: E402
+
+HEADER = ['날짜', '시간', '공장', '구분', '코드', '품목명', '규격', '타입', '색상', '수량', '비고', '거래처', '']
+
+
+# 시트/복제본에서 받는 모양: 숫자는 숫자, 나머지는 문자열 (object)
+def make_logs(n):
+    rng = np.random.default_rng(3)
+    days = pd.date_range("2024-01-01", periods=700).strftime('%Y-%m-%d').to_numpy()
+    codes = np.array([f"KA{i:04d}" for i in range(800)] + [f"RM{i:03d}" for i in range(200)], dtype=object)
+    cols = {
+        '날짜': rng.choice(days, n), '시간': rng.choice([f"{h:02d}:{m:02d}:00" for h in range(24) for m in range(60)], n),
+        '공장': rng.choice(['1공장', '2공장'], n), '구분': rng.choice(['생산', '입고', '출고', '사용(Auto)', '재고실사'], n),
+        '코드': rng.choice(codes, n), '품목명': rng.choice(codes, n), '규격': rng.choice(['3mm', '5mm', '-'], n),
+        '타입': rng.choice(['원통', '큐빅', '펠렛', '-'], n), '색상': rng.choice(['BK', 'WH', 'NA', '-'], n),
+        '수량': rng.integers(-500, 2000, n), '비고': rng.choice(['', 'KA0001 생산', 'PLT:1 LOT:A1'], n),
+        '거래처': rng.choice(['-', 'SHANGHAI', 'HANOI'], n), '': rng.choice([f"압출{i}호" for i in range(1, 7)] + ['-'], n),
+    }
+    return pd.DataFrame({k: pd.Series(v, dtype=object) for k, v in cols.items()})[HEADER]
+
+
+def load_old(df):
+    df = df.replace([np.inf, -np.inf], np.nan).fillna("")
+    df['수량'] = pd.to_numeric(df['수량'], errors='coerce').fillna(0.0)
+    return df
+
+
+# 기존 화면들이 rerun마다 하던 일 (생산 이력, 입고 이력, 검색, 오늘 출고)
+def views_old(df, s_d, e_d, kw):
+    p = df[df['구분'] == '생산'].copy()
+    cols = list(p.columns); cols[12] = '라인'; p.columns = cols
+    for c in ['코드', '품목명', '라인', '타입']: p[c] = p[c].astype(str)
+    pd.to_datetime(p['날짜']).min()
+    p['날짜'] = pd.to_datetime(p['날짜'])
+    p = p[(p['날짜'].dt.date >= s_d) & (p['날짜'].dt.date <= e_d)]
+    p['날짜'] = p['날짜'].dt.strftime('%Y-%m-%d')
+    sorted(p['라인'].unique().tolist())
+    r = df[df['구분'] == '입고'].copy()
+    pd.to_datetime(r['날짜']).min()
+    r['날짜'] = pd.to_datetime(r['날짜'])
+    r = r[(r['날짜'].dt.date >= s_d) & (r['날짜'].dt.date <= e_d)]
+    r['날짜'] = r['날짜'].dt.strftime('%Y-%m-%d')
+    s = df.copy()
+    s['날짜_dt'] = pd.to_datetime(s['날짜'], errors='coerce')
+    s = s[s['날짜_dt'].notna()]
+    s = s[(s['날짜_dt'].dt.date >= s_d) & (s['날짜_dt'].dt.date <= e_d)]
+    s['날짜'] = s['날짜_dt'].dt.strftime('%Y-%m-%d')
+    m = pd.Series(False, index=s.index)
+    for c in ['코드', '품목명', '비고']: m = m | s[c].astype(str).str.contains(kw, case=False, na=False)
+    t = df[(df['날짜'].astype(str).str[:10] == e_d.strftime('%Y-%m-%d')) & (df['구분'] == '출고')]
+    return len(p), len(r), int(m.sum()), len(t)
+
+
+def views_new(df, s_d, e_d, kw):
+    lo, hi = pd.Timestamp(s_d), pd.Timestamp(e_d)
+    p = df[df['구분'] == '생산']
+    p['날짜_dt'].min()
+    p = p[(p['날짜_dt'] >= lo) & (p['날짜_dt'] <= hi)]
+    sorted(p['라인'].unique().tolist())
+    r = df[df['구분'] == '입고']
+    r['날짜_dt'].min()
+    r = r[(r['날짜_dt'] >= lo) & (r['날짜_dt'] <= hi)]
+    s = df[(df['날짜_dt'] >= lo) & (df['날짜_dt'] <= hi)]
+    m = pd.Series(False, index=s.index)
+    for c in ['코드', '품목명', '비고']: m = m | s[c].str.contains(kw, case=False, na=False)
+    t = df[(df['날짜_dt'].dt.normalize() == hi) & (df['구분'] == '출고')]
+    return len(p), len(r), int(m.sum()), len(t)
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter(); out = fn(); dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+    return out, best
+
+
+def main(n=200_000):
+    raw = make_logs(n)
+    s_d, e_d, kw = datetime.date(2024, 3, 1), datetime.date(2025, 6, 30), "ka00"
+    old, t_load_old = timed(lambda: load_old(raw))
+    new, t_load_new = timed(lambda: apply_schema('Logs', raw))
+    a, t_old = timed(lambda: views_old(old, s_d, e_d, kw))
+    b, t_new = timed(lambda: views_new(new, s_d, e_d, kw))
+    assert a == b, (a, b)
+    mb_old = old.memory_usage(deep=True).sum() / 2 ** 20
+    mb_new = new.memory_usage(deep=True).sum() / 2 ** 20
+    print(f"Logs {n:,}행")
+    print(f"  메모리          : {mb_old:8.1f} MB → {mb_new:8.1f} MB")
+    print(f"  불러오기(1회)   : {t_load_old * 1000:8.1f} ms → {t_load_new * 1000:8.1f} ms")
+    print(f"  화면 rerun 1회  : {t_old * 1000:8.1f} ms → {t_new * 1000:8.1f} ms ({t_old / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
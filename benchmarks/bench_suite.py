@@ -0,0 +1,328 @@
+# --- 합성 데이터 벤치마크 모음 (가짜 gspread) ---
+# 실제 스프레드시트 없이 fake_gspread.FakeSpreadsheet(호출 수/셀 수 집계 + 지연)에 synth.py 데이터를 올려 놓고
+# 앱이 하는 일을 모듈 단위로 그대로 따라 해서 시간, API 호출 수, 주고받은 셀 수, 최대 메모리 증가를 잰다.
+#   앱 시작        LogBook(ID 열 확인) + 메타 시트 버전 준비
+#   데이터 로딩    기존: 시트마다 get_all_records / 현재: 로컬 복제본 동기화(values_batch_get 1회) → 스키마 → 품목 분류 (첫 번째, 50행 추가 뒤)
+#   대시보드       일별 집계(DailyRollup) + 재고(StockLedger), 처음과 50행 추가 뒤
+#   검색 탭        이력 검색 필터(기간/구분/공장/키워드) + 품목별 집계
+#   생산 저장      기존: append_row + findall/cell/update_cell (자재마다) / 현재: WriteBuffer + 저널
+#   주문 확정      기존: 행마다 append_row / 현재: OrderBook + WriteBuffer + 저널
+#   출고 확정      기존: 줄마다 재고 수정 + append_row, get_all_records → clear → update / 현재: 로그 추가 + 상태 셀만 수정
+# 기존 방식은 예전 app.py의 호출 순서를 그대로 옮겼다 (예전 코드의 time.sleep은 뺐다).
+# '현재' 쓰기 시간은 버튼이 돌아오기까지, 비고의 '반영'은 저널이 시트에 다 보내기까지 걸린 시간.
+# 최대 메모리는 리눅스 /proc의 최대 RSS(VmHWM)를 시나리오마다 초기화해서 잰다 (없으면 tracemalloc).
+# 실행: python benchmarks/bench_suite.py [--sizes 10000,100000,1000000] [--latency 0.1] [--per-kcell 0.002] [--json 결과.jsonl]
+import argparse
+import datetime
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synth  # noqa: E402
+from fake_gspread import FakeSpreadsheet  # noqa: E402
+from bom import BomEngine  # noqa: E402
+from catalog import attach, enrich_items  # noqa: E402
+from inventory import StockLedger  # noqa: E402
+from journal import WriteJournal  # noqa: E402
+from logbook import LogBook, is_deleted  # noqa: E402
+from orders import OrderBook  # noqa: E402
+from palletize import plan_pallets  # noqa: E402
+from replica import Replica  # noqa: E402
+from rollup import DailyRollup  # noqa: E402
+from schema import apply_schema  # noqa: E402
+from versions import SheetVersions  # noqa: E402
+from writes import WriteBuffer  # noqa: E402
+
+LOAD_SHEETS = ['Items', 'Inventory', 'Logs', 'BOM', 'Orders']
+TODAY = synth.END_DATE
+
+
+# --- 최대 메모리 ---
+def _status(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field): return int(line.split()[1]) * 1024
+    except OSError: pass
+    return None
+
+
+def _reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as f: f.write("5")
+        return True
+    except OSError: return False
+
+
+class Meter:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        gc.collect()
+        self.proc = _reset_peak() and _status("VmHWM") is not None
+        if self.proc: self.rss0 = _status("VmRSS")
+        else: tracemalloc.start()
+        self.calls0, self.cells0, self.bytes0 = self.stats.snapshot()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.sec = time.perf_counter() - self.t0
+        calls, cells, nbytes = self.stats.snapshot()
+        self.calls = {k: v - self.calls0.get(k, 0) for k, v in calls.items() if v - self.calls0.get(k, 0)}
+        self.cells, self.bytes = cells - self.cells0, nbytes - self.bytes0
+        if self.proc: self.peak = max(_status("VmHWM") - self.rss0, 0)
+        else: self.peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+        return False
+
+
+# --- 앱이 하는 일 (app.py의 load_for / read_sheet / commit_writes를 모듈만으로 따라 함) ---
+class AppSim:
+    def __init__(self, doc, workdir):
+        self.doc = doc
+        self.replica = Replica(os.path.join(workdir, "replica.db"))
+        self.versions = SheetVersions(doc.sheet('_Meta'))
+        self.journal = WriteJournal(doc.sheet, path=os.path.join(workdir, "journal.jsonl"), keys={'Logs': 'ID'}, on_sent=lambda t, rows: self.versions.bump(t))
+        self.journal.start()
+        self.ledger = StockLedger(self.replica.path)
+        self.log_book = self.order_book = None
+        self.frames = {}
+
+    def start(self):
+        self.versions.ensure(['Items', 'Inventory', 'Logs', 'BOM', 'Orders'])
+        self.log_book = LogBook(self.doc.sheet('Logs'), settle=self.journal.wait_idle)
+        self.order_book = OrderBook(self.doc.sheet('Orders'), settle=self.journal.wait_idle)
+
+    def read_sheet(self, name, synced=False):
+        ws = self.doc.sheet(name)
+        if not synced: self.replica.expect_edit(name, self.versions.edited(name)); self.replica.sync_one(name, ws)
+        df = self.replica.frame(name)
+        gen = df.attrs.get('replica_gen')
+        df = apply_schema(name, self.journal.overlay(name, df))
+        if name == 'Items': df = enrich_items(df)
+        if name == 'Logs': df = df[~is_deleted(df)]
+        if name in ('Logs', 'Orders'): df = attach(df, self.frames['Items'])
+        if gen is not None: df.attrs['replica_gen'] = gen
+        return df
+
+    # 여러 시트를 다시 불러올 때는 한꺼번에 동기화 (app.py load_for)
+    def load(self):
+        for n in LOAD_SHEETS: self.replica.expect_edit(n, self.versions.edited(n))
+        self.replica.sync_all(self.doc, {n: self.doc.sheet(n) for n in LOAD_SHEETS})
+        for n in LOAD_SHEETS: self.frames[n] = self.read_sheet(n, synced=True)
+        return self.frames
+
+    def commit(self, wb, journal=True):
+        appends = wb.take_appends([t for t in wb.appended() if self.journal.accepts(t)]) if journal else {}
+        direct = wb.appended()
+        res = wb.flush()
+        if res.ok and appends: self.journal.submit(appends)
+        self.versions.bump(*res.changed, *direct, *appends, edited=res.changed)
+        return res
+
+    def settle(self, *titles):
+        t = time.perf_counter()
+        for title in titles: self.journal.wait_idle(title, timeout=600)
+        return time.perf_counter() - t
+
+
+# --- 예전 app.py 방식 ---
+def legacy_load(doc):
+    out = {}
+    for n in LOAD_SHEETS:
+        df = pd.DataFrame(doc.sheet(n).get_all_records())
+        df = df.replace([np.inf, -np.inf], np.nan).fillna("")
+        if '수량' in df.columns: df['수량'] = pd.to_numeric(df['수량'], errors='coerce').fillna(0.0)
+        out[n] = df
+    return out
+
+
+def legacy_update_inventory(inv, factory, code, qty, info=("-", "-", "-", "-")):
+    cells = inv.findall(str(code))
+    target = next((c for c in cells if c.col == 2), None)
+    if target:
+        try: curr = float(inv.cell(target.row, 7).value)
+        except ValueError: curr = 0.0
+        inv.update_cell(target.row, 7, curr + qty)
+    else:
+        inv.append_row([factory, code, *info, qty])
+
+
+def legacy_rewrite_status(orders, order_id):
+    all_rec = orders.get_all_records(); hd = orders.row_values(1)
+    upd = [hd] + [[r.get(h, "") if str(r['주문번호']) != order_id else (r['상태'] if h != '상태' else '완료') for h in hd] for r in all_rec]
+    orders.clear(); orders.update(upd)
+
+
+# --- 화면 계산 ---
+def dashboard(roll, ledger, df_logs):
+    roll.update(df_logs)
+    end = TODAY; start = end - datetime.timedelta(days=30)
+    trend = roll.production_trend(start, end)
+    inbound, _ = roll.recent_inbound()
+    last = roll.last_production_day(end + datetime.timedelta(days=1))
+    stock = ledger.stock(df_logs)
+    return len(trend), len(inbound), last, len(stock)
+
+
+def search(df_logs, kw="KA0", days=30, kinds=("생산", "입고", "출고"), factory="1공장"):
+    se = pd.Timestamp(TODAY); ss = se - pd.Timedelta(days=days)
+    d = df_logs[(df_logs['날짜_dt'] >= ss) & (df_logs['날짜_dt'] <= se)]
+    d = d[d['구분'].isin(kinds)]
+    d = d[d['공장'] == factory]
+    mask = pd.Series(False, index=d.index)
+    for col in ['코드', '품목명', '비고']: mask = mask | d[col].str.contains(kw, case=False, na=False)
+    d = d[mask]
+    shown = d.sort_values(['날짜', '시간'], ascending=False)
+    ag = d.groupby(['코드', '품목명', '구분'], observed=True)['수량'].sum().reset_index()
+    return len(shown), len(ag)
+
+
+def _log_row(code, name, kind, qty, note, line="1호기"):
+    return [TODAY.strftime('%Y-%m-%d'), datetime.datetime.now().strftime('%H:%M:%S'), "1공장", kind, code, name, "-", "-", "-", qty, note, "-", line]
+
+
+def extra_logs(items, n, seed):
+    rows = synth.make_logs(items, n, seed)[1:]
+    for r in rows: r[0] = TODAY.strftime('%Y-%m-%d')
+    return rows
+
+
+# --- 실행 ---
+def run_size(n, latency, per_kcell, out):
+    data = synth.sheets(n)
+    sizes = {k: len(v) - 1 for k, v in data.items() if k != '_Meta'}
+    print(f"\n== Logs {n:,}행 (Items {sizes['Items']:,} / BOM {sizes['BOM']:,} / Orders {sizes['Orders']:,} / Inventory {sizes['Inventory']:,}) ==")
+    print(f"  {'시나리오':<28}{'시간(s)':>9}{'API 호출':>9}{'셀':>12}{'최대 메모리(MB)':>16}  비고")
+    doc = FakeSpreadsheet(data, latency, per_kcell)
+    items = data['Items']
+    work = tempfile.mkdtemp(prefix="kpr_bench_")
+    results = []
+
+    def report(name, m, note=""):
+        calls = ", ".join(f"{k}×{v}" for k, v in sorted(m.calls.items(), key=lambda kv: -kv[1]))
+        print(f"  {name:<28}{m.sec:>9.2f}{sum(m.calls.values()):>9}{m.cells:>12,}{m.peak / 2**20:>16.1f}  {note}{' | ' if note else ''}{calls}")
+        rec = {'rows': n, 'scenario': name, 'sec': round(m.sec, 4), 'api_calls': sum(m.calls.values()), 'calls': m.calls,
+               'cells': m.cells, 'bytes': m.bytes, 'peak_mb': round(m.peak / 2**20, 2), 'note': note, 'latency': latency, 'per_kcell': per_kcell}
+        results.append(rec)
+        if out: out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    app = AppSim(doc, work)
+    try:
+        with Meter(doc.stats) as m: app.start()
+        report("앱 시작", m)
+
+        with Meter(doc.stats) as m: legacy = legacy_load(doc)
+        report("데이터 로딩 (기존)", m, f"Logs {len(legacy['Logs']):,}행")
+        del legacy
+        with Meter(doc.stats) as m: frames = app.load()
+        report("데이터 로딩 (현재, 처음)", m, f"Logs {len(frames['Logs']):,}행")
+
+        roll = DailyRollup()
+        with Meter(doc.stats) as m: dashboard(roll, app.ledger, frames['Logs'])
+        report("대시보드 (처음)", m)
+        with Meter(doc.stats) as m: search(frames['Logs'])
+        report("검색 탭", m)
+
+        # 다른 사람이 로그 50행을 추가한 뒤 다시 불러오기 → 뒤에 붙은 행만
+        doc.sheet('Logs').rows += extra_logs(items, 50, seed=99)
+        with Meter(doc.stats) as m: frames = app.load()
+        report("데이터 로딩 (현재, 50행 추가 뒤)", m)
+        with Meter(doc.stats) as m: dashboard(roll, app.ledger, frames['Logs'])
+        report("대시보드 (50행 추가 뒤)", m)
+
+        # 생산 저장: BOM 있는 제품 하나 1,000kg
+        eng = BomEngine(frames['BOM'], dict(zip(frames['Items']['코드'], frames['Items']['타입'].astype(str))))
+        code, typ = eng.parents[0]
+        name = frames['Items'].set_index('코드').loc[code, '품목명']
+        mats = eng.explode(code, typ, 1000.0)
+        inv = doc.sheet('Inventory')
+        with Meter(doc.stats) as m:
+            doc.sheet('Logs').append_row(_log_row(code, name, "생산", 1000.0, ""))
+            legacy_update_inventory(inv, "1공장", code, 1000.0)
+            for mat, req in eng.explode(code, typ, 1000.0, multi=False):
+                legacy_update_inventory(inv, "1공장", mat, -req)
+                doc.sheet('Logs').append_row(_log_row(mat, "System", "사용(Auto)", -req, f"{code} 생산"))
+        report("생산 저장 (기존)", m, f"자재 {len(mats)}종")
+        with Meter(doc.stats) as m:
+            wb = WriteBuffer()
+            app.log_book.append(wb, _log_row(code, name, "생산", 1000.0, ""))
+            for mat, req in mats: app.log_book.append(wb, _log_row(mat, "System", "사용(Auto)", -req, f"{code} 생산"))
+            res = app.commit(wb)
+        landed = app.settle('Logs')
+        assert res.ok, res.error
+        report("생산 저장 (현재)", m, f"반영 +{landed:.2f}s")
+
+        # 주문 확정: 장바구니 5품목을 팔레트로 나눠 저장
+        prods = [r for r in items[1:] if r[5] == '제품'][:5]
+        cart = [(r[0], r[1], r[3], q) for r, q in zip(prods, [1800.0, 950.0, 2400.0, 600.0, 1200.0])]
+        def order_rows(oid):
+            return [[oid, TODAY.strftime('%Y-%m-%d'), "BENCH CLIENT", cart[i][0], cart[i][1], load, plt, "준비", "BOX", "", cart[i][2]]
+                    for i, plt, load in plan_pallets([c[3] for c in cart], 1000.0)]
+        with Meter(doc.stats) as m:
+            for r in order_rows("ORD-BENCH-OLD"): doc.sheet('Orders').append_row(r)
+        report("주문 확정 (기존)", m)
+        with Meter(doc.stats) as m:
+            wb = WriteBuffer()
+            for r in order_rows("ORD-BENCH-NEW"): app.order_book.append(wb, r)
+            res = app.commit(wb)
+        landed = app.settle('Orders')
+        assert res.ok, res.error
+        report("주문 확정 (현재)", m, f"반영 +{landed:.2f}s")
+
+        # 출고 확정: 준비 주문 하나 (위에서 저장한 주문은 빼고)
+        pend = frames['Orders'][frames['Orders']['상태'] == '준비']
+        oids = pend['주문번호'].unique()
+        def out_rows(oid):
+            d = pend[pend['주문번호'] == oid]
+            return [_log_row(r['코드'], r['품목명'], "출고", -float(r['수량']), f"주문출고({oid})") for _, r in d.iterrows()], d
+        rows, d = out_rows(oids[0])
+        with Meter(doc.stats) as m:
+            for r, (_, line) in zip(rows, d.iterrows()):
+                legacy_update_inventory(inv, "1공장", line['코드'], -float(line['수량']))
+                doc.sheet('Logs').append_row(r)
+            legacy_rewrite_status(doc.sheet('Orders'), oids[0])
+        report("출고 확정 (기존)", m, f"{len(rows)}줄")
+        rows, d = out_rows(oids[1])
+        with Meter(doc.stats) as m:
+            wb = WriteBuffer()
+            for r in rows: app.log_book.append(wb, r)
+            app.order_book.set_status(wb, oids[1], '완료')
+            res = app.commit(wb, journal=False)   # 출고 Logs가 들어간 뒤에만 주문 완료 (app.py 출고 확정)
+        landed = app.settle('Logs')
+        assert res.ok, res.error
+        report("출고 확정 (현재)", m, f"{len(rows)}줄, 반영 +{landed:.2f}s")
+    finally:
+        while app.journal.status()['pending']: time.sleep(0.05)   # 저널 스레드가 파일을 다 쓴 뒤에 지운다
+        shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="가짜 gspread 위에서 앱 동작별 시간/API 호출/메모리 측정")
+    ap.add_argument("--sizes", default="10000,100000,1000000", help="Logs 행 수 (쉼표로 구분)")
+    ap.add_argument("--latency", type=float, default=0.1, help="API 호출 한 번의 기본 지연(초)")
+    ap.add_argument("--per-kcell", type=float, default=0.002, help="주고받은 1000셀마다 더하는 지연(초)")
+    ap.add_argument("--json", help="결과를 JSON lines로 저장할 파일")
+    args = ap.parse_args(argv)
+    print(f"지연: 호출당 {args.latency * 1000:.0f} ms + 1000셀당 {args.per_kcell * 1000:.1f} ms")
+    out = open(args.json, "w", encoding="utf-8") if args.json else None
+    try:
+        for n in [int(s) for s in args.sizes.split(",") if s.strip()]: run_size(n, args.latency, args.per_kcell, out)
+    finally:
+        if out: out.close()
+
+
+if __name__ == "__main__":
+    main()
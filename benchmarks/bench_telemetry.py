@@ -0,0 +1,95 @@
+# --- 계측(telemetry.py) 오버헤드 ---
+# 가짜 HTTP 세션을 붙인 QuotaHTTPClient로 시트 API 호출을 보내면서
+#  1) 호출 하나에 observer가 더하는 시간 (observer 없음 vs 있음, 지연 0)
+#  2) 화면 실행을 흉내 낸 것(load: 병렬 시트 읽기, filter, render, write)에서 계측 시간 ÷ 실행 시간
+#  3) 기록이 가득 찼을 때(deque 최대 길이) 요약표/JSON lines 만드는 시간
+# 을 잰다. 병렬 읽기 스레드의 호출도 화면 실행(메뉴/구간)에 붙는지 확인한다.
+# 실행: python benchmarks/bench_telemetry.py [호출수]
+import contextvars
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import quota  # noqa: E402
+from quota import QuotaHTTPClient, TokenBucket  # noqa: E402
+from telemetry import Telemetry  # noqa: E402
+
+BASE = "https://sheets.googleapis.com/v4/spreadsheets/BENCH"
+
+
+class FakeSession:
+    def __init__(self, latency=0.0, body=b'{"values": []}'):
+        self.latency = latency
+        self.body = body
+
+    def request(self, method, url, **kwargs):
+        if self.latency: time.sleep(self.latency)
+        r = requests.Response()
+        r.status_code = 200; r._content = self.body; r.url = url
+        return r
+
+
+def per_call(n):
+    hc = QuotaHTTPClient(None, session=FakeSession())
+    out = {}
+    for label, tm in (("observer 없음", None), ("observer 있음", Telemetry())):
+        quota.observer = tm.api_call if tm else None
+        t = time.perf_counter()
+        for i in range(n): hc.values_get("BENCH", f"Logs!A{i + 2}:O")
+        out[label] = (time.perf_counter() - t) / n
+    quota.observer = None
+    return out
+
+
+def simulated_runs(n_runs, latency):
+    tm = Telemetry(); quota.observer = tm.api_call
+    hc = QuotaHTTPClient(None, session=FakeSession(latency, json.dumps({"values": [["x"] * 15] * 200}).encode()))
+    for k in range(n_runs):
+        tm.begin_run("s1")
+        tm.set_menu("영업/출고 관리"); tm.mark('load')
+        with ThreadPoolExecutor(max_workers=3) as ex:   # replica._sync_parallel처럼 시트별 병렬 읽기
+            for f in [ex.submit(contextvars.copy_context().run, hc.values_get, "BENCH", f"{s}!A1:O") for s in ('Items', 'Logs', 'Orders')]: f.result()
+        with tm.section('filter'): time.sleep(latency)
+        tm.mark('render'); time.sleep(latency * 2)
+        if k % 3 == 0:
+            with tm.section('write'): hc.values_append("BENCH", "Logs!A1", {"valueInputOption": "USER_ENTERED"}, {"values": [["2026-10-17", "생산", "KA001", "500"]]})
+        tm.end_run()
+    quota.observer = None
+    return tm
+
+
+def full_store():
+    tm = Telemetry()
+    for i in range(tm.calls.maxlen):
+        tm.api_call("get", f"{BASE}/values/Logs!A{i}:O", {"params": {}}, None, 0.05, 0.0, i % 7 == 0, None)
+    for i in range(tm.runs.maxlen // 10):
+        tm.begin_run(str(i % 5)); tm.mark('load'); tm.mark('render'); tm.end_run()
+    t = time.perf_counter(); tm.api_summary(); tm.run_summary(); t_sum = time.perf_counter() - t
+    t = time.perf_counter(); data = tm.export_jsonl(); t_exp = time.perf_counter() - t
+    return t_sum, t_exp, len(data)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    quota.read_bucket = TokenBucket(10 ** 9); quota.write_bucket = TokenBucket(10 ** 9)   # 한도 대기는 빼고 잰다
+    pc = per_call(n)
+    print(f"호출 {n:,}회 (지연 0): observer 없음 {pc['observer 없음'] * 1e6:.1f} µs/호출, 있음 {pc['observer 있음'] * 1e6:.1f} µs/호출 "
+          f"(+{(pc['observer 있음'] - pc['observer 없음']) * 1e6:.1f} µs)")
+    tm = simulated_runs(30, 0.02)
+    calls, runs = tm.snapshot()
+    assert all(c['menu'] == "영업/출고 관리" for c in calls), "병렬 읽기 호출이 화면 실행에 붙지 않았습니다"
+    assert {c['section'] for c in calls} == {'load', 'write'}
+    print(f"화면 실행 {len(runs)}회 (호출 지연 20 ms): 평균 {tm.run_time / len(runs) * 1000:.1f} ms, 계측 {tm.cost / len(runs) * 1e6:.0f} µs/실행 "
+          f"= 오버헤드 {tm.overhead() * 100:.3f} %")
+    print(tm.run_summary().to_string(index=False))
+    t_sum, t_exp, size = full_store()
+    print(f"기록 가득 참(API {Telemetry().calls.maxlen:,}건): 요약표 {t_sum * 1000:.0f} ms, JSON lines {t_exp * 1000:.0f} ms ({size / 2 ** 20:.1f} MB) — 관리자 화면에서만 돈다")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# --- 메모리 안의 가짜 gspread (벤치마크용) ---
+# 앱과 예전 코드가 쓰는 Worksheet/Spreadsheet 메서드를 흉내 낸다. 값은 시트처럼 문자열 2차원 목록으로 들고 있다.
+# 호출마다 메서드별 횟수, 주고받은 셀 수/바이트를 세고, 지연(기본 지연 + 1000셀당 지연)을 넣는다.
+# (읽기: get_all_values/get_all_records/get/batch_get/row_values/col_values/cell/findall, values_batch_get
+#  쓰기: append_row(s)/update/update_cell/batch_update/delete_rows/clear/add_cols, spreadsheet.batch_update의 deleteDimension/findReplace)
+import re
+import threading
+import time
+from collections import Counter
+
+from gspread.cell import Cell
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_to_rowcol
+
+_A1 = re.compile(r"(?P<c1>[A-Z]*)(?P<r1>\d*)(?::(?P<c2>[A-Z]*)(?P<r2>\d*))?")
+
+
+def _s(v):
+    return "" if v is None else str(v)
+
+
+def _col_no(letters):
+    return a1_to_rowcol(letters + "1")[1]
+
+
+class CallStats:
+    def __init__(self, latency=0.0, per_kcell=0.0):
+        self.latency = latency        # 호출 한 번의 기본 지연(초)
+        self.per_kcell = per_kcell    # 주고받은 1000셀마다 더하는 지연(초)
+        self.calls = Counter()
+        self.cells = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def hit(self, op, values=()):
+        n = sum(len(r) for r in values)
+        b = sum(len("".join(map(str, r)).encode("utf-8")) for r in values) if n else 0   # 셀 값의 UTF-8 바이트 합 (JSON 포장 제외)
+        with self._lock:
+            self.calls[op] += 1; self.cells += n; self.bytes += b
+        d = self.latency + self.per_kcell * n / 1000.0
+        if d > 0: time.sleep(d)
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+    def snapshot(self):
+        with self._lock: return dict(self.calls), self.cells, self.bytes
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, values, sheet_id):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self.rows = [[_s(v) for v in r] for r in values]
+        self.col_count = max([26] + [len(r) for r in self.rows])
+        self._lock = threading.RLock()
+
+    @property
+    def stats(self):
+        return self.spreadsheet.stats
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    # A1 범위 → (r1, c1, r2, c2), 끝이 열린 범위("A2:A", "1:1")는 시트 끝까지
+    def _range(self, a1):
+        m = _A1.fullmatch(a1)
+        c1 = _col_no(m["c1"]) if m["c1"] else 1
+        r1 = int(m["r1"]) if m["r1"] else 1
+        if m.group("c2") is None and m.group("r2") is None: return r1, c1, (r1 if m["r1"] else len(self.rows)), c1
+        c2 = _col_no(m["c2"]) if m["c2"] else self.col_count
+        r2 = int(m["r2"]) if m["r2"] else len(self.rows)
+        return r1, c1, r2, c2
+
+    def _values(self, a1):
+        r1, c1, r2, c2 = self._range(a1)
+        out = [r[c1 - 1:c2] for r in self.rows[r1 - 1:r2]]
+        for r in out:
+            while r and r[-1] == "": r.pop()
+        while out and not out[-1]: out.pop()
+        return out
+
+    def _set(self, r, c, v):
+        while len(self.rows) < r: self.rows.append([])
+        row = self.rows[r - 1]
+        if len(row) < c: row += [""] * (c - len(row))
+        row[c - 1] = _s(v)
+        self.col_count = max(self.col_count, c)
+
+    # --- 읽기 ---
+    def get_all_values(self):
+        with self._lock: out = [list(r) for r in self.rows]
+        self.stats.hit("get_all_values", out); return out
+
+    def get_all_records(self):
+        with self._lock: head, body = list(self.rows[0]) if self.rows else [], [list(r) for r in self.rows[1:]]
+        self.stats.hit("get_all_records", [head] + body)
+        recs = []
+        for r in body:
+            r = r + [""] * (len(head) - len(r))
+            recs.append({h: _num(v) for h, v in zip(head, r)})
+        return recs
+
+    def get(self, a1):
+        with self._lock: out = self._values(a1)
+        self.stats.hit("get", out); return out
+
+    def batch_get(self, ranges):
+        with self._lock: out = [self._values(a) for a in ranges]
+        self.stats.hit("batch_get", [r for v in out for r in v]); return out
+
+    def row_values(self, r):
+        with self._lock: out = list(self.rows[r - 1]) if r <= len(self.rows) else []
+        self.stats.hit("row_values", [out]); return out
+
+    def col_values(self, c):
+        with self._lock: out = [r[c - 1] if c <= len(r) else "" for r in self.rows]
+        while out and out[-1] == "": out.pop()
+        self.stats.hit("col_values", [out]); return out
+
+    def cell(self, r, c):
+        with self._lock: v = self.rows[r - 1][c - 1] if r <= len(self.rows) and c <= len(self.rows[r - 1]) else ""
+        self.stats.hit("cell", [[v]]); return Cell(r, c, v)
+
+    def findall(self, query):
+        q = str(query)
+        with self._lock: out = [Cell(i + 1, j + 1, v) for i, r in enumerate(self.rows) for j, v in enumerate(r) if v == q]
+        self.stats.hit("findall", [[c.value] for c in out]); return out
+
+    # --- 쓰기 ---
+    def append_row(self, row):
+        self.append_rows([row], _op="append_row")
+
+    def append_rows(self, rows, _op="append_rows"):
+        rows = [[_s(v) for v in r] for r in rows]
+        self.stats.hit(_op, rows)
+        with self._lock:
+            self.rows += rows; self.col_count = max([self.col_count] + [len(r) for r in rows])
+
+    def update(self, values, a1="A1"):
+        if isinstance(values, str): values, a1 = a1, values   # update(범위, 값) 순서도 받는다
+        self.stats.hit("update", values)
+        with self._lock:
+            r1, c1, _, _ = self._range(a1)
+            for i, row in enumerate(values):
+                for j, v in enumerate(row): self._set(r1 + i, c1 + j, v)
+
+    def update_cell(self, r, c, v):
+        self.stats.hit("update_cell", [[v]])
+        with self._lock: self._set(r, c, v)
+
+    def batch_update(self, data):
+        self.stats.hit("batch_update", [r for d in data for r in d["values"]])
+        with self._lock:
+            for d in data:
+                r1, c1, _, _ = self._range(d["range"])
+                for i, row in enumerate(d["values"]):
+                    for j, v in enumerate(row): self._set(r1 + i, c1 + j, v)
+
+    def delete_rows(self, start, end=None):
+        self.stats.hit("delete_rows")
+        with self._lock: del self.rows[start - 1:(end or start)]
+
+    def clear(self):
+        self.stats.hit("clear")
+        with self._lock: self.rows = []
+
+    def add_cols(self, n):
+        self.stats.hit("add_cols")
+        with self._lock: self.col_count += n
+
+
+def _num(v):
+    # get_all_records처럼 숫자로 보이는 값은 숫자로
+    try: return int(v)
+    except ValueError:
+        try: return float(v)
+        except ValueError: return v
+
+
+class FakeSpreadsheet:
+    def __init__(self, sheets, latency=0.0, per_kcell=0.0):
+        self.stats = CallStats(latency, per_kcell)
+        self._ws = {t: FakeWorksheet(self, t, v, i) for i, (t, v) in enumerate(sheets.items())}
+        self._lock = threading.Lock()
+
+    def worksheet(self, title):
+        self.stats.hit("worksheet")
+        if title not in self._ws: raise WorksheetNotFound(title)
+        return self._ws[title]
+
+    def add_worksheet(self, title, rows=1000, cols=20):
+        self.stats.hit("add_worksheet")
+        with self._lock:
+            self._ws[title] = FakeWorksheet(self, title, [], len(self._ws))
+            return self._ws[title]
+
+    def values_batch_get(self, ranges):
+        out = []
+        for a in ranges:
+            title, _, rng = a.partition("!")
+            ws = self._ws[title.strip("'")]
+            with ws._lock: out.append({"range": a, "values": ws._values(rng) if rng else [list(r) for r in ws.rows]})
+        self.stats.hit("values_batch_get", [r for v in out for r in v["values"]])
+        return {"valueRanges": out}
+
+    # deleteDimension(행 삭제)과 findReplace(범위 안에서 값이 같을 때만 바꿈)를 요청 순서대로, 한 번에 처리한다
+    def batch_update(self, body):
+        self.stats.hit("spreadsheet.batch_update")
+        by_id = {ws.id: ws for ws in self._ws.values()}
+        replies = []
+        with self._lock:
+            for q in body["requests"]:
+                if "deleteDimension" in q:
+                    rg = q["deleteDimension"]["range"]; ws = by_id[rg["sheetId"]]
+                    with ws._lock: del ws.rows[rg["startIndex"]:rg["endIndex"]]
+                    replies.append({})
+                elif "findReplace" in q:
+                    fr = q["findReplace"]; g = fr["range"]; ws = by_id[g["sheetId"]]; n = 0
+                    with ws._lock:
+                        for r in range(g["startRowIndex"] + 1, g["endRowIndex"] + 1):
+                            for c in range(g["startColumnIndex"] + 1, g["endColumnIndex"] + 1):
+                                row = ws.rows[r - 1] if r <= len(ws.rows) else []
+                                if c <= len(row) and row[c - 1] == fr["find"]: ws._set(r, c, fr["replacement"]); n += 1
+                    replies.append({"findReplace": {"occurrencesChanged": n}})
+                else:
+                    replies.append({})
+        return {"replies": replies}
+
+    def sheet(self, title):
+        return self._ws[title]
@@ -0,0 +1,106 @@
+# --- 벤치마크용 가짜 시트 데이터 ---
+# Items / BOM / Logs / Orders (+ Inventory, _Meta)를 시트 모양(헤더 + 문자열 행)으로 만든다. 같은 seed면 같은 데이터.
+# 크기 N 하나로 정할 때(sheets): Logs N행, Orders N/5행, Items N/50행(최소 100), BOM은 제품마다 3~4줄.
+# 값은 작은 목록에서 골라 같은 문자열 객체를 같이 쓰게 해서, 100만 행이어도 메모리는 행 목록 크기 정도만 든다.
+import datetime
+
+import numpy as np
+
+ITEM_HEADERS = ['코드', '품목명', '규격', '타입', '색상', '구분']
+BOM_HEADERS = ['제품코드', '타입', '자재코드', '소요량']
+LOG_HEADERS = ['날짜', '시간', '공장', '구분', '코드', '품목명', '규격', '타입', '색상', '수량', '비고', '거래처', '라인', 'ID', '삭제']
+ORDER_HEADERS = ['주문번호', '날짜', '거래처', '코드', '품목명', '수량', '팔레트번호', '상태', '비고', 'LOT', '타입']
+INV_HEADERS = ['공장', '코드', '품목명', '규격', '타입', '색상', '현재고', 'Ver']
+FACTORIES = ['1공장', '2공장']
+LOG_TYPES = (['생산', '사용(Auto)', '입고', '출고', '재고실사'], [0.40, 0.35, 0.10, 0.12, 0.03])
+TYPES = ['원통', '큐빅', '펠렛', '파우더']
+COLORS = ['BLACK', 'WHITE', 'NATURAL', 'GRAY']
+LINES = ['1호기', '2호기', '3호기', '4호기']
+END_DATE = datetime.date(2026, 9, 30)
+ROWS_PER_DAY = 300
+
+
+def _pick(rng, pool, n, p=None):
+    idx = rng.choice(len(pool), size=n, p=p)
+    return [pool[i] for i in idx]
+
+
+def make_items(n, seed=1):
+    rng = np.random.default_rng(seed)
+    n_raw, n_semi = max(n * 3 // 10, 10), max(n // 10, 5)
+    rows = []
+    for i in range(n - n_raw - n_semi):
+        fam = ('KA', 'KG', 'CP')[i % 3]
+        rows.append([f"{fam}{i:05d}", f"{fam}-{i:05d}", f"{rng.integers(2, 9)}mm", TYPES[i % 4], COLORS[i % 4], '제품'])
+    for i in range(n_semi): rows.append([f"SB{i:05d}", f"KA-{i:05d}반", "-", TYPES[i % 4], "-", '반제품'])
+    for i in range(n_raw): rows.append([f"RM{i:05d}", f"원료-{i:05d}", "-", "-", "-", '원자재'])
+    return [ITEM_HEADERS] + rows
+
+
+def _codes(items, kind):
+    return [r for r in items[1:] if r[5] == kind]
+
+
+def make_bom(items, seed=2):
+    rng = np.random.default_rng(seed)
+    prods, semis, raws = _codes(items, '제품'), _codes(items, '반제품'), _codes(items, '원자재')
+    rows = []
+    for p in prods:
+        if semis and rng.random() < 0.3: rows.append([p[0], p[3], semis[rng.integers(len(semis))][0], f"{rng.uniform(0.1, 0.5):.3f}"])
+        for j in rng.choice(len(raws), size=3, replace=False): rows.append([p[0], p[3], raws[j][0], f"{rng.uniform(0.05, 0.6):.3f}"])
+    for s in semis:
+        for j in rng.choice(len(raws), size=3, replace=False): rows.append([s[0], s[3], raws[j][0], f"{rng.uniform(0.1, 0.5):.3f}"])
+    return [BOM_HEADERS] + rows
+
+
+def _days(n_rows):
+    n_days = max(n_rows // ROWS_PER_DAY, 30)
+    return [(END_DATE - datetime.timedelta(days=k)).strftime('%Y-%m-%d') for k in range(n_days)][::-1]
+
+
+def make_logs(items, n, seed=3):
+    rng = np.random.default_rng(seed)
+    days = _days(n)
+    day_idx = np.sort(rng.integers(0, len(days), size=n))
+    times = [f"{h:02d}:{m:02d}:{s:02d}" for h in range(7, 23) for m in range(60) for s in range(0, 60, 15)]
+    qtys = [f"{q}" for q in range(10, 3000, 10)]
+    kinds = _pick(rng, LOG_TYPES[0], n, LOG_TYPES[1])
+    prod, raw = _codes(items, '제품') + _codes(items, '반제품'), _codes(items, '원자재')
+    pi, ri = rng.integers(len(prod), size=n), rng.integers(len(raw), size=n)
+    fac, lines, t, q = _pick(rng, FACTORIES, n), _pick(rng, LINES, n), _pick(rng, times, n), _pick(rng, qtys, n)
+    ids = rng.integers(1 << 47, size=n)
+    rows = []
+    for i in range(n):
+        k = kinds[i]
+        it = raw[ri[i]] if k in ('입고', '사용(Auto)') else prod[pi[i]]
+        qty = "-" + q[i] if k in ('사용(Auto)', '출고') else q[i]
+        rows.append([days[day_idx[i]], t[i], fac[i], k, it[0], it[1], it[2], it[3], it[4], qty,
+                     "" if k != '출고' else "주문출고", "-" if k != '출고' else "CUST", lines[i], f"{ids[i]:012x}", ""])
+    return [LOG_HEADERS] + rows
+
+
+def make_orders(items, n, seed=4, pending=0.1):
+    rng = np.random.default_rng(seed)
+    days = _days(n * 5)
+    prods = _codes(items, '제품')
+    clients = [f"CUSTOMER {i:03d}" for i in range(120)]
+    rows = []; k = 0
+    while len(rows) < n:
+        oid = f"ORD-{k:07d}"; day = days[min(k * len(days) // max(n // 2, 1), len(days) - 1)]
+        cl = clients[rng.integers(len(clients))]; st = "준비" if rng.random() < pending else "완료"
+        for plt in range(1, int(rng.integers(1, 5)) + 1):
+            it = prods[rng.integers(len(prods))]
+            rows.append([oid, day, cl, it[0], it[1], f"{rng.choice([500, 800, 1000])}", str(plt), st, "BOX", "", it[3]])
+        k += 1
+    return [ORDER_HEADERS] + rows[:n]
+
+
+def make_inventory(items):
+    return [INV_HEADERS] + [[f, r[0], r[1], r[2], r[3], r[4], "1000", "v0"] for f in FACTORIES for r in items[1:]]
+
+
+def sheets(n, seed=0):
+    items = make_items(max(n // 50, 100), seed + 1)
+    return {'Items': items, 'BOM': make_bom(items, seed + 2), 'Logs': make_logs(items, n, seed + 3),
+            'Orders': make_orders(items, max(n // 5, 50), seed + 4), 'Inventory': make_inventory(items),
+            '_Meta': [['Sheet', 'Version', 'Updated']]}
@@ -0,0 +1,170 @@
+# --- BOM 전개 ---
+# BOM 시트를 불러올 때 한 번, (제품코드, 타입) × 자재코드 소요량 행렬을 만든다.
+#   direct: 한 단계 (BOM 시트 그대로, 같은 자재가 여러 줄이면 합친다)
+#   flat:   다단계 (자재가 다시 BOM을 가진 반제품이면 그 반제품의 자재로 끝까지 펼친다)
+# 생산 수량은 행렬 한 줄(여러 제품이면 수량 벡터 @ 행렬)로 자재별 소요량이 된다.
+# 하위 반제품의 타입은 품목(Items)의 타입 → 상위 제품의 타입 → 타입 없음 → 첫 번째 타입 순으로 고른다.
+# 순환(A → B → A)은 찾아서 cycles에 남기고, 순환을 만드는 연결은 끊어서(cut) 전개한다.
+# 생산 차감(explode_netted)은 반제품 재고를 먼저 쓰고 모자란 만큼만 그 하위 BOM으로 내려간다
+# (따로 생산해서 Logs에 잡힌 반제품의 원자재를 한 번 더 빼지 않는다).
+import numpy as np
+import pandas as pd
+
+EPS = 1e-12
+
+
+def _s(v):
+    return str(v).strip()
+
+
+class BomEngine:
+    # item_types: {코드: 타입} (Items 시트)
+    def __init__(self, df_bom, item_types=None):
+        self.item_types = dict(item_types or {})
+        lines = self._lines(df_bom)
+        self.parents = list(dict.fromkeys(zip(lines['제품코드'], lines['타입'])))
+        self._at = {p: i for i, p in enumerate(self.parents)}
+        self._types = {}
+        for c, t in self.parents: self._types.setdefault(c, []).append(t)
+        self.cycles = []
+        self.cut = set()     # 순환을 만들어 끊은 연결: {((제품코드, 타입), 자재코드)}
+        children = self._children(lines)
+        self.materials = sorted({c for ch in children.values() for c, _ in ch})
+        self._mat_at = {m: j for j, m in enumerate(self.materials)}
+        self.direct = np.zeros((len(self.parents), len(self.materials)))
+        for p, ch in children.items():
+            for c, q in ch: self.direct[self._at[p], self._mat_at[c]] += q
+        self.flat = self._flatten(children)
+        self._edges = self._edge_list()
+
+    @staticmethod
+    def _lines(df_bom):
+        cols = ['제품코드', '타입', '자재코드', '소요량']
+        if df_bom is None or df_bom.empty or not {'제품코드', '자재코드'} <= set(df_bom.columns): return pd.DataFrame(columns=cols)
+        d = pd.DataFrame({'제품코드': df_bom['제품코드'].astype(str).str.strip(),
+                          '타입': df_bom['타입'].astype(str).str.strip() if '타입' in df_bom.columns else "",
+                          '자재코드': df_bom['자재코드'].astype(str).str.strip(),
+                          '소요량': pd.to_numeric(df_bom.get('소요량', 0.0), errors='coerce').fillna(0.0)})
+        d = d[(d['제품코드'] != "") & (d['자재코드'] != "")]
+        return d.groupby(['제품코드', '타입', '자재코드'], sort=False, observed=True)['소요량'].sum().reset_index()
+
+    # 하위 반제품이 BOM을 가졌을 때 쓸 (코드, 타입). BOM이 없으면 None (그 자재에서 멈춤)
+    def variant(self, code, parent_type=""):
+        types = self._types.get(code)
+        if not types: return None
+        for t in (self.item_types.get(code), parent_type, ""):
+            if t is not None and t in types: return (code, t)
+        return (code, types[0])
+
+    def _children(self, lines):
+        ch = {p: [] for p in self.parents}
+        for p, c, q in zip(zip(lines['제품코드'], lines['타입']), lines['자재코드'], lines['소요량']):
+            ch[p].append((c, float(q)))
+        return ch
+
+    # 깊이 우선 탐색으로 하위부터 순서를 정하고(후위 순서), 탐색 중인 노드로 되돌아오는 연결은 순환으로 기록하고 끊는다
+    def _order(self, children):
+        state = {}; order = []; cut = set()
+        for root in self.parents:
+            if root in state: continue
+            stack = [(root, iter(children[root]))]; state[root] = 1; path = [root]
+            while stack:
+                node, it = stack[-1]
+                nxt = next(it, None)
+                if nxt is None:
+                    stack.pop(); path.pop(); state[node] = 2; order.append(node); continue
+                sub = self.variant(nxt[0], node[1])
+                if sub is None or state.get(sub) == 2: continue
+                if state.get(sub) == 1:
+                    self.cycles.append([c for c, _ in path[path.index(sub):]] + [sub[0]]); cut.add((node, nxt[0])); continue
+                state[sub] = 1; path.append(sub); stack.append((sub, iter(children[sub])))
+        return order, cut
+
+    def _flatten(self, children):
+        order, self.cut = self._order(children)
+        flat = np.zeros_like(self.direct)
+        for node in order:   # 하위가 먼저 계산된다
+            row = flat[self._at[node]]
+            for c, q in children[node]:
+                sub = None if (node, c) in self.cut else self.variant(c, node[1])
+                if sub is None: row[self._mat_at[c]] += q
+                else: row += q * flat[self._at[sub]]
+        return flat
+
+    # 한 단계 연결 목록: (상위 행, 자재 열, 소요량, 하위 BOM 행). 하위 BOM은 flat과 같이 상위 타입으로 고르고
+    # BOM이 없는 원자재는 -1. 순환을 만들어 끊은 연결은 빼서 _cut_edges (상위 행, 자재 열, 소요량)에 따로 둔다.
+    def _edge_list(self):
+        p, m = np.nonzero(self.direct)
+        keep = np.array([(self.parents[i], self.materials[j]) not in self.cut for i, j in zip(p, m)], dtype=bool)
+        self._cut_edges = (p[~keep], m[~keep], self.direct[p[~keep], m[~keep]])
+        p, m = p[keep], m[keep]
+        subs = [self.variant(self.materials[j], self.parents[i][1]) for i, j in zip(p, m)]
+        return p, m, self.direct[p, m], np.array([-1 if s is None else self._at[s] for s in subs], dtype=int)
+
+    def edges(self):
+        return self._edges
+
+    # 자재마다 BOM을 가진 반제품인지
+    def has_bom(self):
+        return np.array([m in self._types for m in self.materials], dtype=bool)
+
+    # (제품코드, 타입)의 행 번호. 그 코드의 BOM이 타입 구분 없이(빈 타입) 적혀 있으면 어떤 타입이든 그 행.
+    def row_of(self, code, type_=""):
+        code, type_ = _s(code), _s(type_)
+        at = self._at.get((code, type_))
+        if at is None and self._types.get(code) == [""]: at = self._at[(code, "")]
+        return at
+
+    # 제품 하나: [(자재코드, 소요량), ...] (소요량 0인 자재는 뺀다)
+    def explode(self, code, type_, qty, multi=True):
+        at = self.row_of(code, type_)
+        if at is None: return []
+        row = (self.flat if multi else self.direct)[at] * float(qty)
+        nz = np.flatnonzero(np.abs(row) > EPS)
+        return [(self.materials[j], float(row[j])) for j in nz]
+
+    # 생산 차감용: stock = {자재코드: 현재고}. 단계마다 반제품 소요를 재고로 먼저 채우고(반제품 자체를 차감),
+    # 모자란 만큼만 연결별로 나눠 상위 타입으로 고른 하위 BOM으로 내려간다 (mrp.py와 같은 방식).
+    # 원자재와 끊은 연결(flat처럼 그 자재 자체)은 그대로 차감. 재고가 없으면 explode(multi=True)와 같다. 0 이하(정정) 수량은 재고 상쇄 없이 전개.
+    def explode_netted(self, code, type_, qty, stock):
+        qty = float(qty)
+        at = self.row_of(code, type_)
+        if at is None: return []
+        if qty <= 0: return self.explode(code, type_, qty)
+        P, M = len(self.parents), len(self.materials)
+        ep, em, eq, esub = self._edges
+        cp, cm, cq = self._cut_edges
+        down = esub >= 0
+        avail = np.array([max(float(stock.get(m, 0.0) or 0.0), 0.0) for m in self.materials]) * self.has_bom()
+        use = np.zeros(M)
+        vec = np.zeros(P); vec[at] = qty
+        for _ in range(P + 1):
+            if vec.sum() <= EPS: break
+            use += np.bincount(cm, vec[cp] * cq, minlength=M)
+            req_e = vec[ep] * eq
+            req = np.bincount(em, req_e, minlength=M)
+            take = np.minimum(req, avail)
+            avail -= take; use += take
+            ratio = np.divide(req - take, req, out=np.zeros(M), where=req > EPS)
+            short_e = req_e * ratio[em]
+            use += np.bincount(em[~down], short_e[~down], minlength=M)
+            vec = np.bincount(esub[down], short_e[down], minlength=P)
+        nz = np.flatnonzero(np.abs(use) > EPS)
+        return [(self.materials[j], float(use[j])) for j in nz]
+
+    # 여러 제품: demand = 코드/타입/수량 열을 가진 표 → 자재코드별 소요량 Series (수량 벡터 @ 행렬 한 번)
+    def explode_many(self, demand, multi=True, code='코드', type_='타입', qty='수량'):
+        if demand.empty or not self.parents: return pd.Series(dtype=float, index=pd.Index([], name='자재코드'))
+        types = demand[type_].astype(str).str.strip() if type_ in demand.columns else pd.Series("", index=demand.index)
+        rows = [self.row_of(c, t) for c, t in zip(demand[code].astype(str).str.strip(), types)]
+        m = np.array([r is not None for r in rows], dtype=bool)
+        vec = np.zeros(len(self.parents))
+        np.add.at(vec, np.array([r for r in rows if r is not None], dtype=int), pd.to_numeric(demand[qty], errors='coerce').fillna(0.0).to_numpy()[m])
+        out = pd.Series(vec @ (self.flat if multi else self.direct), index=pd.Index(self.materials, name='자재코드'))
+        return out[out.abs() > EPS]
+
+    # 화면용: 제품별 다단계 소요량 표 (제품코드, 타입, 자재코드, 소요량)
+    def flat_table(self):
+        r, c = np.nonzero(np.abs(self.flat) > EPS)
+        return pd.DataFrame({'제품코드': [self.parents[i][0] for i in r], '타입': [self.parents[i][1] for i in r],
+                             '자재코드': [self.materials[j] for j in c], '소요량': self.flat[r, c]})
@@ -0,0 +1,62 @@
+# --- 품목 분류 (제품군 / 그룹 / 형상) ---
+# 품목(Items)을 불러올 때 한 번만 문자열 연산으로 계산하고, Logs/Orders에는 코드로 붙인다.
+# (화면마다 행 단위 apply로 다시 계산하지 않도록)
+import numpy as np
+import pandas as pd
+
+SHAPES = [("원통", "CYLINDRIC"), ("큐빅", "CUBICAL"), ("펠렛", "PELLET"), ("파우더", "POWDER")]
+
+
+def _col(df, name):
+    if name in df.columns: return df[name].astype(str).str.strip()
+    return pd.Series("", index=df.index, dtype=object)
+
+
+# 대시보드 제품군: Compound / KA반제품 / KA / KG / 반제품(기타) / 기타
+def product_category(df):
+    name = _col(df, '품목명').str.upper(); code = _col(df, '코드').str.upper(); gubun = _col(df, '구분')
+    is_ban = (gubun == '반제품') | name.str.endswith('반')
+    has_ka = name.str.contains('KA', regex=False) | code.str.contains('KA', regex=False)
+    has_kg = name.str.contains('KG', regex=False) | code.str.contains('KG', regex=False)
+    is_cp = name.str.contains('CP', regex=False) | name.str.contains('COMPOUND', regex=False) | code.str.contains('CP', regex=False)
+    conds = [is_cp, has_ka & (is_ban | name.str.contains('반', regex=False)), has_ka, has_kg, is_ban]
+    return pd.Series(np.select(conds, ["Compound", "KA반제품", "KA", "KG", "반제품(기타)"], "기타"), index=df.index)
+
+
+# 작업 입력 사이드바의 1단계 그룹: 반제품 / COMPOUND / KG / KA / 기타
+def item_group(df):
+    name = _col(df, '품목명').str.upper(); gubun = _col(df, '구분')
+    conds = [(gubun == '반제품') | name.str.endswith('반'),
+             name.str.contains('CP', regex=False) | name.str.contains('COMPOUND', regex=False),
+             name.str.contains('KG', regex=False), name.str.contains('KA', regex=False)]
+    return pd.Series(np.select(conds, ["반제품", "COMPOUND", "KG", "KA"], "기타"), index=df.index)
+
+
+# 명세서 SHAPE: 타입에 원통/큐빅/펠렛/파우더가 들어 있으면 영문, 아니면 타입 그대로
+def item_shape(df):
+    typ = df['타입'].astype(str) if '타입' in df.columns else pd.Series("-", index=df.index, dtype=object)
+    conds = [typ.str.contains(k, regex=False) for k, _ in SHAPES]
+    return pd.Series(np.select(conds, [v for _, v in SHAPES], typ), index=df.index)
+
+
+def enrich_items(df_items):
+    if df_items.empty or '코드' not in df_items.columns: return df_items
+    df = df_items.copy()
+    df['Category'] = product_category(df); df['Group'] = item_group(df); df['Shape'] = item_shape(df)
+    return df
+
+
+# Logs/Orders에 코드 기준으로 분류 열을 붙인다. 품목 목록에 없는 코드는
+# 제품군은 그 행의 품목명/코드로 계산하고(로그의 구분은 품목 구분이 아니므로 제외), 형상은 "-".
+def attach(df, df_items):
+    if df.empty or '코드' not in df.columns: return df
+    df = df.copy()
+    code = df['코드'].astype(str).str.strip()
+    if 'Category' in df_items.columns:
+        lookup = df_items.assign(코드=df_items['코드'].astype(str).str.strip()).drop_duplicates('코드').set_index('코드')
+        cat = code.map(lookup['Category']); shape = code.map(lookup['Shape'])
+    else:
+        cat = pd.Series(np.nan, index=df.index, dtype=object); shape = cat.copy()
+    if cat.isna().any(): cat = cat.fillna(product_category(df.drop(columns=['구분'], errors='ignore')))
+    df['Category'] = cat; df['Shape'] = shape.fillna("-")
+    return df
@@ -0,0 +1,79 @@
+# --- 표 내보내기 (XLSX / CSV) ---
+# 필터된 표를 통째로 복사하지 않고 CHUNK 행씩 변환해서 io.BytesIO에 쓴다.
+# XLSX는 XlsxWriter constant_memory 모드(행을 쓰는 즉시 임시 파일로 내보냄)라 행 수가 늘어도 메모리가 거의 늘지 않는다.
+# 구분별 건수/수량 합계를 함께 넣는다 (XLSX는 별도 시트, CSV는 표 아래).
+import io
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+CHUNK = 20_000
+DROP_COLS = ['날짜_dt', '삭제']
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIME = "text/csv"
+
+
+def _cols(df):
+    return [c for c in df.columns if c not in DROP_COLS]
+
+
+def _chunks(df, cols):
+    for s in range(0, len(df), CHUNK):
+        part = df.iloc[s:s + CHUNK][cols]
+        vals = part.astype(object).where(part.notna(), None).to_numpy()
+        yield vals
+
+
+def totals(df, by='구분', qty='수량'):
+    if df.empty or by not in df.columns or qty not in df.columns: return pd.DataFrame(columns=[by, '건수', qty])
+    g = df.groupby(df[by].astype(str), observed=True)[qty]
+    out = pd.DataFrame({'건수': g.size(), qty: g.sum()}).reset_index()
+    return out.sort_values(qty, ascending=False, key=lambda s: s.abs())
+
+
+def to_xlsx(df, sheet="Logs", by='구분', qty='수량'):
+    buf = io.BytesIO()
+    wb = xlsxwriter.Workbook(buf, {'constant_memory': True, 'strings_to_numbers': False, 'nan_inf_to_errors': True})
+    head = wb.add_format({'bold': True, 'bg_color': '#EEEEEE', 'border': 1})
+    num = wb.add_format({'num_format': '#,##0.##'})
+    total_num = wb.add_format({'num_format': '#,##0', 'bold': True, 'top': 1})
+    total_txt = wb.add_format({'bold': True, 'top': 1})
+    cols = _cols(df)
+    ws = wb.add_worksheet(sheet[:31])
+    ws.write_row(0, 0, [str(c) for c in cols], head)
+    ws.freeze_panes(1, 0)
+    q_at = cols.index(qty) if qty in cols else -1
+    if q_at >= 0: ws.set_column(q_at, q_at, 12, num)
+    r = 1
+    for vals in _chunks(df, cols):
+        for row in vals:
+            ws.write_row(r, 0, [v if not isinstance(v, (np.generic,)) else v.item() for v in row]); r += 1
+    t = totals(df, by, qty)
+    if not t.empty:
+        ts = wb.add_worksheet(f"{by}별 합계"[:31])
+        ts.write_row(0, 0, [by, '건수', qty], head)
+        ts.set_column(0, 0, 14); ts.set_column(1, 2, 14, num)
+        for i, (k, n, s) in enumerate(t.itertuples(index=False), start=1): ts.write_row(i, 0, [k, int(n), float(s)])
+        ts.write(len(t) + 1, 0, "합계", total_txt)
+        ts.write(len(t) + 1, 1, int(t['건수'].sum()), total_num)
+        ts.write(len(t) + 1, 2, float(t[qty].sum()), total_num)
+    wb.close()
+    return buf.getvalue()
+
+
+# 엑셀에서 한글이 깨지지 않도록 UTF-8 BOM
+def to_csv(df, by='구분', qty='수량'):
+    buf = io.BytesIO()
+    text = io.TextIOWrapper(buf, encoding='utf-8-sig', newline='')
+    cols = _cols(df)
+    for s in range(0, max(len(df), 1), CHUNK):
+        df.iloc[s:s + CHUNK][cols].to_csv(text, index=False, header=(s == 0), lineterminator="\r\n")
+    t = totals(df, by, qty)
+    if not t.empty:
+        text.write("\r\n")
+        t.assign(**{qty: t[qty].round(2)}).to_csv(text, index=False, lineterminator="\r\n")
+        text.write(f"합계,{int(t['건수'].sum())},{t[qty].sum():.2f}\r\n")
+    text.flush()
+    data = buf.getvalue(); text.detach()
+    return data
@@ -0,0 +1,110 @@
+# --- st.data_editor 표 ↔ 시트 차이 저장 ---
+# 편집 전/후 표를 고정 키 열(ID, Code, 날짜 등)로 맞춰 보고, 추가/변경/삭제된 행만 WriteBuffer에 담는다.
+# 저장 비용이 시트 크기가 아니라 고친 칸 수에 비례하도록.
+import threading
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+
+def _k(v):
+    return str(v).strip()
+
+
+# 편집기에서 나온 numpy 값/빈 칸(NaN, None)을 시트에 쓸 수 있는 값으로
+def _plain(v):
+    if v is None or (isinstance(v, float) and pd.isna(v)) or v is pd.NA: return ""
+    return v.item() if hasattr(v, 'item') else v
+
+
+def _same(a, b):
+    a, b = _plain(a), _plain(b)
+    try: return float(a) == float(b)
+    except (TypeError, ValueError): return _k(a) == _k(b)
+
+
+# 키 → (추가 행 dict 목록, {키: {열: 새 값}}, 삭제 키 목록). 키가 비어 있는 편집 행은 무시한다.
+def diff_frames(original, edited, key, cols, delete_missing=True):
+    old = {_k(r[key]): r for r in original.to_dict('records') if _k(r.get(key, ""))}
+    new = {_k(r[key]): r for r in edited.to_dict('records') if _k(r.get(key, ""))}
+    inserts = [r for k, r in new.items() if k not in old]
+    changes = {}
+    for k, r in new.items():
+        if k not in old: continue
+        d = {c: r[c] for c in cols if c in r and not _same(r[c], old[k].get(c, ""))}
+        if d: changes[k] = d
+    deletes = [k for k in old if k not in new] if delete_missing else []
+    return inserts, changes, deletes
+
+
+class KeyedSheet:
+    def __init__(self, ws, key, settle=None):
+        self.ws = ws
+        self._settle = settle
+        self.key = key
+        self._rows = None    # 키 -> 행 번호
+        self._header = None
+        self._lock = threading.Lock()
+
+    def _rebuild(self):
+        self._header = [str(h).strip() for h in self.ws.row_values(1)]
+        c = self._col_letter()
+        rows = {}
+        for i, r in enumerate(self.ws.get(f"{c}2:{c}")):
+            if r and _k(r[0]): rows.setdefault(_k(r[0]), i + 2)
+        self._rows = rows
+
+    def _col_letter(self):
+        return rowcol_to_a1(1, self._header.index(self.key) + 1)[:-1]
+
+    # 저널(journal.py)에 이 시트로 보낼 행 추가가 남아 있으면 끝날 때까지 기다렸다가 다시 색인한다
+    def _settle_rows(self):
+        if self._settle and self._settle(self.ws.title): self._rows = None
+
+    def invalidate(self):
+        with self._lock: self._rows = None
+
+    # 찾은 행의 키 칸을 한 번에 읽어 아직 같은 행인지 확인한다. 어긋나면 다시 색인.
+    def _locate(self, keys):
+        self._settle_rows()
+        if self._rows is None: self._rebuild()
+        found = {k: self._rows[k] for k in keys if k in self._rows}
+        if found:
+            c = self._col_letter()
+            got = self.ws.batch_get([f"{c}{r}" for r in found.values()])
+            if all(vr and vr[0] and _k(vr[0][0]) == k for k, vr in zip(found, got)): return found
+            self._rebuild(); found = {k: self._rows[k] for k in keys if k in self._rows}
+        return found
+
+    # 키로 행을 찾아 주어진 칸만 바꾼다: changes = {키: {열: 값}}. 찾은 행 수를 돌려준다.
+    def set_cells(self, wb, changes):
+        with self._lock:
+            found = self._locate([_k(k) for k in changes])
+            missing = {c for d in changes.values() for c in d if c not in self._header}
+            if missing: raise KeyError(f"시트에 {sorted(missing)} 열이 없습니다.")
+            for k, d in changes.items():
+                if _k(k) not in found: continue
+                for c, v in d.items(): wb.update_cell(self.ws, found[_k(k)], self._header.index(c) + 1, _plain(v))
+        return len(found)
+
+    # 편집 결과를 시트에 반영: 바뀐 칸은 셀 수정, 새 키는 행 추가, 사라진 키는 행 삭제 (WriteBuffer 한 번에)
+    # 시트에 이미 있는 키로 "추가"된 행은 그 행을 고친다. 반영한 (추가, 변경, 삭제) 건수를 돌려준다.
+    def stage(self, wb, original, edited, delete_missing=True):
+        with self._lock:
+            self._settle_rows()
+            if self._rows is None: self._rebuild()
+            cols = [h for h in self._header if h and h in edited.columns]
+            inserts, changes, deletes = diff_frames(original, edited, self.key, cols, delete_missing)
+            found = self._locate(list(changes) + deletes + [_k(r[self.key]) for r in inserts])
+            for r in inserts:
+                k = _k(r[self.key])
+                if k in found: changes[k] = {c: r[c] for c in cols}
+                else: wb.append(self.ws, [_plain(r.get(h, "")) if h else "" for h in self._header])
+            inserts = [r for r in inserts if _k(r[self.key]) not in found]
+            for k, d in changes.items():
+                if k not in found: continue  # 그사이 다른 곳에서 지워진 행
+                for c, v in d.items(): wb.update_cell(self.ws, found[k], self._header.index(c) + 1, _plain(v))
+            del_rows = [found[k] for k in deletes if k in found]
+            if del_rows: wb.delete_rows(self.ws, del_rows)
+            if inserts or del_rows: self._rows = None
+        return len(inserts), len(changes), len(del_rows)
@@ -0,0 +1,337 @@
+# --- 재고 계산 ---
+# 현재고는 Logs 원장(입고/생산/사용(Auto)/출고/재고실사)을 (공장, 코드)별로 합산해서 구한다.
+# 주기적으로 스냅샷을 SQLite에 남겨 두고, 스냅샷 이후에 쌓인 로그만 더한다.
+# 스냅샷은 (복제본 세대, 행 수, 그 행 수의 마지막 행 서명)으로 확인한다 (replica._store_tail의 기준 행 확인과 같은 방식).
+# 세대(replica_gen)는 전체 동기화에서 기존 행이 바뀌거나 지워졌을 때만 올라가므로, 앞부분을 다시 훑지 않아도 된다.
+# Inventory 시트는 저장 동작에서 바로 고치지 않는 사본이다. Logs 행이 시트에 들어간 뒤(저널 스레드) 그 증감만 더하고(apply_logs),
+# 어긋났으면 재고 현황 탭에서 계산값을 한 번에 반영한다(sync).
+# Inventory 시트를 고칠 때는 (공장, 코드)별 잠금 + 대기열로 프로세스 안의 쓰기를 한 줄로 세우고,
+# 'Ver' 열을 compare-and-swap(findReplace: 읽은 버전 그대로일 때만 잠금 표시로 바뀜)으로 잡아서
+# 다른 서버 프로세스와 같은 행을 동시에 덮어쓰지 않게 한다.
+# 시트에 없는 키의 새 행은 메타 시트 임대(versions.MetaLease)를 잡은 프로세스만, 다시 읽어서 아직 없는 키만 만든다 (같은 키 행이 둘 생기지 않게).
+import contextlib
+import hashlib
+import json
+import sqlite3
+import random
+import threading
+import time
+import uuid
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from versions import MetaLease
+
+FAC_COL, CODE_COL, QTY_COL = 1, 2, 7
+VER_HEADER = 'Ver'
+LOCK_TTL = 30      # 초: 이보다 오래된 잠금 표시는 쓰다 죽은 프로세스가 남긴 것으로 보고 가져온다
+CAS_TRIES = 10
+SLOT_LEASE = 'Inventory:slots'   # 메타 시트에서 새 행 만들기 임대 칸이 있는 줄
+SLOT_LEASE_TTL = 60
+
+LEDGER_TYPES = ['입고', '생산', '사용(Auto)', '출고', '재고실사']
+OUTGOING_TYPES = ['사용(Auto)', '출고']  # 부호와 상관없이 차감
+SNAPSHOT_EVERY = 2000  # 마지막 스냅샷 이후 이만큼 로그가 쌓이면 새 스냅샷
+SNAPSHOT_KEEP = 5
+_SIG_COLS = ['ID', '날짜', '시간', '공장', '구분', '코드', '수량']
+
+
+def _key(factory, code):
+    return (str(factory).strip(), str(code).strip())
+
+
+def _num(v):
+    try: return float(str(v).replace(",", ""))
+    except (TypeError, ValueError): return 0.0
+
+
+def fold_stock(df_logs):
+    if df_logs.empty or not {'구분', '공장', '코드', '수량'} <= set(df_logs.columns):
+        return pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], []], names=['공장', '코드']))
+    d = df_logs[df_logs['구분'].isin(LEDGER_TYPES)]
+    q = pd.to_numeric(d['수량'], errors='coerce').fillna(0.0)
+    q = q.where(~d['구분'].isin(OUTGOING_TYPES), -q.abs())
+    keys = [d['공장'].astype(str).str.strip().rename('공장'), d['코드'].astype(str).str.strip().rename('코드')]
+    return q.groupby(keys).sum()
+
+
+def _row_sig(row):
+    vals = [str(row.get(c, "")) for c in _SIG_COLS]
+    return hashlib.sha1(json.dumps(vals, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# 로그 앞부분(n행)을 접어 둔 결과를 다시 써도 되는지 판단하기 위한 표시: (복제본 세대, 행 수, 마지막 행 서명)
+# 세대를 모르는 표(복제본을 거치지 않음)는 앞부분을 믿을 수 없으므로 다시 쓰지 않는다.
+def log_marker(df_logs):
+    n = len(df_logs)
+    return (df_logs.attrs.get('replica_gen'), n, _row_sig(df_logs.iloc[n - 1]) if n else "")
+
+
+def log_prefix_matches(df_logs, marker):
+    gen, n, sig = marker
+    if n == 0: return True
+    if gen is None or df_logs.attrs.get('replica_gen') != gen: return False
+    return n <= len(df_logs) and _row_sig(df_logs.iloc[n - 1]) == sig
+
+
+class StockLedger:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._db() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS stock_snapshots (id INTEGER PRIMARY KEY AUTOINCREMENT, n_rows INTEGER, "
+                        "tail_sig TEXT, gen INTEGER, taken_at REAL, data TEXT)")
+            if 'gen' not in [c[1] for c in con.execute("PRAGMA table_info(stock_snapshots)")]:
+                con.execute("ALTER TABLE stock_snapshots ADD COLUMN gen INTEGER")   # 예전 스냅샷은 세대가 없어서 다시 쓰지 않는다
+
+    @contextlib.contextmanager
+    def _db(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con: yield con
+        finally:
+            con.close()
+
+    # 같은 세대에서 찍었고 그 행 수의 마지막 행이 그대로인 가장 최근 스냅샷
+    def _base(self, df_logs):
+        gen = df_logs.attrs.get('replica_gen')
+        if gen is None: return 0, None
+        with self._db() as con:
+            snaps = con.execute("SELECT n_rows, tail_sig, data FROM stock_snapshots WHERE gen=? ORDER BY id DESC", (gen,)).fetchall()
+        for n, sig, data in snaps:
+            if n == 0 or not log_prefix_matches(df_logs, (gen, n, sig)): continue
+            rows = json.loads(data)
+            idx = pd.MultiIndex.from_tuples([(f, c) for f, c, _ in rows], names=['공장', '코드'])
+            return n, pd.Series([q for _, _, q in rows], index=idx, dtype=float)
+        return 0, None
+
+    def _snapshot(self, df_logs, stock):
+        gen, n, sig = log_marker(df_logs)
+        if gen is None: return
+        data = json.dumps([[f, c, float(q)] for (f, c), q in stock.items()], ensure_ascii=False)
+        with self._db() as con:
+            con.execute("INSERT INTO stock_snapshots (n_rows, tail_sig, gen, taken_at, data) VALUES (?, ?, ?, ?, ?)",
+                        (n, sig, gen, time.time(), data))
+            con.execute("DELETE FROM stock_snapshots WHERE id NOT IN (SELECT id FROM stock_snapshots ORDER BY id DESC LIMIT ?)", (SNAPSHOT_KEEP,))
+
+    # (공장, 코드, 현재고) 표
+    def stock(self, df_logs):
+        with self._lock:
+            n, base = self._base(df_logs) if not df_logs.empty else (0, None)
+            tail = fold_stock(df_logs.iloc[n:])
+            cur = tail if base is None else base.add(tail, fill_value=0.0)
+            if len(df_logs) - n >= SNAPSHOT_EVERY: self._snapshot(df_logs, cur)
+        return cur.rename('현재고').reset_index()
+
+
+class CasError(RuntimeError):
+    pass
+
+
+def _col(n):
+    return rowcol_to_a1(1, n)[:-1]
+
+
+# 'v12' → (12, None), 잠금 표시 'L13:토큰:시각' → (13, 시각), 빈칸 → (0, None)
+def _parse_ver(v):
+    v = str(v).strip()
+    if v.startswith("L"):
+        parts = v[1:].split(":")
+        try: return int(parts[0]), float(parts[2])
+        except (IndexError, ValueError): return 0, 0.0
+    try: return int(v[1:]) if v.startswith("v") else int(float(v or 0)), None
+    except ValueError: return 0, None
+
+
+class InventoryIndex:
+    def __init__(self, ws, settle=None, meta_ws=None):
+        self.ws = ws
+        self._settle = settle
+        self.lease = MetaLease(meta_ws, SLOT_LEASE, SLOT_LEASE_TTL) if meta_ws is not None else None   # 없으면 임대 없이 (서버 프로세스가 하나일 때)
+        self.last_error = ""               # apply_logs의 마지막 오류 (성공하면 비움)
+        self._rows = None
+        self.ver_col = None
+        self._lock = threading.Lock()      # 색인
+        self._qlock = threading.Lock()     # 대기열
+        self._key_locks = {}               # (공장, 코드) -> Lock
+        self._queues = {}                  # (공장, 코드) -> [대기 중인 변경, ...]
+        self.token = uuid.uuid4().hex[:8]  # 이 프로세스의 잠금 표시
+
+    # 색인을 만들면서 'Ver' 열이 없으면 만들고, 버전이 빈 행은 v0으로 한 번에 채운다
+    def _rebuild(self):
+        head = [str(h).strip() for h in self.ws.row_values(1)]
+        if VER_HEADER not in head:
+            at = max(len(head), QTY_COL) + 1
+            if self.ws.col_count < at: self.ws.add_cols(at - self.ws.col_count)
+            self.ws.update([[VER_HEADER]], f"{_col(at)}1")
+            head = head + [""] * (at - 1 - len(head)) + [VER_HEADER]
+        self.ver_col = head.index(VER_HEADER) + 1
+        body = self.ws.get(f"A2:{_col(self.ver_col)}")
+        rows = {}; blank = False
+        for i, r in enumerate(body):
+            if len(r) >= CODE_COL and str(r[CODE_COL - 1]).strip():
+                rows.setdefault(_key(r[FAC_COL - 1], r[CODE_COL - 1]), i + 2)
+                blank |= len(r) < self.ver_col or not str(r[self.ver_col - 1]).strip()
+        if blank:
+            c = _col(self.ver_col)
+            vals = [[(r[self.ver_col - 1] if len(r) >= self.ver_col and str(r[self.ver_col - 1]).strip() else "v0")] for r in body]
+            self.ws.update(vals, f"{c}2:{c}{len(body) + 1}")
+        self._rows = rows
+
+    # 저널(journal.py)에 이 시트로 보낼 행 추가가 남아 있으면 끝날 때까지 기다렸다가 다시 색인한다
+    def _settle_rows(self):
+        if self._settle and self._settle(self.ws.title): self._rows = None
+
+    def invalidate(self):
+        with self._lock: self._rows = None
+
+    # 색인이 가리키는 행을 한 번에 읽어 (공장, 코드)가 맞는지 확인하고 (현재고, 버전)을 돌려준다.
+    # 누가 시트에서 행을 지우거나 끼워 넣어 어긋났으면 None
+    def _read(self, keys):
+        found = {k: self._rows[k] for k in keys if k in self._rows}
+        if not found: return found, {}
+        ranges = [f"A{r}:{_col(self.ver_col)}{r}" for r in found.values()]
+        base = {}
+        for (k, r), vr in zip(found.items(), self.ws.batch_get(ranges)):
+            row = list(vr[0] if vr else []) + [""] * self.ver_col
+            if _key(row[FAC_COL - 1], row[CODE_COL - 1]) != k: return None
+            base[k] = (_num(row[QTY_COL - 1]), str(row[self.ver_col - 1]).strip())
+        return found, base
+
+    @contextlib.contextmanager
+    def _slot_lease(self):
+        if self.lease is None:
+            yield True; return
+        with self.lease.hold() as got: yield got
+
+    # 시트에 없는 (공장, 코드)는 현재고 0, 버전 v0인 빈 행을 먼저 만든다.
+    # 임대를 잡은 뒤 키 열을 다시 읽어 아직 없는 키만 추가한다. 다른 프로세스가 만드는 중이면 False (잠시 뒤 다시).
+    def _add_slots(self, keys, info):
+        with self._slot_lease() as got:
+            if not got: return False
+            have = {_key(r[FAC_COL - 1], r[CODE_COL - 1]) for r in self.ws.get(f"A2:{_col(CODE_COL)}") if len(r) >= CODE_COL}
+            rows = []
+            for k in keys:
+                if k in have: continue
+                item = (list(info.get(k, ())) + ["-"] * 4)[:4]
+                rows.append([k[0], k[1]] + item + [0] + [""] * (self.ver_col - QTY_COL - 1) + ["v0"])
+            if rows: self.ws.append_rows(rows)
+        self._rows = None
+        return True
+
+    # 행마다: 읽은 버전 → 잠금 표시로 findReplace(바뀐 경우만 내 것) → 새 값 + 다음 버전을 한 번에 쓴다.
+    # 요청은 단계마다 모든 행을 묶어서 보낸다 (읽기 1 + findReplace 1 + 쓰기 1). 잡지 못한 행은 잠시 뒤 다시.
+    def _cas(self, ops, info):
+        todo = dict(ops); out = {}
+        for attempt in range(CAS_TRIES):
+            with self._lock:
+                self._settle_rows()
+                if self._rows is None: self._rebuild()
+                missing = [k for k in todo if k not in self._rows]
+                if missing and self._add_slots(missing, info): self._rebuild()
+                ready = [k for k in todo if k in self._rows]   # 새 행을 아직 못 만든 키는 다음 차례에
+                got = self._read(ready)
+                if got is None: self._rebuild(); got = self._read(ready)
+                if got is None: raise CasError("재고 시트 행 위치를 확인할 수 없습니다. 새로고침 후 다시 시도하세요.")
+                found, base = got
+                ver_col = self.ver_col
+            now = time.time(); claims = []
+            for k, fn in todo.items():
+                if k not in base: continue
+                q, v = base[k]
+                n, locked_at = _parse_ver(v)
+                if locked_at is not None and now - locked_at < LOCK_TTL: continue   # 다른 쪽이 쓰는 중
+                new = float(fn(q))
+                if locked_at is None and abs(new - q) <= 1e-9: out[k] = q; continue
+                claims.append((k, found[k], v, f"L{n + 1}:{self.token}:{now:.0f}", n + 1, new))
+            for k in out: todo.pop(k, None)
+            if claims:
+                reply = self.ws.spreadsheet.batch_update({"requests": [{"findReplace": {
+                    "find": v, "replacement": mark, "matchCase": True, "matchEntireCell": True,
+                    "range": {"sheetId": self.ws.id, "startRowIndex": r - 1, "endRowIndex": r, "startColumnIndex": ver_col - 1, "endColumnIndex": ver_col}}}
+                    for _, r, v, mark, _, _ in claims]})
+                won = [c for c, rep in zip(claims, reply.get("replies", [])) if (rep.get("findReplace") or {}).get("occurrencesChanged", 0) == 1]
+                if won:
+                    cells = []
+                    for _, r, _, _, n, new in won:
+                        cells += [{"range": f"{_col(QTY_COL)}{r}", "values": [[new]]}, {"range": f"{_col(ver_col)}{r}", "values": [[f"v{n}"]]}]
+                    self.ws.batch_update(cells)
+                    for k, _, _, _, _, new in won: out[k] = new; todo.pop(k)
+            if not todo: return out
+            time.sleep(min(0.05 * 2 ** attempt, 2.0) * random.uniform(0.5, 1.5))
+        raise CasError(f"재고 행을 잡지 못했습니다 (다른 곳에서 쓰는 중): {sorted(todo)}")
+
+    # 변경을 키별 대기열에 넣고, 키 잠금을 잡은 스레드가 그때까지 쌓인 변경을 모아 한 번에 반영한다.
+    # ops = {(공장, 코드): 이전 값 -> 새 값}. 반영된 최종 값을 돌려준다.
+    def _submit(self, ops, info=None):
+        info = {_key(*k): v for k, v in (info or {}).items()}
+        items = {}
+        with self._qlock:
+            for k, fn in ops.items():
+                k = _key(*k)
+                it = {'fn': fn, 'done': threading.Event(), 'val': None, 'err': None}
+                self._queues.setdefault(k, []).append(it); items[k] = it
+                self._key_locks.setdefault(k, threading.Lock())
+        keys = sorted(items)
+        for k in keys: self._key_locks[k].acquire()
+        try:
+            with self._qlock: batches = {k: self._queues.pop(k) for k in keys if self._queues.get(k)}
+            if batches:
+                def chain(b):
+                    def run(q):
+                        for it in b: q = it['fn'](q)
+                        return q
+                    return run
+                try:
+                    res = self._cas({k: chain(b) for k, b in batches.items()}, info)
+                    for k, b in batches.items():
+                        for it in b: it['val'] = res[k]
+                except Exception as e:
+                    for b in batches.values():
+                        for it in b: it['err'] = e
+                for b in batches.values():
+                    for it in b: it['done'].set()
+        finally:
+            for k in reversed(keys): self._key_locks[k].release()
+        out = {}
+        for k, it in items.items():
+            it['done'].wait()
+            if it['err'] is not None: raise it['err']
+            out[k] = it['val']
+        return out
+
+    # 재고를 더하고 뺀다: deltas = {(공장, 코드): 증감}, info = {(공장, 코드): (품목명, 규격, 타입, 색상)} (새 행용)
+    def increment(self, deltas, info=None):
+        return self._submit({k: (lambda q, d=float(d): q + d) for k, d in deltas.items()}, info)
+
+    # 시트에 들어간 Logs 행(head: Logs 헤더)만큼 재고를 더하고 뺀다 (fold_stock과 같은 규칙).
+    # 새 키의 품목 정보는 그 키의 행에서 (사용(Auto) 행뿐이면 '-'). 오류는 last_error에 남긴다.
+    def apply_logs(self, rows, head):
+        w = len(head)
+        d = pd.DataFrame([(list(r) + [""] * w)[:w] for r in rows], columns=head)
+        deltas = fold_stock(d)
+        deltas = deltas[deltas.abs() > 1e-9]
+        if deltas.empty: return {}
+        info = {}
+        for r in d.to_dict('records'):
+            k = _key(r.get('공장', ""), r.get('코드', ""))
+            if str(r.get('품목명', "")) != "System": info.setdefault(k, tuple(str(r.get(c, "-")) for c in ('품목명', '규격', '타입', '색상')))
+        try:
+            out = self.increment(deltas.to_dict(), info)
+            self.last_error = ""
+            return out
+        except Exception as e:
+            self.last_error = f"{time.strftime('%H:%M:%S')} {type(e).__name__}: {e}"
+            return None
+
+    # 계산된 현재고를 시트에 반영: targets = {(공장, 코드): (현재고, 품목정보)}. 값이 같은 행은 쓰지 않는다.
+    # 바뀐 행 수를 돌려준다.
+    def sync(self, targets):
+        if not targets: return 0
+        before = {}
+        def setter(k, qty):
+            def run(q): before[k] = q; return float(qty)
+            return run
+        res = self._submit({k: setter(_key(*k), v[0]) for k, v in targets.items()}, {k: v[1] for k, v in targets.items()})
+        return sum(1 for k, v in res.items() if abs(before[k] - v) > 1e-9)
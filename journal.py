@@ -0,0 +1,196 @@
+# --- 쓰기 저널 / 백그라운드 반영 ---
+# 버튼을 누르면 행 추가는 로컬 저널 파일(JSON lines, 한 줄 쓸 때마다 fsync)에 먼저 적고 바로 돌아온다.
+# 백그라운드 스레드가 저널 항목을 순서대로 시트에 append_rows 한다. 화면은 아직 안 보낸 행을 불러온 표에 붙여서(overlay) 보여 준다.
+# 실패하면 간격을 늘려 가며 다시 보내고, MAX_TRIES번 실패하면 '실패'로 두었다가 사이드바에서 다시 시도/버리기 할 수 있다.
+# 행마다 고유한 키 열(Logs의 ID 등)이 있는 시트만 받는다. 한 번이라도 실패한 항목(보내다 시간 초과 → 시트에는 들어갔을 수 있음)과
+# 앱이 다시 시작되어 저널 파일에서 다시 읽은 항목은, 보내기 전에 키 열로 이미 들어갔는지 확인해서 같은 행을 두 번 넣지 않는다.
+# 키 열이 없는 시트(Orders 등)는 확인할 방법이 없으므로 저널에 맡기지 않고 바로 보낸다 (accepts).
+# (셀 수정/행 삭제는 그 자리에서 행 위치를 확인해야 하므로 지금처럼 바로 보낸다)
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+JOURNAL_PATH = "write_journal.jsonl"
+MAX_TRIES = 6
+BACKOFF = (2, 5, 15, 30, 60, 120)   # 초: n번째 실패 후 다시 보내기까지
+PENDING, FAILED = "pending", "failed"
+
+
+class WriteJournal:
+    # resolve: 시트 이름 -> worksheet, keys: 시트 이름 -> 행마다 고유한 열 이름(중복 확인용, 이 시트들만 받는다)
+    # on_sent: 시트에 행을 보낸 뒤(이미 들어가 있던 경우 포함) (시트 이름, 보낸 행)으로 호출
+    def __init__(self, resolve, path=JOURNAL_PATH, keys=None, on_sent=None):
+        self.resolve = resolve
+        self.on_sent = on_sent
+        self.path = path
+        self.keys = dict(keys or {})
+        self._entries = OrderedDict()   # id -> {id, ts, sheets{시트: [행]}, sent[시트], status, tries, error, next_at}
+        self._heads = {}                # 시트 -> 헤더 (키 열 위치)
+        self._cv = threading.Condition()
+        self._thread = None
+        self._load()
+
+    def _record(self, rec):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n"); f.flush(); os.fsync(f.fileno())
+
+    def _load(self):
+        if not os.path.exists(self.path): return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try: rec = json.loads(line)
+                except ValueError: continue   # 쓰다 끊긴 마지막 줄
+                e = self._entries.get(rec.get('id'))
+                op = rec.get('op')
+                if op == 'add':   # 앱이 죽기 전에 보내던 중이었을 수 있으므로 확인하고 보낸다 (check)
+                    self._entries[rec['id']] = {'id': rec['id'], 'ts': rec['ts'], 'sheets': rec['sheets'], 'sent': [],
+                                                'status': PENDING, 'tries': 0, 'error': "", 'next_at': 0.0, 'check': True}
+                elif e is None: continue
+                elif op == 'sent': e['sent'].append(rec['sheet'])
+                elif op == 'fail': e.update(status=rec['status'], tries=rec['tries'], error=rec['error'])
+                elif op == 'retry': e.update(status=PENDING, next_at=0.0)
+                elif op in ('done', 'drop'): del self._entries[rec['id']]
+        self._compact()
+
+    # 끝난 항목을 뺀 저널로 교체 (남은 항목이 없으면 빈 파일)
+    def _compact(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for e in self._entries.values():
+                f.write(json.dumps({'op': 'add', 'id': e['id'], 'ts': e['ts'], 'sheets': e['sheets']}, ensure_ascii=False) + "\n")
+                for t in e['sent']: f.write(json.dumps({'op': 'sent', 'id': e['id'], 'sheet': t}, ensure_ascii=False) + "\n")
+                if e['tries']: f.write(json.dumps({'op': 'fail', 'id': e['id'], 'status': e['status'], 'tries': e['tries'], 'error': e['error']}, ensure_ascii=False) + "\n")
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    # 저널에 맡길 수 있는 시트 (다시 보낼 때 이미 들어간 행인지 확인할 키 열이 있음)
+    def accepts(self, title):
+        return bool(self.keys.get(title))
+
+    # 행 추가 묶음 {시트: [행, ...]}을 저널에 적는다. 파일에 남은 뒤에 돌아오므로 앱이 죽어도 잃지 않는다.
+    def submit(self, sheets):
+        sheets = {t: [list(r) for r in rows] for t, rows in sheets.items() if rows}
+        if not sheets: return None
+        bad = [t for t in sheets if not self.accepts(t)]
+        if bad: raise ValueError(f"키 열이 없는 시트는 저널에 맡길 수 없습니다: {', '.join(bad)}")
+        e = {'id': uuid.uuid4().hex, 'ts': time.time(), 'sheets': sheets, 'sent': [], 'status': PENDING, 'tries': 0, 'error': "", 'next_at': 0.0}
+        with self._cv:
+            self._record({'op': 'add', 'id': e['id'], 'ts': e['ts'], 'sheets': sheets})
+            self._entries[e['id']] = e
+            self._cv.notify_all()
+        return e['id']
+
+    def status(self):
+        with self._cv:
+            es = list(self._entries.values())
+        failed = [e for e in es if e['status'] == FAILED]
+        return {'pending': len(es) - len(failed), 'failed': len(failed),
+                'error': next((e['error'] for e in reversed(es) if e['error']), ""),
+                'oldest': min((e['ts'] for e in es), default=None)}
+
+    def retry_failed(self):
+        with self._cv:
+            for e in self._entries.values():
+                if e['status'] == FAILED:
+                    e.update(status=PENDING, next_at=0.0); self._record({'op': 'retry', 'id': e['id']})
+            self._cv.notify_all()
+
+    # 실패 항목을 버린다. 보내지 못한 행이 있던 시트 이름들을 돌려준다.
+    def drop_failed(self):
+        titles = set()
+        with self._cv:
+            for i in [i for i, e in self._entries.items() if e['status'] == FAILED]:
+                titles |= set(self._entries[i]['sheets']) - set(self._entries[i]['sent'])
+                del self._entries[i]; self._record({'op': 'drop', 'id': i})
+            if not self._entries: self._compact()
+            self._cv.notify_all()
+        return sorted(titles)
+
+    # 아직 시트에 없는 행 (대기 + 실패)
+    def pending_rows(self, title):
+        with self._cv:
+            return [r for e in self._entries.values() if title in e['sheets'] and title not in e['sent'] for r in e['sheets'][title]]
+
+    # 불러온 표 뒤에 아직 안 보낸 행을 붙인다. 키 열이 있으면 이미 시트에 들어온 행은 뺀다.
+    def overlay(self, title, df):
+        rows = self.pending_rows(title)
+        if not rows or len(df.columns) == 0: return df
+        w = len(df.columns)
+        extra = pd.DataFrame([(list(r) + [""] * w)[:w] for r in rows], columns=df.columns)
+        key = self.keys.get(title)
+        if key in df.columns: extra = extra[~extra[key].astype(str).isin(set(df[key].astype(str)))]
+        return pd.concat([df, extra], ignore_index=True) if not extra.empty else df
+
+    # 이 시트에 대기 중인 항목이 다 보내질 때까지(최대 timeout초) 기다린다. 기다린 게 있으면 True.
+    # 행 위치를 색인하는 쪽(OrderBook/KeyedSheet 등)이 방금 추가한 행을 찾을 수 있게 한다.
+    def wait_idle(self, title, timeout=15.0):
+        end = time.time() + timeout
+        def busy(): return any(e['status'] == PENDING and title in e['sheets'] and title not in e['sent'] for e in self._entries.values())
+        with self._cv:
+            if not busy(): return False
+            while busy() and time.time() < end: self._cv.wait(min(0.5, max(end - time.time(), 0.01)))
+        return True
+
+    # 보낼 차례인 항목: 같은 시트의 앞 항목이 재시도를 기다리는 중이면 뒤 항목도 기다린다(행 순서 유지).
+    def _next(self, now):
+        blocked = set()
+        for e in self._entries.values():
+            if e['status'] != PENDING: continue
+            titles = set(e['sheets']) - set(e['sent'])
+            if e['next_at'] <= now and not titles & blocked: return e
+            blocked |= titles
+        return None
+
+    def _landed(self, ws, title, rows):
+        key = self.keys.get(title)
+        if title not in self._heads: self._heads[title] = [str(h).strip() for h in ws.row_values(1)]
+        head = self._heads[title]
+        if key not in head: raise RuntimeError(f"'{title}' 시트에 키 열 '{key}'이 없어 이미 들어간 행인지 확인할 수 없습니다.")
+        at = head.index(key)
+        have = set(str(v).strip() for v in ws.col_values(at + 1))
+        return all(str(r[at]).strip() in have for r in rows if len(r) > at)
+
+    def _send(self, e):
+        for t, rows in e['sheets'].items():
+            if t in e['sent']: continue
+            ws = self.resolve(t)
+            if ws is None: raise RuntimeError(f"'{t}' 시트를 찾을 수 없습니다.")
+            if not ((e['tries'] or e.get('check')) and self._landed(ws, t, rows)): ws.append_rows(rows)
+            with self._cv:
+                e['sent'].append(t); self._record({'op': 'sent', 'id': e['id'], 'sheet': t})
+            if self.on_sent:
+                try: self.on_sent(t, rows)
+                except Exception: pass
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                now = time.time(); e = self._next(now)
+                if e is None:
+                    due = [x['next_at'] for x in self._entries.values() if x['status'] == PENDING]
+                    self._cv.wait(min([1.0] + [max(d - now, 0.01) for d in due])); continue
+            try:
+                self._send(e)
+            except Exception as ex:
+                with self._cv:
+                    e['tries'] += 1; e['error'] = f"{type(ex).__name__}: {ex}"
+                    if e['tries'] >= MAX_TRIES: e['status'] = FAILED
+                    else: e['next_at'] = time.time() + BACKOFF[min(e['tries'], len(BACKOFF)) - 1]
+                    self._record({'op': 'fail', 'id': e['id'], 'status': e['status'], 'tries': e['tries'], 'error': e['error']})
+                    self._cv.notify_all()
+                continue
+            with self._cv:
+                self._entries.pop(e['id'], None)
+                if self._entries: self._record({'op': 'done', 'id': e['id']})
+                else: self._compact()
+                self._cv.notify_all()
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._thread = threading.Thread(target=self._loop, name="write-journal", daemon=True)
+        self._thread.start()
@@ -0,0 +1,153 @@
+# --- Logs 시트 행 ID / 삭제 표시 / 정리 ---
+# 모든 로그 행에 고유 ID를 붙이고, 삭제는 행을 바로 지우지 않고 '삭제' 칸에 시각을 적는다(표시 1회 batch_update).
+# 표시된 행은 백그라운드 정리(compact)가 한 번의 batchUpdate로 실제로 지운다.
+# (행 번호 = 캐시 index + 2 로 지우면 그사이 다른 사람이 행을 추가/삭제했을 때 엉뚱한 행이 지워짐)
+# 정리는 ID와 삭제 칸을 같이 읽고, 지우기 직전에 그 행들의 ID/삭제 칸을 다시 읽어 그대로일 때만 지운다 (어긋나면 다시 읽어서 한 번 더).
+# 여러 서버 프로세스가 동시에 정리하지 않도록 메타 시트(_Meta)의 임대 칸(versions.MetaLease)을 잡은 쪽만 정리한다.
+import contextlib
+import datetime
+import threading
+import time
+import uuid
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from gridsync import KeyedSheet
+from versions import MetaLease
+
+ID_HEADER = 'ID'
+DEL_HEADER = '삭제'
+LOG_WIDTH = 13          # 날짜 ~ 라인
+COMPACT_EVERY = 600     # 초
+COMPACT_MIN_AGE = 60    # 표시 후 이 시간(초)이 지난 행만 지운다
+LEASE_NAME = 'Logs:compactor'   # 메타 시트에서 정리 임대 칸이 있는 줄
+LEASE_TTL = 300         # 초: 정리하다 죽은 프로세스의 임대는 이 시간이 지나면 가져온다
+
+
+def new_log_id():
+    return uuid.uuid4().hex[:12]
+
+
+def _col(n):
+    return rowcol_to_a1(1, n)[:-1]
+
+
+def is_deleted(df_logs):
+    if DEL_HEADER not in df_logs.columns: return pd.Series(False, index=df_logs.index)
+    return df_logs[DEL_HEADER].astype(str).str.strip() != ""
+
+
+class CompactError(RuntimeError):
+    pass
+
+
+class LogBook:
+    def __init__(self, ws, settle=None, meta_ws=None):
+        self.ws = ws
+        self.lease = MetaLease(meta_ws, LEASE_NAME, LEASE_TTL) if meta_ws is not None else None   # 없으면 임대 없이 정리 (서버 프로세스가 하나일 때)
+        self._lock = threading.Lock()
+        self.id_col, self.del_col = self._ensure_columns()
+        self.keys = KeyedSheet(ws, ID_HEADER, settle)
+        self.last_error = ""     # 정리 스레드의 마지막 오류 (성공하면 비움)
+        self._thread = None
+
+    # 헤더에 ID/삭제 열이 없으면 만들고, ID가 비어 있는 기존 행에 ID를 한 번에 채운다
+    def _ensure_columns(self):
+        head = [str(h).strip() for h in self.ws.row_values(1)]
+        if ID_HEADER not in head:
+            at = max(len(head), LOG_WIDTH) + 1
+            if self.ws.col_count < at + 1: self.ws.add_cols(at + 1 - self.ws.col_count)
+            self.ws.update([[ID_HEADER, DEL_HEADER]], f"{_col(at)}1:{_col(at + 1)}1")
+            head = head + [""] * (at - 1 - len(head)) + [ID_HEADER, DEL_HEADER]
+        id_col = head.index(ID_HEADER) + 1
+        if DEL_HEADER not in head:
+            self.ws.update([[DEL_HEADER]], f"{_col(id_col + 1)}1"); head.insert(id_col, DEL_HEADER)
+        self.backfilled = self._backfill(id_col)
+        self.head = head   # 열 이름 (보낸 로그 행을 표로 볼 때)
+        return id_col, head.index(DEL_HEADER) + 1
+
+    def _backfill(self, id_col):
+        c = _col(id_col)
+        first, ids = self.ws.batch_get(["A2:A", f"{c}2:{c}"])
+        n = len(first)
+        ids = [(r[0] if r else "") for r in ids] + [""] * (n - len(ids))
+        if not n or all(str(v).strip() for v in ids[:n]): return 0
+        filled = [[v if str(v).strip() else new_log_id()] for v in ids[:n]]
+        self.ws.update(filled, f"{c}2:{c}{n + 1}")
+        return sum(1 for v in ids[:n] if not str(v).strip())
+
+    # 앱에서 만든 13칸 로그 행 뒤에 ID 칸을 붙인다
+    def row(self, values):
+        values = list(values) + [""] * (self.id_col - 1 - len(values))
+        return values[:self.id_col - 1] + [new_log_id(), ""]
+
+    def append(self, wb, values):
+        wb.append(self.ws, self.row(values))
+
+    # 삭제 표시: 행을 ID로 찾아 '삭제' 칸만 한 번에 적는다. 찾은 행 수를 돌려준다.
+    def tombstone(self, wb, ids):
+        stamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return self.keys.set_cells(wb, {i: {DEL_HEADER: stamp} for i in ids})
+
+    # 오래된 삭제 표시가 있는 행: {행 번호: (ID, 삭제 칸)}. ID가 없는 행은 확인할 수 없으니 건드리지 않는다.
+    def _marked(self, min_age):
+        ic, dc = _col(self.id_col), _col(self.del_col)
+        ids, dels = self.ws.batch_get([f"{ic}2:{ic}", f"{dc}2:{dc}"])
+        cutoff = datetime.datetime.now() - datetime.timedelta(seconds=min_age)
+        out = {}
+        for i, r in enumerate(dels):
+            v = str(r[0]).strip() if r else ""
+            k = str(ids[i][0]).strip() if i < len(ids) and ids[i] else ""
+            if not v or not k: continue
+            try: old = datetime.datetime.strptime(v, "%Y-%m-%d %H:%M:%S") <= cutoff
+            except ValueError: old = True
+            if old: out[i + 2] = (k, v)
+        return out
+
+    # 지우기 직전: 고른 행들의 ID/삭제 칸을 한 번에 다시 읽어 그대로인지
+    def _still_marked(self, rows):
+        ic, dc = _col(self.id_col), _col(self.del_col)
+        got = self.ws.batch_get([a for r in rows for a in (f"{ic}{r}", f"{dc}{r}")])
+        for j, (k, v) in enumerate(rows.values()):
+            gi, gd = got[2 * j], got[2 * j + 1]
+            if not (gi and gi[0] and str(gi[0][0]).strip() == k and gd and gd[0] and str(gd[0][0]).strip() == v): return False
+        return True
+
+    @contextlib.contextmanager
+    def _lease(self):
+        if self.lease is None:
+            yield True; return
+        with self.lease.hold() as got: yield got
+
+    # 삭제 표시된 행을 실제로 지운다 (아래 행부터, batchUpdate 1회). 지운 행 수를 돌려준다.
+    # 다른 프로세스가 정리 중이면 0. 다시 읽은 ID가 두 번 모두 어긋나면 아무것도 지우지 않고 CompactError.
+    def compact(self, min_age=COMPACT_MIN_AGE):
+        with self._lock, self._lease() as got:
+            if not got: return 0
+            for _ in range(2):
+                rows = self._marked(min_age)
+                if not rows: return 0
+                with self.keys._lock:   # 이 프로세스의 ID 색인 조회와 겹치지 않게
+                    if not self._still_marked(rows): continue
+                    reqs = [{"deleteDimension": {"range": {"sheetId": self.ws.id, "dimension": "ROWS", "startIndex": r - 1, "endIndex": r}}}
+                            for r in sorted(rows, reverse=True)]
+                    self.ws.spreadsheet.batch_update({"requests": reqs})
+                    self.keys._rows = None
+                return len(rows)
+            raise CompactError("삭제 표시된 로그 행의 위치가 계속 바뀌어 정리를 미뤘습니다.")
+
+    # 정리 스레드: 주기적으로 compact, 지운 게 있으면 on_compact(지운 수) 호출. 오류는 last_error에 남긴다.
+    def start_compactor(self, on_compact=None, every=COMPACT_EVERY):
+        if self._thread and self._thread.is_alive(): return
+        def loop():
+            while True:
+                time.sleep(every)
+                try:
+                    n = self.compact()
+                    self.last_error = ""
+                    if n and on_compact: on_compact(n)
+                except Exception as e:
+                    self.last_error = f"{datetime.datetime.now():%H:%M:%S} {type(e).__name__}: {e}"
+        self._thread = threading.Thread(target=loop, name="logs-compactor", daemon=True)
+        self._thread.start()
@@ -0,0 +1,87 @@
+# --- 자재 소요 계획 (MRP) ---
+# 준비 상태 주문 전체 → 제품 재고로 상쇄 → 부족분을 BOM 한 단계 연결(bom.py edges)로 전개
+# → 반제품은 다시 재고로 상쇄하고 부족분만 (상위 타입으로 고른) 하위 BOM으로 → 원자재 소요량.
+# 순환을 만드는 연결은 BomEngine이 끊은 그대로 빼고 전개한다 (같은 반제품을 두 번 세지 않음).
+# 단계마다 연결 목록 위에서 bincount 한 번씩이라 주문 수와 상관없이 빠르다.
+# 원자재는 현재고와 비교하고, 최근 입고 기록으로 입고 간격(리드타임 대용)과 다음 입고 예상일을 붙인다.
+import numpy as np
+import pandas as pd
+
+EPS = 1e-9
+RECENT_RECEIPTS = 5   # 입고 간격은 최근 이 횟수의 입고로 계산
+
+
+def _by_code(df_stock, factory=None):
+    if df_stock.empty: return pd.Series(dtype=float)
+    d = df_stock if not factory else df_stock[df_stock['공장'].astype(str) == factory]
+    return d.groupby(d['코드'].astype(str).str.strip(), observed=True)['현재고'].sum()
+
+
+def order_demand(df_orders):
+    cols = ['코드', '타입', '주문수량', '주문수']
+    if df_orders.empty or '상태' not in df_orders.columns: return pd.DataFrame(columns=cols)
+    d = df_orders[df_orders['상태'].astype(str) == '준비']
+    if d.empty: return pd.DataFrame(columns=cols)
+    d = d.assign(코드=d['코드'].astype(str).str.strip(), 타입=d['타입'].astype(str).str.strip() if '타입' in d.columns else "",
+                 수량=pd.to_numeric(d['수량'], errors='coerce').fillna(0.0))
+    g = d.groupby(['코드', '타입'], observed=True)
+    return pd.DataFrame({'주문수량': g['수량'].sum(), '주문수': g['주문번호'].nunique()}).reset_index()
+
+
+# 코드별 입고 기록: 최근입고일, 평균 입고 간격(일), 평균 입고량, 다음 입고 예상일
+def receipt_stats(df_logs, n=RECENT_RECEIPTS):
+    cols = ['최근입고일', '입고간격(일)', '평균입고량', '다음입고예상']
+    if df_logs is None or df_logs.empty: return pd.DataFrame(columns=cols)
+    d = df_logs[df_logs['구분'].astype(str) == '입고']
+    dt = d['날짜_dt'] if '날짜_dt' in d.columns else pd.to_datetime(d['날짜'], errors='coerce')
+    d = pd.DataFrame({'코드': d['코드'].astype(str).str.strip(), 'dt': dt.dt.normalize(), '수량': pd.to_numeric(d['수량'], errors='coerce')}).dropna(subset=['dt'])
+    if d.empty: return pd.DataFrame(columns=cols)
+    daily = d.groupby(['코드', 'dt'])['수량'].sum().reset_index().sort_values(['코드', 'dt'])
+    daily = daily.groupby('코드').tail(n)
+    daily['gap'] = daily.groupby('코드')['dt'].diff().dt.days
+    g = daily.groupby('코드')
+    out = pd.DataFrame({'최근입고일': g['dt'].max(), '입고간격(일)': g['gap'].mean(), '평균입고량': g['수량'].mean()})
+    out['다음입고예상'] = out['최근입고일'] + pd.to_timedelta(out['입고간격(일)'].round(), unit='D')
+    return out
+
+
+def mrp(df_orders, df_stock, engine, df_logs=None, factory=None):
+    stock = _by_code(df_stock, factory)
+    fg = order_demand(df_orders)
+    # 1) 제품: 코드별 재고로 상쇄하고, 부족분은 같은 코드의 타입별 주문 비율로 나눈다
+    code_tot = fg.groupby('코드')['주문수량'].transform('sum').astype(float)
+    fg['현재고'] = fg['코드'].map(stock).fillna(0.0).astype(float)
+    short_code = (code_tot - fg['현재고'].clip(lower=0.0)).clip(lower=0.0)
+    fg['부족수량'] = (fg['주문수량'] * short_code / code_tot.where(code_tot > EPS, 1.0)).where(code_tot > EPS, 0.0)
+    rows = [engine.row_of(c, t) for c, t in zip(fg['코드'], fg['타입'])]
+    fg['BOM'] = [r is not None for r in rows]
+    # 2) 단계별 전개 + 반제품 재고 상쇄
+    P, M = len(engine.parents), len(engine.materials)
+    mats = pd.Index(engine.materials)
+    ep, em, eq, esub = engine.edges()
+    down = esub >= 0
+    is_semi = engine.has_bom()
+    avail = mats.to_series().map(stock).fillna(0.0).clip(lower=0.0).to_numpy(dtype=float, copy=True)
+    gross = np.zeros(M); short_semi = np.zeros(M)
+    vec = np.zeros(P)
+    np.add.at(vec, np.array([r for r in rows if r is not None], dtype=int), fg.loc[fg['BOM'], '부족수량'].to_numpy(dtype=float))
+    for _ in range(P + 1):   # 끊은 연결을 뺐으니 BOM 깊이만큼 돌면 끝난다
+        if vec.sum() <= EPS: break
+        req_e = vec[ep] * eq
+        req = np.bincount(em, req_e, minlength=M)
+        gross += req
+        use = np.minimum(req, avail) * is_semi
+        avail -= use
+        short = (req - use) * is_semi
+        short_semi += short
+        # 자재별 부족 비율만큼 연결마다 나눠서, 그 연결의 상위 타입으로 고른 하위 BOM 행에 넘긴다
+        ratio = np.divide(short, req, out=np.zeros(M), where=req > EPS)
+        vec = np.bincount(esub[down], req_e[down] * ratio[em[down]], minlength=P)
+    # 3) 자재표: 반제품 부족량은 위에서 상쇄하고 남은 양(그만큼 하위 자재로 전개됨), 원자재는 총소요량 - 현재고
+    mat = pd.DataFrame({'자재코드': mats.astype(str), '구분': np.where(is_semi, '반제품', '원자재'), '총소요량': gross,
+                        '현재고': mats.to_series().map(stock).fillna(0.0).to_numpy(dtype=float)})
+    mat['부족량'] = np.where(is_semi, short_semi, (gross - mat['현재고'].clip(lower=0.0)).clip(lower=0.0))
+    mat = mat[mat['총소요량'] > EPS]
+    rs = receipt_stats(df_logs).reindex(mat['자재코드'])
+    mat = pd.concat([mat.reset_index(drop=True), rs.reset_index(drop=True)], axis=1)
+    return fg, mat.sort_values(['부족량', '총소요량'], ascending=False).reset_index(drop=True)
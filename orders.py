@@ -0,0 +1,79 @@
+# --- 주문(Orders) 시트 행 색인 ---
+# 주문번호 → 시트 행 번호 목록을 들고 있다가, 주문 하나를 고칠 때 그 행/셀만 WriteBuffer에 담는다.
+# (시트 전체를 get_all_records → clear → update로 다시 쓰지 않는다)
+import threading
+
+
+def _id(v):
+    return str(v).strip()
+
+
+class OrderBook:
+    def __init__(self, ws, settle=None):
+        self.ws = ws
+        self._settle = settle
+        self._rows = None    # 주문번호 -> [행 번호, ...] (시트 순서)
+        self._header = None
+        self._lock = threading.Lock()
+
+    def _rebuild(self):
+        head, ids = self.ws.batch_get(["1:1", "A2:A"])
+        self._header = [str(h).strip() for h in (head[0] if head else [])]
+        rows = {}
+        for i, r in enumerate(ids):
+            if r and _id(r[0]): rows.setdefault(_id(r[0]), []).append(i + 2)
+        self._rows = rows
+
+    # 저널(journal.py)에 이 시트로 보낼 행 추가가 남아 있으면 끝날 때까지 기다렸다가 다시 색인한다
+    def _settle_rows(self):
+        if self._settle and self._settle(self.ws.title): self._rows = None
+
+    def invalidate(self):
+        with self._lock: self._rows = None
+
+    def col(self, name):
+        return self._header.index(name) + 1
+
+    # 색인의 행들이 아직 그 주문인지 A열을 한 번에 읽어 확인한다. 어긋났거나 없으면 다시 색인.
+    def _locate(self, order_id):
+        oid = _id(order_id)
+        self._settle_rows()
+        if self._rows is None: self._rebuild()
+        rows = self._rows.get(oid, [])
+        if rows:
+            got = self.ws.batch_get([f"A{r}" for r in rows])
+            if all(vr and vr[0] and _id(vr[0][0]) == oid for vr in got): return rows
+        self._rebuild()
+        return self._rows.get(oid, [])
+
+    def rows(self, order_id):
+        with self._lock: return list(self._locate(order_id))
+
+    # 주문의 모든 행 '상태' 셀만 바꾼다
+    def set_status(self, wb, order_id, status):
+        with self._lock:
+            rows = self._locate(order_id)
+            col = self.col('상태')
+            for r in rows: wb.update_cell(self.ws, r, col, status)
+        return len(rows)
+
+    # 주문의 n번째 행(시트 순서)에서 주어진 열만 바꾼다: values = {'수량': .., '팔레트번호': ..}
+    def update_line(self, wb, order_id, nth, values):
+        with self._lock:
+            rows = self._locate(order_id)
+            if not 0 <= nth < len(rows): raise IndexError(f"주문 {order_id}에 {nth + 1}번째 행이 없습니다.")
+            for k, v in values.items(): wb.update_cell(self.ws, rows[nth], self.col(k), v)
+
+    def append(self, wb, row):
+        wb.append(self.ws, row)
+        with self._lock: self._rows = None  # 새 행 번호는 다음 동작 때 다시 색인
+
+    # 재구성: 주문의 기존 행을 앞에서부터 새 행으로 덮어쓰고, 남는 새 행은 추가, 모자라면 남은 기존 행만 삭제한다
+    def replace(self, wb, order_id, new_rows):
+        with self._lock:
+            rows = self._locate(order_id)
+            for r, vals in zip(rows, new_rows):
+                for c, v in enumerate(vals, start=1): wb.update_cell(self.ws, r, c, v)
+            for vals in new_rows[len(rows):]: wb.append(self.ws, vals)
+            if len(rows) > len(new_rows): wb.delete_rows(self.ws, rows[len(new_rows):])
+            if len(rows) != len(new_rows): self._rows = None
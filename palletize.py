@@ -0,0 +1,67 @@
+# --- 팔레트 배치 ---
+# 주문 라인(수량 kg)을 팔레트 최대 적재량 안에서 팔레트에 나눠 싣는다.
+# plan_pallets: 팔레트 수를 최소(총량 / 적재량 올림)로 맞추면서 여러 제품이 섞인 팔레트를 줄인다.
+#   1) 라인마다 꽉 찬 팔레트는 그 제품만 싣는다.
+#   2) 남은 자투리는 큰 것부터 가장 꼭 맞는 팔레트에 통째로 넣고(Best Fit Decreasing),
+#      어디에도 통째로 안 들어가면 빈 공간이 큰 팔레트부터 나눠 싣는다.
+#   keep_together=True 이면 자투리를 나누지 않고 새 팔레트를 연다(제품별 팔레트 수 최소, 팔레트 수는 늘 수 있음).
+# greedy_pallets: 기존 방식(장바구니 순서대로 채우기). 빠른 대체 경로로 남겨 둔다.
+# 결과는 둘 다 [(라인 번호, 팔레트 번호, 적재량), ...] 이고 팔레트 번호는 1부터.
+import math
+
+EPS = 1e-9
+
+
+def greedy_pallets(qtys, cap):
+    out = []; plt = 1; cw = 0.0
+    for i, q in enumerate(qtys):
+        rem = float(q)
+        while rem > EPS:
+            sp = cap - cw
+            if sp <= EPS: plt += 1; cw = 0.0; sp = cap
+            load = min(rem, sp)
+            out.append((i, plt, load))
+            cw += load; rem -= load
+    return out
+
+
+def plan_pallets(qtys, cap, keep_together=False):
+    if cap <= 0: raise ValueError("팔레트 적재량은 0보다 커야 합니다.")
+    bins = []   # [남은 공간, [(라인, 적재량), ...]]
+    rems = []
+    for i, q in enumerate(qtys):
+        q = float(q)
+        if q <= EPS: continue
+        full = int((q + EPS) // cap)
+        for _ in range(full): bins.append([0.0, [(i, cap)]])
+        r = q - full * cap
+        if r > EPS: rems.append((r, i))
+    total = sum(r for r, _ in rems)
+    n_open = 0 if keep_together else math.ceil(total / cap - EPS)
+    mixed = [[cap, []] for _ in range(n_open)]
+    for r, i in sorted(rems, key=lambda x: (-x[0], x[1])):
+        fit = [b for b in mixed if b[0] >= r - EPS]
+        if fit:
+            b = min(fit, key=lambda b: b[0])
+            b[0] -= r; b[1].append((i, r)); continue
+        if keep_together:
+            mixed.append([cap - r, [(i, r)]]); continue
+        for b in sorted(mixed, key=lambda b: -b[0]):  # 나눠 싣기: 빈 공간이 큰 팔레트부터
+            if r <= EPS: break
+            load = min(r, b[0])
+            if load <= EPS: continue
+            b[0] -= load; b[1].append((i, load)); r -= load
+    bins += [b for b in mixed if b[1]]
+    # 팔레트 번호는 먼저 나오는 라인 순서대로 (같은 라인의 팔레트는 이어서)
+    bins.sort(key=lambda b: (min(i for i, _ in b[1]), len(b[1]) > 1))
+    return [(i, n, load) for n, b in enumerate(bins, start=1) for i, load in b[1]]
+
+
+# (팔레트 수, 여러 제품이 섞인 팔레트 수, 라인별 평균 팔레트 수). codes가 있으면 같은 코드는 섞인 것으로 보지 않는다.
+def pallet_stats(plan, codes=None):
+    by_plt = {}; by_line = {}
+    for i, p, _ in plan:
+        by_plt.setdefault(p, set()).add(codes[i] if codes is not None else i)
+        by_line.setdefault(i, set()).add(p)
+    spread = sum(len(v) for v in by_line.values()) / len(by_line) if by_line else 0.0
+    return len(by_plt), sum(1 for v in by_plt.values() if len(v) > 1), spread
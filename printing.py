@@ -0,0 +1,125 @@
+# --- 명세서 / 라벨 출력 ---
+# 템플릿(Jinja2)은 불러올 때 한 번만 컴파일하고, 결과 HTML은 (주문 행 + 출력용 이름) 해시로 캐시한다.
+# 여러 주문의 팔레트 라벨을 한 문서(페이지 나눔)로 만들어 한 번에 인쇄/다운로드할 수 있다.
+# (PDF 라이브러리 없이 브라우저 인쇄용 HTML 한 장으로 만든다)
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from jinja2 import Environment
+
+CACHE_SIZE = 256
+LINE_COLS = ['주문번호', '날짜', '거래처', '코드', '품목명', '수량', '팔레트번호', '비고', 'Shape']
+
+_env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+_env.filters['kg'] = lambda v: f"{float(v):,.0f}"
+
+PACKING_LIST = _env.from_string("""\
+<h2>PACKING LIST</h2>
+<p>CUSTOMER: {{ o.customer }} &nbsp; | &nbsp; ORDER: {{ o.order_id }} &nbsp; | &nbsp; DATE: {{ o.date }}</p>
+<table border='1' style='width:100%; border-collapse:collapse;'>
+<thead><tr style='background:#eee;'><th>PLT</th><th>ITEM</th><th>QTY</th><th>COLOR</th><th>SHAPE</th><th>LOT#</th><th>REMARK</th></tr></thead>
+<tbody>
+{% for p in o.pallets %}{% for l in p.lines %}
+<tr>{% if loop.first %}<td rowspan='{{ p.lines|length }}'>{{ p.no }}</td>{% endif %}<td>{{ l.name }}</td><td align='right'>{{ l.qty|kg }}</td><td align='center'>-</td><td align='center'>{{ l.shape }}</td><td align='center'>-</td><td align='center'>{{ l.remark }}</td></tr>
+{% endfor %}{% endfor %}
+<tr style='background:#eee; font-weight:bold;'><td>TOTAL</td><td>{{ o.pallets|length }} PLT</td><td align='right'>{{ o.total|kg }}</td><td colspan='4'></td></tr>
+</tbody></table>
+""")
+
+DIAMOND_LABEL = _env.from_string("""\
+{% for p in o.pallets %}
+<div class='page-break'>
+<div style='width:11cm; height:11cm; border:5px solid black; transform:rotate(45deg); display:flex; align-items:center; justify-content:center;'>
+<div style='transform:rotate(-45deg); text-align:center; font-weight:bold; line-height:1.4;'>
+<div style='font-size:22px;'>{{ o.customer }}</div>
+{% for l in p.lines %}<div style='font-size:26px;'>{{ l.name }}</div><div style='font-size:18px;'>{{ l.qty|kg }} KG{% if l.shape != '-' %} / {{ l.shape }}{% endif %}</div>{% endfor %}
+<div style='font-size:18px;'>PLT {{ p.no }} / {{ o.pallets|length }}</div>
+<div style='font-size:14px;'>{{ o.ship_date }}</div>
+</div></div></div>
+{% endfor %}
+""")
+
+STANDARD_LABEL = _env.from_string("""\
+{% for p in o.pallets %}
+<div class='page-break'>
+<table style='width:18cm; font-size:20px;'>
+<tr><th style='width:30%; background:#eee;'>CUSTOMER</th><td colspan='3'><b>{{ o.customer }}</b></td></tr>
+<tr><th style='background:#eee;'>ORDER NO.</th><td colspan='3'>{{ o.order_id }}</td></tr>
+<tr><th style='background:#eee;'>ITEM</th><th style='background:#eee;'>QTY (KG)</th><th style='background:#eee;'>SHAPE</th><th style='background:#eee;'>REMARK</th></tr>
+{% for l in p.lines %}<tr><td><b>{{ l.name }}</b></td><td align='right'>{{ l.qty|kg }}</td><td align='center'>{{ l.shape }}</td><td align='center'>{{ l.remark }}</td></tr>{% endfor %}
+<tr><th style='background:#eee;'>PALLET</th><td colspan='3'><b>{{ p.no }} / {{ o.pallets|length }}</b> &nbsp; ({{ p.total|kg }} KG)</td></tr>
+<tr><th style='background:#eee;'>DATE</th><td colspan='3'>{{ o.ship_date }}</td></tr>
+</table></div>
+{% endfor %}
+""")
+
+TEMPLATES = {"packing": PACKING_LIST, "diamond": DIAMOND_LABEL, "standard": STANDARD_LABEL}
+
+DOCUMENT = _env.from_string("""\
+<!DOCTYPE html><html><head><meta charset='utf-8'><title>{{ title }}</title>
+<style>@page { size: A4 {{ orientation }}; margin: 1cm; } body { font-family: sans-serif; margin: 0; padding: 0; }
+table { border-collapse: collapse; width: 100%; } th, td { border: 1px solid black; padding: 4px; }
+.page-break { page-break-after: always; width: 100vw; height: 100vh; display: flex; justify-content: center; align-items: center; }
+.order-break { page-break-after: always; }</style></head>
+<body>{{ body|safe }}</body></html>
+""")
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _lines(dp):
+    d = dp.reindex(columns=LINE_COLS).fillna("")
+    d['팔레트번호'] = pd.to_numeric(d['팔레트번호'], errors='coerce').fillna(999)
+    d['수량'] = pd.to_numeric(d['수량'], errors='coerce').fillna(0.0)
+    return d.sort_values('팔레트번호', kind='stable')
+
+
+def _digest(kind, d, code_map, ship_date):
+    rows = d.astype(str).values.tolist()
+    codes = sorted(set(d['코드'].astype(str)))
+    payload = [kind, ship_date, rows, [[c, code_map.get(c, c)] for c in codes]]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _context(d, code_map, ship_date):
+    first = d.iloc[0]
+    pallets = []
+    for no, g in d.groupby('팔레트번호', sort=True):
+        lines = [{"name": code_map.get(str(r['코드']), str(r['코드'])), "qty": r['수량'], "shape": r['Shape'] or "-", "remark": r['비고']}
+                 for r in g.to_dict('records')]
+        pallets.append({"no": int(no) if float(no).is_integer() else no, "lines": lines, "total": float(g['수량'].sum())})
+    return {"order_id": first['주문번호'], "customer": first['거래처'], "date": first['날짜'], "ship_date": ship_date,
+            "pallets": pallets, "total": float(d['수량'].sum())}
+
+
+# 주문 하나(같은 주문번호 행들)의 명세서/라벨 HTML. kind: packing / diamond / standard
+def render_order(kind, dp, code_map, ship_date):
+    if dp.empty: return ""
+    d = _lines(dp)
+    key = _digest(kind, d, code_map, ship_date)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key); return _cache[key]
+    html = TEMPLATES[kind].render(o=_context(d, code_map, ship_date))
+    with _lock:
+        _cache[key] = html
+        while len(_cache) > CACHE_SIZE: _cache.popitem(last=False)
+    return html
+
+
+# 여러 주문을 한 문서 본문으로: 명세서는 주문마다 페이지를 나누고, 라벨은 팔레트마다 한 장
+def render_batch(kind, df_orders, order_ids, code_map, ship_date):
+    parts = []
+    for oid, dp in df_orders[df_orders['주문번호'].isin(order_ids)].groupby('주문번호', sort=False):
+        html = render_order(kind, dp, code_map, ship_date)
+        parts.append(f"<div class='order-break'>{html}</div>" if kind == "packing" else html)
+    return "\n".join(parts)
+
+
+# 다운로드/서버 보관용 완성 문서
+def print_document(body, title="Print", orientation="portrait"):
+    return DOCUMENT.render(body=body, title=title, orientation=orientation)
@@ -0,0 +1,101 @@
+# --- 구글 시트 API 호출 한도 관리 ---
+# 모든 gspread 호출은 결국 HTTPClient.request()를 지나가므로, 여기서 분당 읽기/쓰기 한도를
+# 토큰 버킷으로 맞추고 429/5xx 응답은 지터를 섞은 지수 백오프로 다시 시도한다.
+# (고정 time.sleep 대신 한도가 남아 있으면 바로, 모자라면 필요한 만큼만 기다린다)
+# observer가 있으면 요청이 끝날 때마다 (메서드, 주소, 인자, 응답, 걸린 시간, 한도 대기, 재시도 수, 오류)를 넘긴다 (telemetry.py).
+import random
+import threading
+import time
+from http import HTTPStatus
+
+import requests
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+
+READS_PER_MIN = 60    # 사용자(서비스 계정)당 분당 읽기 요청 한도
+WRITES_PER_MIN = 60   # 사용자(서비스 계정)당 분당 쓰기 요청 한도
+MAX_RETRIES = 6
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 64.0
+RETRY_CODES = (HTTPStatus.REQUEST_TIMEOUT, HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.INTERNAL_SERVER_ERROR,
+               HTTPStatus.BAD_GATEWAY, HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.GATEWAY_TIMEOUT)
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # 토큰이 생길 때까지 기다린 뒤 하나 쓴다. 기다린 시간(초)을 돌려준다.
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait); waited += wait
+
+    # 서버가 429를 돌려주면 우리 계산보다 한도가 빡빡하다는 뜻이므로 버킷을 비운다
+    def drain(self):
+        with self._lock:
+            self._refill(); self.tokens = min(self.tokens, 0.0)
+
+
+read_bucket = TokenBucket(READS_PER_MIN)
+write_bucket = TokenBucket(WRITES_PER_MIN)
+observer = None
+
+
+def backoff_delay(attempt):
+    return min(MAX_BACKOFF, BASE_BACKOFF * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+
+# 429는 서버가 요청을 처리하지 않은 것이므로 항상 재시도한다.
+# 5xx/타임아웃은 결과를 알 수 없으니, 다시 보내도 결과가 같은 요청(읽기, 값 덮어쓰기)만 재시도한다.
+# (행 추가 values:append, 행 삭제 spreadsheets:batchUpdate는 두 번 반영될 수 있음)
+def _idempotent(method, endpoint):
+    method = method.upper()
+    return method == "GET" or method == "PUT" or "values:batchUpdate" in endpoint or "values:batchClear" in endpoint
+
+
+class QuotaHTTPClient(HTTPClient):
+    def request(self, method, endpoint, *args, **kwargs):
+        obs = observer
+        if obs is None: return self._request(method, endpoint, args, kwargs, {})
+        stats, resp, err = {'wait': 0.0, 'retries': 0}, None, None
+        t = time.perf_counter()
+        try:
+            resp = self._request(method, endpoint, args, kwargs, stats)
+            return resp
+        except Exception as e:
+            err = e; raise
+        finally:
+            try: obs(method, endpoint, kwargs, resp, time.perf_counter() - t, stats['wait'], stats['retries'], err)
+            except Exception: pass   # 계측이 실패해도 요청 결과는 그대로
+
+    def _request(self, method, endpoint, args, kwargs, stats):
+        bucket = read_bucket if method.upper() == "GET" else write_bucket
+        attempt = 0
+        while True:
+            stats['wait'] = stats.get('wait', 0.0) + bucket.acquire()
+            try:
+                return super().request(method, endpoint, *args, **kwargs)
+            except APIError as e:
+                if e.code not in RETRY_CODES or attempt >= MAX_RETRIES: raise
+                if e.code != HTTPStatus.TOO_MANY_REQUESTS and not _idempotent(method, endpoint): raise
+                if e.code == HTTPStatus.TOO_MANY_REQUESTS: bucket.drain()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= MAX_RETRIES or not _idempotent(method, endpoint): raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1; stats['retries'] = attempt
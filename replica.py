@@ -0,0 +1,228 @@
+# --- 로컬 SQLite 읽기 복제본 ---
+# 구글 시트를 매번 get_all_records()로 통째로 받지 않고, 시트별 행을 로컬 SQLite에 보관한 뒤
+# 마지막 동기화 이후 뒤에 붙은 행만 받아온다. (Logs처럼 계속 쌓이기만 하는 시트에 효과가 큼)
+# 시트별 gen(세대)은 전체 동기화에서 기존 행이 바뀌었거나 지워졌을 때만 올라간다 (뒤에 붙기만 했으면 그대로).
+# 앞부분 행을 접어 둔 결과(재고 스냅샷 등)는 gen이 같으면 앞부분이 그대로라고 보고 다시 쓴다.
+# 다른 프로세스가 시트 중간을 고치면 메타 시트의 Edited 값이 바뀐다(versions.py). 마지막으로 반영한 값(edit_tok)과
+# 다르면 다음 동기화는 전체로 한다 (expect_edit). 뒤에 붙이기만 한 변경은 그대로 추가분만 받는다.
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from gspread.utils import absolute_range_name, numericise_all, rowcol_to_a1
+
+REPLICA_PATH = os.environ.get("KPR_REPLICA_PATH", "kpr_replica.db")
+FULL_SYNC_SEC = 600  # 시트에서 직접 고친 중간 행까지 반영하기 위한 전체 동기화 주기(초)
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _sheet_lock(name):
+    with _locks_guard:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _row_sig(row):
+    return hashlib.sha1(json.dumps(row, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _col_letter(n):
+    return rowcol_to_a1(1, max(int(n), 1))[:-1]  # "T1" -> "T"
+
+
+def _fit(row, width):
+    row = [("" if v is None else str(v)) for v in row[:width]]
+    return row + [""] * (width - len(row))
+
+
+class Replica:
+    def __init__(self, path=REPLICA_PATH):
+        self.path = path
+        self.last_report = {}
+        with self._db() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS sheet_meta (name TEXT PRIMARY KEY, header TEXT, width INTEGER, "
+                        "n_rows INTEGER, tail_sig TEXT, synced_at REAL, full_at REAL, gen INTEGER DEFAULT 0, edit_tok TEXT)")
+            cols = [c[1] for c in con.execute("PRAGMA table_info(sheet_meta)")]
+            if 'gen' not in cols: con.execute("ALTER TABLE sheet_meta ADD COLUMN gen INTEGER DEFAULT 0")
+            if 'edit_tok' not in cols: con.execute("ALTER TABLE sheet_meta ADD COLUMN edit_tok TEXT")
+
+    @contextlib.contextmanager
+    def _db(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            with con: yield con
+        finally:
+            con.close()
+
+    @staticmethod
+    def _table(name):
+        return f'"rows_{name}"'
+
+    def _meta(self, con, name):
+        cur = con.execute("SELECT header, width, n_rows, tail_sig, synced_at, full_at, gen, edit_tok FROM sheet_meta WHERE name=?", (name,))
+        r = cur.fetchone()
+        if r is None: return None
+        return {"header": json.loads(r[0]), "width": r[1], "n_rows": r[2], "tail_sig": r[3], "synced_at": r[4], "full_at": r[5], "gen": r[6] or 0, "edit_tok": r[7]}
+
+    def _insert(self, con, name, width, first_rn, rows, vals=None):
+        if not rows: return
+        marks = ",".join(["?"] * (width + 1))
+        vals = vals if vals is not None else [numericise_all(r) for r in rows]
+        con.executemany(f"INSERT INTO {self._table(name)} VALUES ({marks})", [[first_rn + i] + v for i, v in enumerate(vals)])
+
+    # 저장된 행이 새로 받은 값의 앞부분과 그대로인지 (전체 동기화 때만, 한 번 훑는다)
+    def _same_prefix(self, con, name, meta, header, width, vals):
+        if meta is None or meta["header"] != header or meta["width"] != width or meta["n_rows"] > len(vals): return False
+        cur = con.execute(f"SELECT * FROM {self._table(name)} ORDER BY rn LIMIT ?", (meta["n_rows"],))
+        return all(list(r[1:]) == v for r, v in zip(cur, vals))
+
+    @staticmethod
+    def _needs_full(meta, now):
+        return meta is None or meta["full_at"] is None or now - meta["full_at"] > FULL_SYNC_SEC
+
+    @staticmethod
+    def _tail_ranges(meta, col_count):
+        return ["1:1", f"A{meta['n_rows'] + 1}:{_col_letter(max(col_count, meta['width']))}"]
+
+    # 시트 전체 값으로 테이블을 통째로 교체
+    def _store_full(self, name, values, now):
+        header = values[0] if values else []
+        rows = values[1:]
+        width = max([len(header)] + [len(r) for r in rows])
+        header = _fit(header, width); rows = [_fit(r, width) for r in rows]
+        anchor = rows[-1] if rows else header
+        vals = [numericise_all(r) for r in rows]
+        with self._db() as con:
+            meta = self._meta(con, name)
+            try: same = self._same_prefix(con, name, meta, header, width, vals)
+            except sqlite3.Error: same = False
+            gen = (meta["gen"] if meta else 0) + (0 if same else 1)
+            con.execute(f"DROP TABLE IF EXISTS {self._table(name)}")
+            cols = ", ".join(["rn INTEGER PRIMARY KEY"] + [f"c{i}" for i in range(width)])
+            con.execute(f"CREATE TABLE {self._table(name)} ({cols})")
+            self._insert(con, name, width, 2, rows, vals)
+            con.execute("INSERT OR REPLACE INTO sheet_meta (name, header, width, n_rows, tail_sig, synced_at, full_at, gen, edit_tok) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (name, json.dumps(header, ensure_ascii=False), width, len(rows), _row_sig(anchor), now, now, gen, meta["edit_tok"] if meta else None))
+        return len(rows)
+
+    def _full_sync(self, name, ws, now):
+        return self._store_full(name, ws.get_all_values(), now)
+
+    # 헤더와 '마지막으로 받은 행 ~ 끝'을 받아, 마지막 행이 그대로면 뒤에 붙은 행만 추가한다.
+    # 헤더가 바뀌었거나 마지막 행이 달라졌으면(중간 삭제/수정) None → 전체 동기화 필요
+    def _store_tail(self, name, meta, head, tail, now):
+        n, width = meta["n_rows"], meta["width"]
+        if _fit(head, width) != meta["header"] or len(head) > width: return None
+        if not tail or _row_sig(_fit(tail[0], width)) != meta["tail_sig"]: return None
+        new_rows = tail[1:]
+        if any(len(r) > width for r in new_rows): return None
+        new_rows = [_fit(r, width) for r in new_rows]
+        with self._db() as con:
+            self._insert(con, name, width, n + 2, new_rows)
+            sig = _row_sig(new_rows[-1]) if new_rows else meta["tail_sig"]
+            con.execute("UPDATE sheet_meta SET n_rows=?, tail_sig=?, synced_at=? WHERE name=?", (n + len(new_rows), sig, now, name))
+        return len(new_rows)
+
+    def sync(self, name, ws):
+        if ws is None: return 0
+        with _sheet_lock(name):
+            now = time.time()
+            with self._db() as con: meta = self._meta(con, name)
+            if self._needs_full(meta, now): return self._full_sync(name, ws, now)
+            head, tail = ws.batch_get(self._tail_ranges(meta, ws.col_count))
+            got = self._store_tail(name, meta, head[0] if head else [], tail, now)
+            return self._full_sync(name, ws, now) if got is None else got
+
+    # 시트별로 따로(병렬) 동기화. 한 시트가 실패해도 나머지는 계속한다.
+    # (스레드마다 호출한 쪽의 contextvars를 복사해 넘겨서, 계측 기록이 지금 화면 실행에 붙도록 한다)
+    def _sync_parallel(self, sheets, full=False):
+        def run(name, ws):
+            t = time.time()
+            try:
+                cnt = self._full_sync(name, ws, time.time()) if full else self.sync(name, ws)
+                return {"mode": "full" if full else "sheet", "rows": cnt, "fetch_sec": round(time.time() - t, 3), "apply_sec": 0.0, "error": ""}
+            except Exception as e:
+                return {"mode": "error", "rows": 0, "fetch_sec": round(time.time() - t, 3), "apply_sec": 0.0, "error": str(e)}
+        if not sheets: return {}
+        with ThreadPoolExecutor(max_workers=len(sheets)) as ex:
+            futs = {name: ex.submit(contextvars.copy_context().run, run, name, ws) for name, ws in sheets.items()}
+            return {name: f.result() for name, f in futs.items()}
+
+    # 모든 시트의 (헤더 + 추가분) 또는 (전체) 범위를 values_batch_get 한 번으로 받아 로컬에서 변환한다.
+    # 일괄 요청이 실패하면(시트 하나가 없어졌거나 이름이 바뀐 경우 등) 시트별 병렬 요청으로 넘어간다.
+    def sync_all(self, doc, sheets):
+        sheets = {name: ws for name, ws in sheets.items() if ws is not None}
+        if not sheets: return {}
+        now = time.time()
+        with self._db() as con: metas = {name: self._meta(con, name) for name in sheets}
+        ranges = {}
+        for name, ws in sheets.items():
+            m = metas[name]
+            rs = [None] if self._needs_full(m, now) else self._tail_ranges(m, ws.col_count)
+            ranges[name] = [absolute_range_name(ws.title, r) for r in rs]
+        try:
+            vrs = doc.values_batch_get([r for rs in ranges.values() for r in rs])["valueRanges"]
+        except Exception:
+            report = self._sync_parallel(sheets)
+            self.last_report = {**self.last_report, **report}
+            return report
+        fetch_sec = round(time.time() - now, 3)
+        report = {}; retry = {}; i = 0
+        for name, ws in sheets.items():
+            k = len(ranges[name]); got = [v.get("values", []) for v in vrs[i:i + k]]; i += k
+            t = time.time()
+            try:
+                with _sheet_lock(name):
+                    if k == 1:
+                        cnt = self._store_full(name, got[0], now); mode = "full"
+                    else:
+                        with self._db() as con: cur = self._meta(con, name)
+                        if cur != metas[name]: cnt = 0; mode = "skipped"  # 다른 세션이 먼저 동기화함
+                        else:
+                            cnt = self._store_tail(name, cur, got[0][0] if got[0] else [], got[1], now); mode = "incremental"
+                if cnt is None: retry[name] = ws; continue
+                report[name] = {"mode": mode, "rows": cnt, "fetch_sec": fetch_sec, "apply_sec": round(time.time() - t, 3), "error": ""}
+            except Exception as e:
+                report[name] = {"mode": "error", "rows": 0, "fetch_sec": fetch_sec, "apply_sec": round(time.time() - t, 3), "error": str(e)}
+        report.update(self._sync_parallel(retry, full=True))
+        self.last_report = {**self.last_report, **report}
+        return report
+
+    # 시트 하나만 동기화 (화면마다 필요한 시트만 따로 불러올 때). 결과는 last_report에 시트별로 덮어쓴다.
+    def sync_one(self, name, ws):
+        rep = self._sync_parallel({name: ws}) if ws is not None else {}
+        self.last_report = {**self.last_report, **rep}
+        return rep.get(name)
+
+    # 이 앱이 시트 중간 값을 고쳤을 때(수정/삭제/clear) 호출 → 다음 sync에서 전체 동기화
+    def invalidate(self, *names):
+        with self._db() as con:
+            for name in names: con.execute("UPDATE sheet_meta SET full_at=NULL WHERE name=?", (name,))
+
+    # 메타 시트의 Edited 값(다른 프로세스 포함, 시트 중간을 고친 마지막 표시)이 마지막으로 반영한 값과 다르면 다음 sync는 전체 동기화
+    def expect_edit(self, name, tok):
+        if not tok: return
+        with _sheet_lock(name), self._db() as con:
+            con.execute("UPDATE sheet_meta SET full_at=NULL, edit_tok=? WHERE name=? AND edit_tok IS NOT ?", (tok, name, tok))
+
+    def invalidate_all(self):
+        with self._db() as con: con.execute("UPDATE sheet_meta SET full_at=NULL")
+
+    def frame(self, name):
+        with self._db() as con:
+            meta = self._meta(con, name)
+            if meta is None or meta["n_rows"] == 0: return pd.DataFrame()
+            df = pd.read_sql_query(f"SELECT * FROM {self._table(name)} ORDER BY rn", con)
+        df = df.drop(columns=["rn"])
+        df.columns = meta["header"]
+        df.attrs['replica_gen'] = meta["gen"]   # 같은 연결에서 읽은 세대 (표와 어긋나지 않게)
+        return df
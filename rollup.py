@@ -0,0 +1,94 @@
+# --- 대시보드용 일별 집계 ---
+# Logs를 (날짜, 공장, 라인, 제품군, 구분)별 수량 합계로 접어 두고, 새로 붙은 로그만 더한다.
+# 원재료 입고 차트용으로 (날짜, 품목명)별 입고 합계도 함께 유지한다.
+import threading
+
+import pandas as pd
+
+from catalog import product_category
+from inventory import log_marker, log_prefix_matches
+
+CUBE_KEYS = ['날짜', '공장', '라인', 'Category', '구분']
+INBOUND_KEYS = ['날짜', '품목명']
+CATEGORIES = ["KA", "KG", "KA반제품", "Compound", "기타"]
+
+
+def _line_col(df):
+    if '라인' in df.columns: return '라인'
+    if len(df.columns) >= 13 and df.columns[12] not in ('Category', 'Shape'): return df.columns[12]  # 13번째 열이 설비 라인
+    return None
+
+
+def _prepare(df):
+    d = pd.DataFrame(index=df.index)
+    dt = df['날짜_dt'] if '날짜_dt' in df.columns else pd.to_datetime(df['날짜'], errors='coerce')
+    d['날짜'] = dt.dt.strftime('%Y-%m-%d')
+    d['공장'] = df['공장'].astype(str) if '공장' in df.columns else '-'
+    lc = _line_col(df)
+    d['라인'] = df[lc].astype(str).replace('', '-') if lc else '-'
+    d['Category'] = df['Category'] if 'Category' in df.columns else product_category(df.drop(columns=['구분'], errors='ignore'))
+    d['구분'] = df['구분'].astype(str)
+    d['품목명'] = df['품목명'].astype(str) if '품목명' in df.columns else '-'
+    d['수량'] = pd.to_numeric(df['수량'], errors='coerce').fillna(0.0)
+    return d[d['날짜'].notna()]
+
+
+def _merge(old, new, keys):
+    if old is None or old.empty: return new
+    if new.empty: return old
+    return pd.concat([old, new], ignore_index=True).groupby(keys, as_index=False, observed=True).sum()
+
+
+class DailyRollup:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._marker = (None, 0, "")
+        self.cube = pd.DataFrame(columns=CUBE_KEYS + ['수량', '건수'])
+        self.inbound = pd.DataFrame(columns=INBOUND_KEYS + ['수량'])
+
+    def _fold(self, df):
+        d = _prepare(df)
+        cube = d.groupby(CUBE_KEYS, as_index=False).agg(수량=('수량', 'sum'), 건수=('수량', 'size'))
+        inbound = d[d['구분'] == '입고'].groupby(INBOUND_KEYS, as_index=False)['수량'].sum()
+        return cube, inbound
+
+    # 지난번에 접은 앞부분이 그대로면 뒤에 붙은 행만, 아니면(삭제/수정) 처음부터 다시 접는다
+    def update(self, df_logs):
+        if df_logs.empty or not {'날짜', '구분', '수량'} <= set(df_logs.columns): return self
+        with self._lock:
+            n = self._marker[1]
+            if n and log_prefix_matches(df_logs, self._marker):
+                if len(df_logs) > n:
+                    cube, inbound = self._fold(df_logs.iloc[n:])
+                    self.cube = _merge(self.cube, cube, CUBE_KEYS); self.inbound = _merge(self.inbound, inbound, INBOUND_KEYS)
+            else:
+                self.cube, self.inbound = self._fold(df_logs)
+            self._marker = log_marker(df_logs)
+        return self
+
+    @property
+    def n_rows(self):
+        return self._marker[1]
+
+    # 오늘 이전 가장 최근 생산일 (없으면 None)
+    def last_production_day(self, today):
+        prod = self.cube[self.cube['구분'] == '생산']
+        days = sorted((d for d in prod['날짜'].unique() if d < today.strftime('%Y-%m-%d')), reverse=True)
+        return days[0] if days else None
+
+    def day_totals(self, day, gubun):
+        c = self.cube[(self.cube['날짜'] == day) & (self.cube['구분'] == gubun)]
+        return c.groupby('Category')['수량'].sum()
+
+    # 기간 × 제품군 격자(생산 없는 날은 0)를 MultiIndex로 바로 만든다
+    def production_trend(self, start, end, category=None):
+        cats = [category] if category else CATEGORIES
+        days = pd.date_range(start=start, end=end).strftime('%Y-%m-%d')
+        prod = self.cube[(self.cube['구분'] == '생산') & self.cube['날짜'].isin(days) & self.cube['Category'].isin(cats)]
+        sums = prod.groupby(['날짜', 'Category'])['수량'].sum()
+        grid = pd.MultiIndex.from_product([days, cats], names=['날짜', 'Category'])
+        return sums.reindex(grid, fill_value=0.0).reset_index()
+
+    def recent_inbound(self, n_days=10):
+        days = sorted(self.inbound['날짜'].unique(), reverse=True)[:n_days]
+        return self.inbound[self.inbound['날짜'].isin(days)], days
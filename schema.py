@@ -0,0 +1,38 @@
+# --- 시트별 열 타입 ---
+# 불러올 때 한 번만 타입을 맞춘다: 날짜 → 날짜_dt(datetime64), 수량류 → float, 반복되는 값 → category, 코드 → 문자열.
+# 화면에서는 매번 astype(str)/str.strip()/pd.to_datetime을 다시 하지 않고 이 열들을 그대로 쓴다.
+# (날짜 열 자체는 시트에 적힌 문자열 그대로 둔다: 같은 날짜 비교, 시트에 다시 쓰는 값으로 쓰임)
+import numpy as np
+import pandas as pd
+
+DATE, FLOAT, CAT, CODE, TEXT = "date", "float", "category", "code", "text"
+
+SCHEMAS = {
+    'Logs': {'날짜': DATE, '시간': TEXT, '공장': CAT, '구분': CAT, '코드': CODE, '품목명': TEXT, '규격': CAT, '타입': CAT,
+             '색상': CAT, '수량': FLOAT, '비고': TEXT, '거래처': CAT, '라인': CAT},
+    'Inventory': {'공장': CAT, '코드': CODE, '품목명': TEXT, '규격': CAT, '타입': CAT, '색상': CAT, '현재고': FLOAT},
+    'Items': {'코드': CODE, '품목명': TEXT, '규격': CAT, '타입': CAT, '색상': CAT, '구분': CAT},
+    'BOM': {'제품코드': CODE, '자재코드': CODE, '소요량': FLOAT, '타입': CAT},
+    'Orders': {'주문번호': CODE, '날짜': DATE, '거래처': TEXT, '코드': CODE, '품목명': TEXT, '수량': FLOAT, '상태': CAT, '비고': TEXT, '타입': CAT},
+}
+LINE_POS = 12  # Logs 13번째 열(헤더가 비어 있으면 '라인'으로 부른다)
+
+
+def _text(s):
+    return s.astype(str).str.strip()
+
+
+def apply_schema(name, df):
+    if df.empty: return df
+    df = df.replace([np.inf, -np.inf], np.nan).fillna("")
+    if name == 'Logs' and len(df.columns) > LINE_POS and not str(df.columns[LINE_POS]).strip():
+        cols = list(df.columns); cols[LINE_POS] = '라인'; df.columns = cols
+    schema = SCHEMAS.get(name, {})
+    for col, kind in schema.items():
+        if col not in df.columns: continue
+        if kind == FLOAT: df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype(float)
+        elif kind == CAT: df[col] = _text(df[col]).astype('category')
+        elif kind == DATE:
+            df[col] = _text(df[col]); df[col + '_dt'] = pd.to_datetime(df[col], errors='coerce')
+        else: df[col] = _text(df[col])
+    return df
@@ -0,0 +1,194 @@
+# --- 시트 API 호출 / 화면 실행 시간 계측 ---
+# 시트 API 호출은 quota.py의 QuotaHTTPClient가 끝날 때마다 observer(api_call)를 불러 한 건씩 남긴다:
+#   작업(values.get, values:append, batchUpdate 등), 시트, 걸린 시간, 한도 대기 시간, 주고받은 바이트, 재시도 횟수, 오류.
+# 화면 실행(rerun)은 begin_run → mark('load') → mark('render') → end_run 으로 큰 구간을 나누고,
+# 그 안에서 section('filter') / section('write')로 감싼 부분은 따로 잰다 (감싼 시간은 바깥 구간에서 뺀다).
+# 호출 기록에는 그때 실행 중이던 메뉴와 구간이 붙는다. 백그라운드 스레드(저널, 로그 정리)는 스레드 이름으로 남는다.
+# 지금 실행은 contextvars로 들고 있고(같은 스레드 + 복사해 넘긴 스레드), 세션별로 열린 실행도 따로 기억해서
+# st.rerun()/st.stop()으로 끝까지 못 간 실행은 그 세션의 다음 실행이 시작될 때 마지막 기록 시점까지로 닫는다.
+# 기록은 프로세스 메모리의 고정 길이 deque(오래된 것부터 밀려남)에만 두고, JSON lines로 내려받을 수 있다.
+# 기록하는 데 든 시간도 따로 더해서(cost) 실행 시간 대비 비율을 보여 준다.
+import contextlib
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import unquote
+
+import pandas as pd
+
+MAX_CALLS = 20000
+MAX_RUNS = 5000
+TOP_SECTIONS = ('setup', 'load', 'render')
+
+_current = contextvars.ContextVar('kpr_run', default=None)
+
+
+def _sheet(rng):
+    rng = str(rng)
+    return rng.split("!", 1)[0].strip("'") if "!" in rng else rng.strip("'")
+
+
+# gspread 요청 → (작업, 시트). 시트 단위가 아닌 요청(스프레드시트 batchUpdate, 메타데이터)은 시트를 비운다.
+def describe(method, endpoint, params=None, body=None):
+    path = unquote(str(endpoint).split("?", 1)[0])
+    if "/spreadsheets/" not in path: return f"{method.upper()} {path.rsplit('/', 1)[-1]}", ""
+    rest = path.split("/spreadsheets/", 1)[1]
+    head, _, tail = rest.partition("/")
+    if not tail: return (head.split(":", 1)[1] if ":" in head else "metadata"), ""
+    if tail.startswith("values:"):
+        op = tail.replace(":", ".", 1)
+        ranges = (params or {}).get("ranges") or [d.get("range", "") for d in (body or {}).get("data", [])] or (body or {}).get("ranges", [])
+        if isinstance(ranges, str): ranges = [ranges]
+        return op, ",".join(dict.fromkeys(_sheet(r) for r in ranges if r))
+    if tail.startswith("values/"):
+        rng = tail[len("values/"):]
+        for suffix in (":append", ":clear"):
+            if rng.endswith(suffix): return "values." + suffix[1:], _sheet(rng[:-len(suffix)])
+        return ("values.get" if method.upper() == "GET" else "values.update"), _sheet(rng)
+    return tail, ""
+
+
+def _size(body):
+    if body is None: return 0
+    try: return len(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError): return 0
+
+
+class Telemetry:
+    def __init__(self, max_calls=MAX_CALLS, max_runs=MAX_RUNS):
+        self.calls = deque(maxlen=max_calls)
+        self.runs = deque(maxlen=max_runs)
+        self.started = time.time()
+        self.cost = 0.0        # 계측 자체에 쓴 시간(초)
+        self.run_time = 0.0    # 기록된 실행 시간 합(초)
+        self._open = {}        # 세션 -> 아직 안 닫힌 실행
+        self._lock = threading.Lock()
+
+    # --- 화면 실행 ---
+    # 같은 세션에서 앞 실행이 끝나지 않았으면(st.rerun/st.stop로 중간에 끝남) 마지막으로 기록한 시점까지로 닫는다
+    def begin_run(self, session="", menu=""):
+        t = time.perf_counter()
+        with self._lock: prev = self._open.pop(session, None)
+        if prev is not None and not prev['done']: self._close(prev, prev['last'], interrupted=True)
+        run = {'id': uuid.uuid4().hex[:8], 'session': session, 'ts': time.time(), 't0': t, 'menu': menu, 'secs': {}, 'calls': 0,
+               'stack': [['setup', t, 0.0]], 'last': t, 'done': False}
+        with self._lock: self._open[session] = run
+        _current.set(run)
+        self.cost += time.perf_counter() - t
+
+    def set_menu(self, menu):
+        run = _current.get()
+        if run is not None: run['menu'] = menu
+
+    # 큰 구간 바꾸기 (setup → load → render)
+    def mark(self, name):
+        run = _current.get()
+        if run is None or run['done']: return
+        t = time.perf_counter()
+        base = run['stack'][0]
+        run['secs'][base[0]] = run['secs'].get(base[0], 0.0) + (t - base[1] - base[2])
+        run['stack'][0] = [name, t, 0.0]; run['last'] = t
+        self.cost += time.perf_counter() - t
+
+    # 안쪽 구간: 감싼 시간은 이 구간으로, 바깥 구간에서는 뺀다
+    @contextlib.contextmanager
+    def section(self, name):
+        run = _current.get()
+        if run is None or run['done']:
+            yield; return
+        t = time.perf_counter()
+        frame = [name, t, 0.0]; run['stack'].append(frame)
+        self.cost += time.perf_counter() - t
+        try:
+            yield
+        finally:
+            t = time.perf_counter()
+            spent = t - frame[1]
+            if frame in run['stack']: run['stack'].remove(frame)
+            run['secs'][name] = run['secs'].get(name, 0.0) + spent - frame[2]
+            if run['stack']: run['stack'][-1][2] += spent
+            run['last'] = t
+            self.cost += time.perf_counter() - t
+
+    def end_run(self):
+        run = _current.get()
+        if run is not None and not run['done']: self._close(run, time.perf_counter())
+
+    def _close(self, run, end, interrupted=False):
+        t = time.perf_counter()
+        base = run['stack'][0]
+        run['secs'][base[0]] = run['secs'].get(base[0], 0.0) + max(end - base[1] - base[2], 0.0)
+        run['done'] = True
+        total = end - run['t0']
+        with self._lock:
+            if self._open.get(run['session']) is run: del self._open[run['session']]
+        rec = {'kind': 'run', 'ts': run['ts'], 'run': run['id'], 'menu': run['menu'], 'sec': round(total, 4),
+               'sections': {k: round(v, 4) for k, v in run['secs'].items()}, 'api_calls': run['calls'], 'interrupted': interrupted}
+        with self._lock:
+            self.runs.append(rec); self.run_time += total
+        self.cost += time.perf_counter() - t
+
+    # --- 시트 API (quota.observer) ---
+    def api_call(self, method, endpoint, kwargs, resp, sec, wait, retries, error):
+        t = time.perf_counter()
+        op, sheet = describe(method, endpoint, kwargs.get('params'), kwargs.get('json'))
+        run = _current.get()
+        if run is not None and not run['done']:
+            run['calls'] += 1; run['last'] = max(run['last'], t)
+            ctx = {'run': run['id'], 'menu': run['menu'], 'section': run['stack'][-1][0] if run['stack'] else ""}
+        else:
+            ctx = {'run': "", 'menu': "", 'section': "bg:" + threading.current_thread().name}
+        rec = {'kind': 'api', 'ts': time.time(), **ctx, 'method': method.upper(), 'op': op, 'sheet': sheet,
+               'sec': round(sec, 4), 'wait': round(wait, 4), 'retries': retries,
+               'bytes_out': _size(kwargs.get('json')) + len(kwargs.get('data') or b""),
+               'bytes_in': len(resp.content) if resp is not None else 0,
+               'status': (getattr(error, 'code', None) or type(error).__name__) if error is not None else getattr(resp, 'status_code', 200)}
+        with self._lock: self.calls.append(rec)
+        self.cost += time.perf_counter() - t
+
+    # --- 조회 / 내보내기 ---
+    def snapshot(self):
+        with self._lock: return list(self.calls), list(self.runs)
+
+    def overhead(self):
+        return self.cost / self.run_time if self.run_time > 0 else 0.0
+
+    def export_jsonl(self):
+        calls, runs = self.snapshot()
+        recs = sorted(calls + runs, key=lambda r: r['ts'])
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in recs).encode("utf-8")
+
+    # 호출을 (메뉴, 구간, 작업, 시트)로 묶은 표: 횟수, 시간 합/평균/p95, 한도 대기, 재시도, 오류, 바이트
+    def api_summary(self, since=0.0):
+        calls = [c for c in self.snapshot()[0] if c['ts'] >= since]
+        cols = ['메뉴', '구간', '작업', '시트', '호출', '시간합(s)', '평균(s)', 'p95(s)', '대기합(s)', '재시도', '오류', '받음(KB)', '보냄(KB)']
+        if not calls: return pd.DataFrame(columns=cols)
+        d = pd.DataFrame(calls)
+        d['err'] = d['status'] != 200
+        g = d.groupby(['menu', 'section', 'op', 'sheet'], sort=False)
+        out = g.agg(호출=('sec', 'size'), 시간합=('sec', 'sum'), 평균=('sec', 'mean'), p95=('sec', lambda s: s.quantile(0.95)),
+                    대기합=('wait', 'sum'), 재시도=('retries', 'sum'), 오류=('err', 'sum'),
+                    받음=('bytes_in', 'sum'), 보냄=('bytes_out', 'sum')).reset_index()
+        out[['받음', '보냄']] = out[['받음', '보냄']] / 1024.0
+        out.columns = cols
+        return out.sort_values('시간합(s)', ascending=False).round(3).reset_index(drop=True)
+
+    # 메뉴별 실행 시간: 횟수, 평균/p95 전체 시간, 구간별 평균, 실행당 API 호출
+    def run_summary(self, since=0.0):
+        runs = [r for r in self.snapshot()[1] if r['ts'] >= since]
+        if not runs: return pd.DataFrame(columns=['메뉴', '실행', '평균(s)', 'p95(s)', 'API/실행', '중단'])
+        d = pd.DataFrame([{'메뉴': r['menu'] or '-', '전체': r['sec'], 'API/실행': r['api_calls'], '중단': r['interrupted'], **r['sections']} for r in runs])
+        secs = [c for c in TOP_SECTIONS if c in d.columns] + sorted(c for c in d.columns if c not in TOP_SECTIONS and c not in ('메뉴', '전체', 'API/실행', '중단'))
+        d[secs] = d[secs].fillna(0.0)
+        g = d.groupby('메뉴', sort=False)
+        out = pd.concat([g.size().rename('실행'), g['전체'].mean().rename('평균(s)'), g['전체'].quantile(0.95).rename('p95(s)'),
+                         g[secs].mean().add_suffix('(s)'), g['API/실행'].mean(), g['중단'].sum()], axis=1).reset_index()
+        return out.sort_values('평균(s)', ascending=False).round(3).reset_index(drop=True)
+
+    def clear(self):
+        with self._lock:
+            self.calls.clear(); self.runs.clear()
+            self.cost = self.run_time = 0.0; self.started = time.time()
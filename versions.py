@@ -0,0 +1,129 @@
+# --- 시트별 버전 (캐시 무효화) ---
+# 앱이 시트를 고칠 때마다 메타 시트(_Meta)에 그 시트의 버전(시각 기반 고유 값)을 새로 적는다.
+# 화면은 시트별 캐시를 (시트 이름, 버전)으로 잡아서 버전이 바뀐 시트만 다시 불러온다.
+# (st.cache_data.clear()로 모든 시트 캐시를 한꺼번에 버리지 않는다)
+# 다른 서버 프로세스가 고친 것도 보이도록 메타 시트는 REFRESH초마다 한 번(get 1회) 다시 읽는다.
+# 버전만으로는 '뒤에 행을 붙였다'와 '중간 행을 고쳤다/지웠다'를 구분할 수 없어서, 중간을 고친 변경은
+# Edited 열에도 같은 값을 적는다. 복제본(replica.expect_edit)은 Edited가 바뀐 시트만 전체 동기화하고,
+# 뒤에 붙이기만 한 변경은 추가분만 받는다.
+import contextlib
+import datetime
+import threading
+import time
+import uuid
+
+META_SHEET = '_Meta'
+META_HEADERS = ['Sheet', 'Version', 'Updated', 'Edited']
+REFRESH = 10   # 초
+LEASE_FREE = 'free'
+
+
+def new_token():
+    return f"{time.time_ns():x}-{uuid.uuid4().hex[:6]}"
+
+
+class SheetVersions:
+    def __init__(self, ws, refresh=REFRESH):
+        self.ws = ws
+        self.refresh = refresh
+        self._ver = {}        # 시트 -> 버전 (메타 시트 기준)
+        self._edit = {}       # 시트 -> 중간을 고친 마지막 변경의 버전 (Edited 열)
+        self._unsynced = {}   # 메타 시트에 못 적은 버전 (이 프로세스 안에서 메타 값 뒤에 붙여 쓴다)
+        self._rows = {}       # 시트 -> 메타 시트 행 번호
+        self._read_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read(self):
+        rows, ver, edit = {}, {}, {}
+        for i, r in enumerate(self.ws.get("A2:D")):
+            n = str(r[0]).strip() if r else ""
+            if not n: continue
+            rows.setdefault(n, i + 2)
+            ver[n] = ver.get(n, "") + (str(r[1]).strip() if len(r) > 1 else "")  # 같은 이름이 두 줄이면 합쳐서 비교
+            edit[n] = edit.get(n, "") + (str(r[3]).strip() if len(r) > 3 else "")
+        self._rows, self._ver, self._edit = rows, ver, edit
+        self._read_at = time.time()
+
+    # 메타 시트에 없는 시트 줄을 만든다 (시작할 때 한 번)
+    def ensure(self, names):
+        if self.ws is None: return
+        with self._lock:
+            self._read()
+            new = [[n, new_token(), "", ""] for n in names if n not in self._rows]
+            if new: self.ws.append_rows(new); self._read()
+            if self.ws.get("D1") != [[META_HEADERS[3]]]: self.ws.update("D1", [[META_HEADERS[3]]])   # 예전 메타 시트에 Edited 열 이름
+
+    def token(self, name):
+        with self._lock:
+            if self.ws is not None and time.time() - self._read_at > self.refresh:
+                try: self._read()
+                except Exception: self._read_at = time.time()   # 못 읽으면 다음 주기까지 지금 값을 쓴다
+            return self._ver.get(name, "") + self._unsynced.get(name, "")
+
+    # 시트 중간을 고친 마지막 변경의 버전 (token()이 메타 시트를 다시 읽은 값 기준)
+    def edited(self, name):
+        with self._lock: return self._edit.get(name, "")
+
+    # 고친 시트들의 버전을 새 값으로 (batch_update 1회). 메타 시트에 못 적어도 이 프로세스에서는 바로 바뀐다.
+    # edited: 그중 중간 행을 고치거나 지운 시트 (Edited 열도 같은 값으로) — 나머지는 뒤에 붙이기만 한 변경
+    def bump(self, *names, edited=()):
+        names = [n for n in dict.fromkeys(list(names) + list(edited)) if n]
+        if not names: return
+        edited = set(edited)
+        tok = new_token()
+        stamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            try:
+                if self.ws is None: raise RuntimeError("메타 시트 없음")
+                if any(n not in self._rows for n in names): self._read()
+                cells = [{"range": f"B{self._rows[n]}:D{self._rows[n]}" if n in edited else f"B{self._rows[n]}:C{self._rows[n]}",
+                          "values": [[tok, stamp, tok] if n in edited else [tok, stamp]]} for n in names if n in self._rows]
+                new = [[n, tok, stamp, tok if n in edited else ""] for n in names if n not in self._rows]
+                if cells: self.ws.batch_update(cells)
+                if new: self.ws.append_rows(new); self._read_at = 0.0
+                for n in names: self._ver[n] = tok; self._unsynced.pop(n, None)
+                for n in edited: self._edit[n] = tok
+            except Exception:
+                for n in names: self._unsynced[n] = tok
+
+
+# --- 메타 시트 임대 칸 ---
+# 여러 서버 프로세스 중 한 곳만 해야 하는 일(로그 정리, 재고 시트 새 행 만들기)을 메타 시트 한 줄로 잡는다.
+# A열: 임대 이름, B열: 비어 있음 표시 또는 "소유자@만료시각". findReplace로 읽은 값 그대로일 때만 바꾼다 (compare-and-swap).
+# 잡은 채로 죽은 프로세스의 임대는 만료시각이 지나면 가져온다.
+class MetaLease:
+    def __init__(self, ws, name, ttl):
+        self.ws = ws
+        self.name = name
+        self.ttl = ttl
+        self.owner = uuid.uuid4().hex[:8]
+
+    # 임대 줄이 없으면 만들고, 칸이 비어 있으면 비어 있음 표시를 적는다 (빈 칸은 findReplace로 찾을 수 없음)
+    def _cell(self):
+        for i, r in enumerate(self.ws.get("A2:B")):
+            if r and str(r[0]).strip() == self.name:
+                v = str(r[1]).strip() if len(r) > 1 else ""
+                if not v: self.ws.update([[LEASE_FREE]], f"B{i + 2}"); v = LEASE_FREE
+                return i + 2, v
+        self.ws.append_row([self.name, LEASE_FREE, ""])
+        return self._cell()
+
+    def _swap(self, row, find, replacement):
+        reply = self.ws.spreadsheet.batch_update({"requests": [{"findReplace": {
+            "find": find, "replacement": replacement, "matchCase": True, "matchEntireCell": True,
+            "range": {"sheetId": self.ws.id, "startRowIndex": row - 1, "endRowIndex": row, "startColumnIndex": 1, "endColumnIndex": 2}}}]})
+        return ((reply.get("replies") or [{}])[0].get("findReplace") or {}).get("occurrencesChanged", 0) == 1
+
+    # 잡았으면 True를 넘기고 끝나면 놓는다. 다른 프로세스가 잡고 있으면 False (기다리지 않음).
+    @contextlib.contextmanager
+    def hold(self):
+        row, cur = self._cell()
+        owner, _, until = cur.partition("@")
+        try: free = cur == LEASE_FREE or owner == self.owner or float(until) < time.time()
+        except ValueError: free = True
+        mine = f"{self.owner}@{time.time() + self.ttl:.0f}"
+        got = free and self._swap(row, cur, mine)
+        try:
+            yield got
+        finally:
+            if got: self._swap(row, mine, LEASE_FREE)
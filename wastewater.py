@@ -0,0 +1,87 @@
+# --- 폐수배출시설 운영일지 ---
+# Logs에서 1공장 생산량을 날짜별로 한 번에 묶고(groupby 1회), 그 집계로 기간(월/분기/연/직접 지정) 일지와 연간 보고서를 만든다.
+import datetime
+
+import numpy as np
+import pandas as pd
+
+WW_HEADERS = ['날짜', '대표자', '환경기술인', '가동시간', '플라스틱재생칩', '합성수지', '안료', '용수사용량', '폐수발생량', '위탁량', '기타']
+FACTORY = '1공장'
+CEO, ENGINEER = "문성인", "문주혁"
+RESIN_RATIO = 0.8    # 생산량 대비 합성수지 사용량
+PIGMENT = 0.2
+WATER = 2.16
+NOTE = "전량 재이용"
+HOURS_SAT, HOURS = "08:00~15:00", "08:00~08:00"
+WEEKDAYS = ["월", "화", "수", "목", "금", "토", "일"]
+
+
+def period_range(kind, year, n=1):
+    if kind == "월간":
+        start = datetime.date(year, n, 1)
+        end = datetime.date(year + (n == 12), n % 12 + 1, 1) - datetime.timedelta(days=1)
+    elif kind == "분기":
+        start = datetime.date(year, 3 * n - 2, 1)
+        end = datetime.date(year + (n == 4), (3 * n) % 12 + 1, 1) - datetime.timedelta(days=1)
+    else:
+        start, end = datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+    return start, end
+
+
+def journal_date(d):
+    d = pd.DatetimeIndex(d)
+    return d.strftime('%Y년 %m월 %d일') + " " + pd.Index([WEEKDAYS[w] for w in d.dayofweek]) + "요일"
+
+
+# 기간 안의 모든 날짜에 대해 (생산량, 생산 기록 수). 기록이 없는 날은 0.
+def daily_production(df_logs, start, end, factory=FACTORY):
+    days = pd.date_range(start, end)
+    if df_logs.empty: return pd.DataFrame({'생산량': 0.0, '건수': 0}, index=days)
+    dt = df_logs['날짜_dt'] if '날짜_dt' in df_logs.columns else pd.to_datetime(df_logs['날짜'], errors='coerce')
+    m = (df_logs['구분'] == '생산') & (df_logs['공장'] == factory) & (dt >= days[0]) & (dt < days[-1] + pd.Timedelta(days=1))
+    g = df_logs.loc[m, '수량'].groupby(dt[m].dt.normalize()).agg(['sum', 'size'])
+    g.columns = ['생산량', '건수']
+    return g.reindex(days, fill_value=0).astype({'생산량': float, '건수': int})
+
+
+def journal_rows(daily, use_random=False, seed=None):
+    on = (daily['건수'] > 0).to_numpy()
+    resin = np.round(daily['생산량'].to_numpy() * RESIN_RATIO)
+    if use_random: resin = np.round(resin * np.random.default_rng(seed).uniform(0.99, 1.01, len(resin)))
+    sat = daily.index.dayofweek == 5
+    blank = np.full(len(daily), "", dtype=object)
+    def pick(v): return np.where(on, np.asarray(v, dtype=object), blank)
+    return pd.DataFrame({
+        '날짜': journal_date(daily.index), '대표자': pick(CEO), '환경기술인': pick(ENGINEER),
+        '가동시간': pick(np.where(sat, HOURS_SAT, HOURS)), '플라스틱재생칩': pick(0), '합성수지': pick(resin.astype(int)),
+        '안료': pick(PIGMENT), '용수사용량': pick(WATER), '폐수발생량': pick(0), '위탁량': blank, '기타': pick(NOTE),
+    }, columns=WW_HEADERS)
+
+
+def skip_existing(rows, df_wastewater):
+    if df_wastewater.empty or '날짜' not in df_wastewater.columns: return rows
+    return rows[~rows['날짜'].isin(set(df_wastewater['날짜'].astype(str).str.strip()))].reset_index(drop=True)
+
+
+# 연간 보고서: 월별 가동일수 / 생산량 / 원료(합성수지·안료) / 용수 / 폐수 발생·위탁 — 일지와 같은 집계에서 계산
+def annual_report(daily):
+    on = daily['건수'] > 0
+    d = pd.DataFrame({
+        '가동일수': on.astype(int), '생산량(kg)': daily['생산량'],
+        '합성수지(kg)': np.round(daily['생산량'] * RESIN_RATIO).where(on, 0.0),
+        '안료(kg)': np.where(on, PIGMENT, 0.0), '용수사용량(㎥)': np.where(on, WATER, 0.0),
+        '폐수발생량(㎥)': 0.0, '위탁량(㎥)': 0.0,
+    }, index=daily.index)
+    rep = d.groupby(d.index.month).sum()
+    rep.index = [f"{m}월" for m in rep.index]
+    rep.loc['합계'] = rep.sum()
+    rep['가동일수'] = rep['가동일수'].astype(int)
+    return rep.rename_axis('월').reset_index()
+
+
+def report_html(rep, year, factory=FACTORY):
+    fmt = {c: (lambda v: f"{v:,.0f}") for c in rep.columns if c not in ('월', '안료(kg)', '용수사용량(㎥)')}
+    fmt.update({'안료(kg)': lambda v: f"{v:,.1f}", '용수사용량(㎥)': lambda v: f"{v:,.2f}"})
+    table = rep.to_html(index=False, border=1, formatters=fmt, justify='center')
+    return (f"<h2 style='text-align:center;'>{year}년 폐수배출시설 연간 운영 보고서</h2>"
+            f"<p>사업장: {factory} &nbsp; | &nbsp; 대표자: {CEO} &nbsp; | &nbsp; 환경기술인: {ENGINEER} &nbsp; | &nbsp; 비고: {NOTE}</p>{table}")
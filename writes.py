@@ -0,0 +1,68 @@
+# --- 시트 쓰기 버퍼 ---
+# 버튼 한 번(사용자 동작 1회)에 생기는 행 추가/셀 수정/행 삭제를 모아 두었다가
+# 시트별로 append_rows 1회 + batch_update 1회 + 행 삭제 1회로 한꺼번에 보낸다.
+from collections import namedtuple
+
+from gspread.utils import rowcol_to_a1
+
+WriteResult = namedtuple("WriteResult", "ok error calls changed")
+
+
+class WriteBuffer:
+    def __init__(self):
+        self._sheets = {}   # title -> ws (추가된 순서 유지)
+        self._appends = {}  # title -> [row, ...]
+        self._cells = {}    # title -> {(row, col): value}
+        self._deletes = {}  # title -> set(row)
+
+    def _ws(self, ws):
+        self._sheets.setdefault(ws.title, ws)
+        return ws.title
+
+    def append(self, ws, row):
+        self._appends.setdefault(self._ws(ws), []).append(list(row))
+
+    def update_cell(self, ws, row, col, value):
+        self._cells.setdefault(self._ws(ws), {})[(int(row), int(col))] = value
+
+    def delete_rows(self, ws, rows):
+        self._deletes.setdefault(self._ws(ws), set()).update(int(r) for r in rows)
+
+    # 행 추가만 꺼내 간다 (저널에 맡겨 나중에 보낼 때). {시트 이름: [행, ...]}
+    # titles를 주면 그 시트들의 행 추가만 꺼내고, 나머지는 flush 때 바로 보낸다.
+    def take_appends(self, titles=None):
+        out = {t: rows for t, rows in self._appends.items() if rows and (titles is None or t in titles)}
+        for t in out: del self._appends[t]
+        return out
+
+    # flush 때 추가할 행 {시트 이름: [행, ...]}
+    def appended(self):
+        return {t: list(rows) for t, rows in self._appends.items() if rows}
+
+    def __len__(self):
+        return (sum(len(v) for v in self._appends.values()) + sum(len(v) for v in self._cells.values())
+                + sum(len(v) for v in self._deletes.values()))
+
+    # 셀 수정 → 행 추가 → 행 삭제 순서로 보낸다. (삭제가 행 번호를 밀기 때문에 마지막)
+    # 시트끼리는 처음 쓴 순서대로 보내고, 실패하면 거기서 멈춘다 (뒤 시트는 보내지 않음).
+    # 실패해도 예외를 올리지 않고, 동작 전체에 대한 결과 하나를 돌려준다.
+    def flush(self):
+        calls = 0; changed = []
+        try:
+            for t, ws in self._sheets.items():
+                cells = self._cells.get(t)
+                if cells:
+                    ws.batch_update([{"range": rowcol_to_a1(r, c), "values": [[v]]} for (r, c), v in sorted(cells.items())])
+                    calls += 1; changed.append(t)
+                if self._appends.get(t):
+                    ws.append_rows(self._appends[t])
+                    calls += 1
+                if self._deletes.get(t):
+                    reqs = [{"deleteDimension": {"range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": r - 1, "endIndex": r}}}
+                            for r in sorted(self._deletes[t], reverse=True)]
+                    ws.spreadsheet.batch_update({"requests": reqs})
+                    calls += 1
+                    if t not in changed: changed.append(t)
+        except Exception as e:
+            return WriteResult(False, e, calls, list(self._sheets))  # 일부만 반영됐을 수 있으므로 전부 변경 처리
+        return WriteResult(True, None, calls, changed)